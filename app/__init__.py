@@ -1,6 +1,5 @@
 from flask import Flask
 from flask_restful import Api
-from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
@@ -10,11 +9,29 @@ from flask_log_request_id import RequestID, RequestIDLogFilter
 import logging
 
 from .config.config import get_config
-
-
-db = SQLAlchemy()
+from .utils.db_routing import RoutingSQLAlchemy
+from .utils.admission import AdmissionController
+from .utils.profiling import RequestProfiler
+from .utils.slow_query import SlowQueryRecorder
+from .utils.compression import ResponseCompressor
+from .utils.memory_ledger import MemoryLedger
+from .utils.traffic_capture import TrafficRecorder
+from .utils.invalidation import InvalidationBus
+from .utils.prepared_statements import PreparedStatements
+from .utils.logging_utils import JsonFormatter, RouteSamplingFilter, start_queue_logging
+
+
+db = RoutingSQLAlchemy()
 jwt = JWTManager()
 bcrypt = Bcrypt()
+admission = AdmissionController()
+profiler = RequestProfiler()
+slow_queries = SlowQueryRecorder()
+compressor = ResponseCompressor()
+memory_ledger = MemoryLedger()
+traffic = TrafficRecorder()
+invalidation = InvalidationBus()
+prepared = PreparedStatements()
 swagger = None
 
 def create_app():
@@ -36,6 +53,14 @@ def create_app():
     db.init_app(app)
     jwt.init_app(app)
     bcrypt.init_app(app)
+    admission.init_app(app)
+    profiler.init_app(app)
+    slow_queries.init_app(app)
+    compressor.init_app(app)
+    memory_ledger.init_app(app)
+    traffic.init_app(app)
+    invalidation.init_app(app)
+    prepared.init_app(app)
 
 
     # Initialize Swagger
@@ -43,37 +68,62 @@ def create_app():
     if swagger is None:
         swagger = setup_swagger(app)
 
-    from .models import User, Expense, ExpenseParticipation, PingLog
-    Migrate(app, db) # how tables and others formed after this?
+    from .models import (
+        User, Expense, ExpenseParticipation, PingLog,
+        ExpenseEvent, BalanceSnapshot, PairwiseBalance, ReportJob,
+        ArchivedExpense, ArchivedExpenseParticipation, CarriedBalance, ArchiveState,
+        Group, GroupMembership, Settlement
+    )
+    from .services.partition_service import migration_filter
+    Migrate(app, db, include_object=migration_filter()) # how tables and others formed after this?
 
 
-    print("all..........good.....")
+    app.logger.debug("Application initialised")
 
     with app.app_context():
         from .resources import register_resources
         register_resources(api)
 
+    from .commands import register_commands
+    register_commands(app)
+
 
     return app
 
 def setup_logging(app):
-    """Set up the logging for the application with a request ID."""
+    """Set up the logging for the application with a request ID.
+
+    The app logger only enqueues records; a background listener formats and
+    writes them so request threads never block on stderr.
+    """
 
     RequestID(app)
 
     app.logger.handlers.clear()
 
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
-    formatter = logging.Formatter("[%(asctime)s] {%(pathname)s:%(lineno)d} %(levelname)s %(request_id)s - %(message)s")
+    console_handler.setLevel(app.config['LOG_LEVEL'])
+    if app.config['LOG_JSON']:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(app.config['LOG_FORMAT'])
     console_handler.setFormatter(formatter)
-    console_handler.addFilter(RequestIDLogFilter())
+
+    # Request id and sampling are resolved on the request thread, before queueing
+    queue_handler, _ = start_queue_logging(
+        [console_handler],
+        [RequestIDLogFilter(), RouteSamplingFilter(app.config['LOG_SAMPLE_RATES'],
+                                                   app.config['LOG_DEFAULT_SAMPLE_RATE'])],
+        level=app.config['LOG_LEVEL']
+    )
 
     # Add handlers to the app's logger
-    app.logger.addHandler(console_handler)
+    app.logger.addHandler(queue_handler)
 
     # Set the app's logging level
-    app.logger.setLevel(logging.DEBUG)
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+    for name, level in app.config['LOG_LEVELS'].items():
+        logging.getLogger(name).setLevel(level)
     app.logger.info("Logging is set up with request ID")
 
 
@@ -0,0 +1,19 @@
+from functools import wraps
+from flask import current_app as app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+
+
+def is_admin(user_id) -> bool:
+    """Whether a user id is listed in ADMIN_USER_IDS."""
+    return user_id in app.config.get('ADMIN_USER_IDS', ())
+
+
+def admin_required(f):
+    """Require a valid JWT whose identity is listed in ADMIN_USER_IDS."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        verify_jwt_in_request()
+        if not is_admin(get_jwt_identity()):
+            return {"message": "Admin privileges required"}, 403
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,320 @@
+import click
+from flask.cli import AppGroup
+
+
+journal_cli = AppGroup('journal', help='Expense event journal maintenance.')
+
+
+@journal_cli.command('backfill')
+def journal_backfill():
+    """Record journal events for expenses created before the journal existed."""
+    from app.services.expense_journal_service import ExpenseJournalService
+
+    count = ExpenseJournalService.backfill()
+    click.echo(f"Backfilled {count} expense(s)")
+
+
+@journal_cli.command('snapshot')
+@click.option('--user-id', 'user_ids', type=int, multiple=True, help='Restrict to these users.')
+def journal_snapshot(user_ids):
+    """Write balance snapshots at the current journal head."""
+    from app.services.expense_journal_service import ExpenseJournalService
+
+    count = ExpenseJournalService.take_snapshots(user_ids or None)
+    click.echo(f"Wrote {count} snapshot(s)")
+
+
+@journal_cli.command('verify')
+@click.option('--user-id', 'user_ids', type=int, multiple=True, help='Restrict to these users.')
+def journal_verify(user_ids):
+    """Check that snapshot + replay matches a full recomputation."""
+    from app.services.expense_journal_service import ExpenseJournalService
+
+    mismatches = ExpenseJournalService.verify(user_ids or None)
+    if not mismatches:
+        click.echo("Journal is consistent")
+        return
+
+    for mismatch in mismatches:
+        click.echo(
+            f"user {mismatch['user_id']}: "
+            f"journal paid={mismatch['journal_paid']} owed={mismatch['journal_owed']}, "
+            f"expected paid={mismatch['expected_paid']} owed={mismatch['expected_owed']}"
+        )
+    raise click.ClickException(f"{len(mismatches)} user(s) out of sync")
+
+
+ledger_cli = AppGroup('ledger', help='Pairwise balance ledger maintenance.')
+
+
+@ledger_cli.command('rebuild')
+def ledger_rebuild():
+    """Rebuild the pairwise ledger from the expense tables."""
+    from app.services.pairwise_ledger_service import PairwiseLedgerService
+
+    count = PairwiseLedgerService.rebuild()
+    click.echo(f"Wrote {count} pairwise row(s)")
+
+
+@ledger_cli.command('verify')
+@click.option('--user-id', type=int, help='Restrict to this user.')
+def ledger_verify(user_id):
+    """Check the pairwise ledger against the expense tables."""
+    from app.services.pairwise_ledger_service import PairwiseLedgerService
+
+    mismatches = PairwiseLedgerService.verify(user_id)
+    if not mismatches:
+        click.echo("Ledger is consistent")
+        return
+
+    for mismatch in mismatches:
+        click.echo(
+            f"{mismatch['user_id']} -> {mismatch['counterparty_id']}: "
+            f"ledger={mismatch['ledger_amount']} expected={mismatch['expected_amount']}"
+        )
+    raise click.ClickException(f"{len(mismatches)} pair(s) out of sync")
+
+
+jobs_cli = AppGroup('jobs', help='Background report jobs.')
+
+
+@jobs_cli.command('worker')
+@click.option('--processes', type=int, default=None,
+              help='Worker processes (defaults to REPORT_WORKER_PROCESSES).')
+def jobs_worker(processes):
+    """Run a pool of report workers until interrupted."""
+    import multiprocessing
+    from flask import current_app
+    from app.services.report_job_service import _worker_main
+
+    processes = processes or current_app.config['REPORT_WORKER_PROCESSES']
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_worker_main, daemon=True) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    click.echo(f"Started {processes} report worker(s)")
+
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+@jobs_cli.command('run')
+@click.option('--max-jobs', type=int, default=None, help='Stop after this many jobs.')
+def jobs_run(max_jobs):
+    """Process queued jobs in the current process and exit when idle."""
+    from app.services.report_job_service import ReportJobService
+
+    count = ReportJobService.work(max_jobs=max_jobs, exit_when_idle=True)
+    click.echo(f"Processed {count} job(s)")
+
+
+export_cli = AppGroup('export', help='Analytics exports.')
+
+
+@export_cli.command('ledger')
+@click.argument('path')
+@click.option('--start-date', type=click.DateTime(), help='Include expenses on/after this date.')
+@click.option('--end-date', type=click.DateTime(), help='Include expenses before this date.')
+@click.option('--user-id', 'user_ids', type=int, multiple=True,
+              help='Only expenses created by or shared with these users.')
+def export_ledger(path, start_date, end_date, user_ids):
+    """Export the expense/participation ledger to a Parquet file."""
+    from app.services.ledger_export_service import LedgerExportService
+
+    count = LedgerExportService.export_parquet(path, start_date, end_date, user_ids or None)
+    click.echo(f"Wrote {count} row(s) to {path}")
+
+
+profiles_cli = AppGroup('profiles', help='Captured request profiles.')
+
+
+@profiles_cli.command('list')
+def profiles_list():
+    """List captured profiles, newest first."""
+    from flask import current_app
+    from app.utils.profiling import list_profiles
+
+    for profile in list_profiles(current_app.config['PROFILING_DIR']):
+        sql_ms = sum(query['duration_ms'] for query in profile['sql'])
+        click.echo(
+            f"{profile['profile_id']}  {profile['request_id']}  {profile['captured_at']}  "
+            f"{profile['method']} {profile['path']}  "
+            f"{profile['status']}  {profile['duration_ms']:.1f}ms  "
+            f"sql={len(profile['sql'])}/{sql_ms:.1f}ms"
+        )
+
+
+@profiles_cli.command('show')
+@click.argument('ident')
+@click.option('--limit', type=int, default=20, help='Number of functions to show.')
+@click.option('--sort', default='cumulative', help='pstats sort key.')
+def profiles_show(ident, limit, sort):
+    """Summarize a captured profile, by profile id or request id, and its slowest SQL."""
+    import pstats
+    from flask import current_app
+    from app.utils.profiling import find_profiles
+
+    found = find_profiles(current_app.config['PROFILING_DIR'], ident)
+    if not found:
+        raise click.ClickException(f"No profile for {ident}")
+    meta = found[0]
+    if len(found) > 1:
+        click.echo(f"{len(found)} profiles share request id {ident}; showing the newest, {meta['profile_id']}")
+    click.echo(f"{meta['method']} {meta['path']} -> {meta['status']} in {meta['duration_ms']:.1f}ms")
+
+    click.echo("\nSlowest SQL:")
+    for query in sorted(meta['sql'], key=lambda q: q['duration_ms'], reverse=True)[:limit]:
+        statement = ' '.join(query['statement'].split())
+        click.echo(f"  {query['duration_ms']:>9.3f}ms  {statement[:160]}")
+
+    click.echo("")
+    pstats.Stats(meta['prof_path']).sort_stats(sort).print_stats(limit)
+
+
+users_cli = AppGroup('users', help='User administration.')
+
+
+@users_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--processes', type=int, default=None,
+              help='Password hashing processes (defaults to USER_IMPORT_PROCESSES).')
+@click.option('--batch-size', type=int, default=None,
+              help='Rows per INSERT batch (defaults to USER_IMPORT_BATCH_SIZE).')
+def users_import(path, processes, batch_size):
+    """Import users from a CSV with name,email,mobile,password columns."""
+    import csv
+    from app.services.user_import_service import UserImportService
+
+    with open(path, newline='') as csv_file:
+        rows = list(csv.DictReader(csv_file))
+
+    result = UserImportService.import_users(rows, processes=processes, batch_size=batch_size)
+    for error in result['errors']:
+        # +2: header line and 1-based line numbers
+        click.echo(f"line {error['row'] + 2} ({error['email']}): {error['error']}", err=True)
+    click.echo(f"Created {len(result['created'])} user(s), {len(result['errors'])} error(s)")
+
+
+archive_cli = AppGroup('archive', help='Expense archival.')
+
+
+@archive_cli.command('run')
+@click.option('--before', type=click.DateTime(),
+              help='Archive expenses dated before this (defaults to ARCHIVE_AFTER_DAYS ago).')
+@click.option('--batch-size', type=int, default=None,
+              help='Expenses moved per transaction (defaults to ARCHIVE_BATCH_SIZE).')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many batches.')
+def archive_run(before, batch_size, max_batches):
+    """Move old expenses to the archive tables and carry their totals forward."""
+    from app.services.archive_service import ArchiveService
+
+    result = ArchiveService.archive(before, batch_size, max_batches)
+    click.echo(f"Archived {result['archived']} expense(s) in {result['batches']} batch(es) "
+               f"before {result['horizon'].isoformat()}")
+
+
+partitions_cli = AppGroup('partitions', help='expense_participation partitioning (PostgreSQL).')
+
+
+@partitions_cli.command('convert')
+@click.option('--strategy', type=click.Choice(['hash', 'range']), default=None,
+              help='hash of user_id or monthly ranges of expense date '
+                   '(defaults to PARTICIPATION_PARTITION_STRATEGY).')
+@click.option('--partitions', type=int, default=None,
+              help='Hash partitions (defaults to PARTICIPATION_HASH_PARTITIONS).')
+@click.option('--months-ahead', type=int, default=None,
+              help='Range: months to create past the current one.')
+@click.option('--keep-old', is_flag=True, help='Keep the original table as expense_participation_old.')
+def partitions_convert(strategy, partitions, months_ahead, keep_old):
+    """Rebuild expense_participation as a partitioned table (locks it while copying)."""
+    from app.services.partition_service import PartitionService
+
+    result = PartitionService.convert(strategy, partitions, months_ahead, keep_old)
+    click.echo(f"Copied {result['rows']} row(s) into {len(result['partitions'])} "
+               f"{result['strategy']} partition(s)")
+
+
+@partitions_cli.command('create-future')
+@click.option('--months-ahead', type=int, default=None,
+              help='Months to create past the current one (defaults to PARTICIPATION_PARTITION_MONTHS_AHEAD).')
+def partitions_create_future(months_ahead):
+    """Create upcoming monthly partitions (range layout)."""
+    from app.services.partition_service import PartitionService
+
+    created = PartitionService.create_future_partitions(months_ahead)
+    click.echo(f"Created {len(created)} partition(s){': ' + ', '.join(created) if created else ''}")
+
+
+@partitions_cli.command('status')
+def partitions_status():
+    """Show the partitioning strategy and partitions."""
+    from app.services.partition_service import PartitionService
+
+    status = PartitionService.status()
+    click.echo(f"strategy: {status['strategy'] or 'not partitioned'}")
+    for partition in status['partitions']:
+        click.echo(f"{partition['name']:<40} {partition['estimated_rows']:>12}  {partition['bound']}")
+
+
+traffic_cli = AppGroup('traffic', help='Captured traffic replay.')
+
+
+@traffic_cli.command('replay')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--speed', type=float, default=1.0, show_default=True,
+              help='Pace multiplier over the recorded timing; 0 sends back to back.')
+@click.option('--base-url', default=None, help='Replay against a running server instead of in process.')
+@click.option('--ignore', 'ignore_fields', multiple=True,
+              help='Extra response keys to skip when diffing.')
+@click.option('--limit', type=int, default=None, help='Replay only the first N requests.')
+@click.option('--show-diffs', type=int, default=5, show_default=True,
+              help='Mismatching requests to print in detail.')
+@click.option('--output', type=click.Path(dir_okay=False), default=None,
+              help='Write per-request results as JSON lines.')
+def traffic_replay(paths, speed, base_url, ignore_fields, limit, show_diffs, output):
+    """Replay captured requests and report latency and response differences."""
+    import json
+    from flask import current_app
+    from app.utils.traffic_capture import DEFAULT_IGNORE_FIELDS, load_capture, replay, summarize
+
+    records = load_capture(paths)[:limit]
+    results = replay(current_app._get_current_object(), records, speed, base_url,
+                     DEFAULT_IGNORE_FIELDS | set(ignore_fields))
+    if output:
+        with open(output, 'w') as out:
+            for result in results:
+                out.write(json.dumps(result) + '\n')
+
+    click.echo(f"{'requests':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'rec p50':>9} "
+               f"{'status!=':>8} {'body!=':>7}  route")
+    for row in summarize(results):
+        recorded = f"{row['recorded_p50_ms']:.1f}" if row['recorded_p50_ms'] is not None else '-'
+        click.echo(f"{row['count']:>8} {row['p50_ms']:>9.1f} {row['p90_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+                   f"{row['max_ms']:>9.1f} {recorded:>9} {row['status_mismatches']:>8} "
+                   f"{row['body_mismatches']:>7}  {row['method']} {row['route']}")
+
+    mismatched = [result for result in results
+                  if result['diffs'] or result['status'] != result['recorded_status']]
+    for result in mismatched[:show_diffs]:
+        click.echo(f"\n{result['method']} {result['path']}: "
+                   f"status {result['recorded_status']} -> {result['status']}")
+        for diff in result['diffs'][:10]:
+            click.echo(f"  {diff}")
+    click.echo(f"\nReplayed {len(results)} request(s), {len(mismatched)} mismatch(es)")
+
+
+def register_commands(app):
+    """Register all CLI command groups"""
+    app.cli.add_command(journal_cli)
+    app.cli.add_command(ledger_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(export_cli)
+    app.cli.add_command(profiles_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(traffic_cli)
@@ -13,4 +13,24 @@ class InvalidParticipantsError(ExpenseCalculationError):
 
 class InvalidSplitMethodError(ExpenseCalculationError):
     """Raised when split method is invalid"""
-    pass
\ No newline at end of file
+    pass
+
+class ReportJobLimitError(Exception):
+    """Raised when a user already has the maximum number of active report jobs"""
+    pass
+
+class ReportJobLeaseLostError(Exception):
+    """Raised when a worker's claim on a report job was taken over after its lease expired"""
+    pass
+
+class ExpenseVersionConflictError(Exception):
+    """Raised when an expense changed since the version the client read"""
+    pass
+
+class GroupMembershipError(Exception):
+    """Raised when a user acts on, or is added to an expense in, a group they don't belong to"""
+    pass
+
+class InvalidSettlementError(Exception):
+    """Raised when a settlement's amount or parties are invalid"""
+    pass
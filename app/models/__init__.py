@@ -1,6 +1,12 @@
 from app import db
 from .user import User
 from .expense import Expense, ExpenseParticipation, SplitMethod
+from .journal import ExpenseEvent, ExpenseEventType, BalanceSnapshot
+from .pairwise import PairwiseBalance
+from .report_job import ReportJob, ReportJobStatus, ReportScope, SettlementMode
+from .archive import ArchivedExpense, ArchivedExpenseParticipation, CarriedBalance, ArchiveState
+from .group import Group, GroupMembership
+from .settlement import Settlement
 
 from datetime import datetime
 
@@ -0,0 +1,58 @@
+from app import db
+from datetime import datetime
+from .expense import SplitMethod
+
+
+class ArchivedExpense(db.Model):
+    """An expense moved out of the working tables; keeps its original id.
+
+    Archived expenses are read-only.
+    """
+    __tablename__ = 'archived_expense'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(200), nullable=False)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    date = db.Column(db.DateTime)
+    split_method = db.Column(db.Enum(SplitMethod), nullable=False)
+    creator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey('expense_group.id'), nullable=True)
+    version = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    participations = db.relationship('ArchivedExpenseParticipation', backref='expense', lazy=True)
+
+    __table_args__ = (
+        db.Index('ix_archived_expense_creator_id_date', 'creator_id', 'date'),
+        db.Index('ix_archived_expense_date', 'date'),
+        db.Index('ix_archived_expense_group_id_date', 'group_id', 'date'),
+    )
+
+
+class ArchivedExpenseParticipation(db.Model):
+    __tablename__ = 'archived_expense_participation'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    expense_id = db.Column(db.Integer, db.ForeignKey('archived_expense.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    share_amount = db.Column(db.Numeric(10, 2), nullable=False)
+    share_percentage = db.Column(db.Numeric(5, 2), nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('expense_id', 'user_id', name='unique_archived_expense_user'),
+        db.Index('ix_archived_expense_participation_user_id', 'user_id'),
+    )
+
+
+class CarriedBalance(db.Model):
+    """Per-user totals of every archived expense, carried forward."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, autoincrement=False)
+    total_paid = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    total_owed = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ArchiveState(db.Model):
+    """Single row. Expenses dated before `horizon` may be in the archive
+    tables; everything dated on or after it is in the working tables."""
+    id = db.Column(db.Integer, primary_key=True)
+    horizon = db.Column(db.DateTime, nullable=True)
@@ -11,11 +11,23 @@ class Expense(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(200), nullable=False)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
-    date = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    date = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     split_method = db.Column(db.Enum(SplitMethod), nullable=False)
     creator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # Expenses created before groups existed have no group
+    group_id = db.Column(db.Integer, db.ForeignKey('expense_group.id'), nullable=True)
+    # Optimistic concurrency: UPDATE/DELETE match on the version that was read
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     participations = db.relationship('ExpenseParticipation', backref='expense', lazy=True)
 
+    __mapper_args__ = {'version_id_col': version, 'version_id_generator': False}
+    __table_args__ = (
+        # Archiver scans by age
+        db.Index('ix_expense_date', 'date'),
+        # Group balances and listings read only that group's rows
+        db.Index('ix_expense_group_id_date', 'group_id', 'date'),
+    )
+
 
 class ExpenseParticipation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -23,7 +35,10 @@ class ExpenseParticipation(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     share_amount = db.Column(db.Numeric(10, 2), nullable=False)
     share_percentage = db.Column(db.Numeric(5, 2), nullable=True)
+    # Copy of Expense.date: the range partition key (see PartitionService)
+    expense_date = db.Column(db.DateTime, nullable=True)
     
     __table_args__ = (
         db.UniqueConstraint('expense_id', 'user_id', name='unique_expense_user'),
+        db.Index('ix_expense_participation_user_id', 'user_id'),
     )
\ No newline at end of file
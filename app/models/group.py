@@ -0,0 +1,27 @@
+from app import db
+from datetime import datetime
+
+
+class Group(db.Model):
+    """A set of users who share expenses and settle only among themselves."""
+    __tablename__ = 'expense_group'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    creator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    memberships = db.relationship('GroupMembership', backref='group', lazy=True)
+
+
+class GroupMembership(db.Model):
+    """One row per (group, member); the primary key leads with group_id."""
+    __tablename__ = 'group_membership'
+
+    group_id = db.Column(db.Integer, db.ForeignKey('expense_group.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    joined_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # "Which groups am I in"
+        db.Index('ix_group_membership_user_id', 'user_id'),
+    )
@@ -0,0 +1,46 @@
+from app import db
+from datetime import datetime
+from enum import Enum
+
+class ExpenseEventType(Enum):
+    EXPENSE_CREATED = 'expense_created'
+    SHARE_ASSIGNED = 'share_assigned'
+    EXPENSE_UPDATED = 'expense_updated'
+    EXPENSE_DELETED = 'expense_deleted'
+    SETTLEMENT_PAID = 'settlement_paid'
+    SETTLEMENT_RECEIVED = 'settlement_received'
+
+class ExpenseEvent(db.Model):
+    """Immutable journal entry for an expense write or a settlement.
+
+    Every row carries the signed paid/owed delta it applies to one user's
+    balance, so a balance can be replayed by summing events in id order.
+    expense_id is not a foreign key: events outlive deleted expenses.
+    Settlement events have settlement_id instead of expense_id.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.Enum(ExpenseEventType), nullable=False)
+    expense_id = db.Column(db.Integer, nullable=True)
+    settlement_id = db.Column(db.Integer, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    paid_delta = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    owed_delta = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_expense_event_user_id_id', 'user_id', 'id'),
+    )
+
+
+class BalanceSnapshot(db.Model):
+    """Per-user balance totals as of a given journal position."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    total_paid = db.Column(db.Numeric(12, 2), nullable=False)
+    total_owed = db.Column(db.Numeric(12, 2), nullable=False)
+    last_event_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_balance_snapshot_user_id_event', 'user_id', 'last_event_id'),
+    )
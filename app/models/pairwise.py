@@ -0,0 +1,12 @@
+from app import db
+
+
+class PairwiseBalance(db.Model):
+    """Net amount between two users, stored once from each side.
+
+    A positive amount means counterparty owes user; the mirrored row holds
+    the negated amount, so a user's counterparties are one index range scan.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    counterparty_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
@@ -0,0 +1,41 @@
+from app import db
+from datetime import datetime
+from enum import Enum
+
+class ReportJobStatus(Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+class ReportScope(Enum):
+    USER = 'user'
+    GROUP = 'group'
+
+class SettlementMode(Enum):
+    GREEDY = 'greedy'
+    EXACT = 'exact'
+
+class ReportJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    scope = db.Column(db.Enum(ReportScope), nullable=False)
+    # Group reports only. Stores the values, which rows written as plain strings already hold
+    settlement_mode = db.Column(db.Enum(SettlementMode, values_callable=lambda modes: [mode.value for mode in modes]),
+                                nullable=False, default=SettlementMode.GREEDY)
+    status = db.Column(db.Enum(ReportJobStatus), nullable=False, default=ReportJobStatus.QUEUED)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    filename = db.Column(db.String(200), nullable=True)
+    artifact_path = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    # Renewed by the worker while it runs; a stale one means the worker died
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_report_job_status_id', 'status', 'id'),
+        db.Index('ix_report_job_user_id_status', 'user_id', 'status'),
+    )
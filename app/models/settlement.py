@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime
+
+
+class Settlement(db.Model):
+    """A payment from payer to payee.
+
+    It counts as paid by the payer and owed by the payee, like an expense
+    whose only participant is the payee. Each row also keeps both parties'
+    running totals just after the payment, as of journal position
+    `last_event_id`: a settled user's balance is the latest of these plus
+    the journal events written since.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    payer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    payee_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    group_id = db.Column(db.Integer, db.ForeignKey('expense_group.id'), nullable=True)
+    note = db.Column(db.String(200), nullable=True)
+    date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    payer_total_paid = db.Column(db.Numeric(12, 2), nullable=False)
+    payer_total_owed = db.Column(db.Numeric(12, 2), nullable=False)
+    payee_total_paid = db.Column(db.Numeric(12, 2), nullable=False)
+    payee_total_owed = db.Column(db.Numeric(12, 2), nullable=False)
+    last_event_id = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        # A user's latest settlement is the top of one of these ranges
+        db.Index('ix_settlement_payer_id_id', 'payer_id', 'id'),
+        db.Index('ix_settlement_payee_id_id', 'payee_id', 'id'),
+        db.Index('ix_settlement_group_id_date', 'group_id', 'date'),
+    )
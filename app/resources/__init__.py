@@ -1,12 +1,19 @@
 from flask_restful import Resource
+from flask import current_app as app
 from datetime import datetime
 
 from app import db,swagger
 from app.models import PingLog
-from .user_resource import UserResource
+from .user_resource import UserResource, UserImportResource
 from .auth_resource import UserLogin
 from .expense_resource import ExpenseResource, ExpenseList
-from .balance_sheet_resource import BalanceSheetResource
+from .balance_sheet_resource import BalanceSheetResource, BalanceSheetBatchResource, PairwiseBalanceResource
+from .report_resource import ReportJobResource, ReportDownloadResource
+from .metrics_resource import AdmissionMetricsResource, SlowQueryResource
+from .group_resource import (
+    GroupResource, GroupMemberResource, GroupBalanceResource, GroupSettlementResource, GroupExpenseResource
+)
+from .settlement_resource import SettlementResource
 
 
 class PingResource(Resource):
@@ -16,7 +23,7 @@ class PingResource(Resource):
         db.session.add(ping_log)
         db.session.commit()
         
-        print(f'log: {ping_log}')
+        app.logger.debug(f'log: {ping_log}')
 
         return {
             'status': 'success',
@@ -30,6 +37,7 @@ def register_resources(api):
     
     # User endpoints
     api.add_resource(UserResource, '/api/users', '/api/users/<int:user_id>')
+    api.add_resource(UserImportResource, '/api/users/import')
     api.add_resource(UserLogin, '/api/login')
     
     # Expense endpoints
@@ -38,12 +46,35 @@ def register_resources(api):
     
     # Balance sheet endpoint
     api.add_resource(BalanceSheetResource, '/api/balance-sheet')
+    api.add_resource(BalanceSheetBatchResource, '/api/balance-sheet/batch')
+    api.add_resource(PairwiseBalanceResource, '/api/balances/pairwise')
+
+    # Groups
+    api.add_resource(GroupResource, '/api/groups', '/api/groups/<int:group_id>')
+    api.add_resource(GroupMemberResource, '/api/groups/<int:group_id>/members')
+    api.add_resource(GroupBalanceResource, '/api/groups/<int:group_id>/balances')
+    api.add_resource(GroupSettlementResource, '/api/groups/<int:group_id>/settlements')
+    api.add_resource(GroupExpenseResource, '/api/groups/<int:group_id>/expenses')
+
+    # Recorded payments
+    api.add_resource(SettlementResource, '/api/settlements', '/api/settlements/<int:settlement_id>')
+
+    # Background report jobs
+    api.add_resource(ReportJobResource, '/api/reports', '/api/reports/<int:job_id>')
+    api.add_resource(ReportDownloadResource, '/api/reports/<int:job_id>/download')
+
+    # Operational metrics
+    api.add_resource(AdmissionMetricsResource, '/api/metrics/admission')
+    api.add_resource(SlowQueryResource, '/api/admin/slow-queries')
 
 
     # Register all paths with Swagger
     if swagger:
-        for resource in [UserResource, UserLogin, ExpenseResource, 
-                        ExpenseList, BalanceSheetResource]:
+        for resource in [UserResource, UserImportResource, UserLogin, ExpenseResource, 
+                        ExpenseList, BalanceSheetResource, BalanceSheetBatchResource, PairwiseBalanceResource,
+                        ReportJobResource, ReportDownloadResource, AdmissionMetricsResource,
+                        SlowQueryResource, GroupResource, GroupMemberResource, GroupBalanceResource,
+                        GroupSettlementResource, GroupExpenseResource, SettlementResource]:
             for method in ['get', 'post', 'put', 'delete']:
                 if hasattr(resource, method):
                     method_obj = getattr(resource, method)
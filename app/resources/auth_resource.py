@@ -1,7 +1,7 @@
 from flask_restful import Resource, reqparse
 from flasgger import swag_from
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
-from app.models.user import User
+from app.services.hot_queries import HotQueries
 from app import db
 from datetime import timedelta
 import re
@@ -52,7 +52,7 @@ class UserLogin(Resource, AuthResource):
         try:
             data = self.parser.parse_args()
             
-            user = User.query.filter_by(email=data['email']).first()
+            user = HotQueries.user_by_email(data['email'])
             if not user:
                 return {"message": "User not found"}, 401
                 
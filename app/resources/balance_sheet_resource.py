@@ -1,13 +1,17 @@
-from urllib import request
-from flask_restful import Resource
+from flask_restful import Resource, reqparse
 from flasgger import swag_from
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask import send_file, make_response
+from flask import send_file, make_response, request, current_app as app
 from app.services.balance_sheet_service import BalanceSheetService
-from io import StringIO
+from app.services.pairwise_ledger_service import PairwiseLedgerService
+from app.auth.jwt_manager import is_admin
+from app.utils.db_routing import read_only
+from app.utils.query_utils import date_arg
+from io import BytesIO
 
 class BalanceSheetResource(Resource):
     @jwt_required()
+    @read_only
     @swag_from({
         'tags': ['Balance Sheet'],
         'parameters': [
@@ -18,7 +22,33 @@ class BalanceSheetResource(Resource):
                 'enum': ['json', 'csv'],
                 'default': 'json',
                 'required': False,
-                'description': 'Response format (json or csv)'
+                'description': 'Response format (json or csv); anything else is a 400'
+            },
+            {
+                'name': 'fields',
+                'in': 'query',
+                'type': 'string',
+                'enum': ['summary', 'paid', 'involved', 'full'],
+                'default': 'full',
+                'required': False,
+                'description': 'JSON only (400 with csv): totals only, totals plus one expense list, or everything'
+            },
+            {
+                'name': 'since',
+                'in': 'query',
+                'type': 'string',
+                'format': 'date-time',
+                'required': False,
+                'description': 'JSON only (400 with csv): list expenses dated on or after this (ISO 8601); '
+                               'totals stay all-time'
+            },
+            {
+                'name': 'until',
+                'in': 'query',
+                'type': 'string',
+                'format': 'date-time',
+                'required': False,
+                'description': 'JSON only (400 with csv): list expenses dated before this (ISO 8601)'
             }
         ],
         'responses': {
@@ -83,15 +113,36 @@ class BalanceSheetResource(Resource):
     def get(self):
         user_id = get_jwt_identity()
         response_format = request.args.get('format', 'json')
+        projection = request.args.get('fields', 'full')
+        if response_format not in ('json', 'csv'):
+            return {"message": f"Invalid format: {response_format}"}, 400
+        if response_format == 'csv':
+            json_only = sorted(arg for arg in ('fields', 'since', 'until') if arg in request.args)
+            if json_only:
+                return {"message": f"{', '.join(json_only)} only apply to JSON"}, 400
         try:
-            # Get user balance
-            balance = BalanceSheetService.calculate_user_balance(user_id)
-            
+            if response_format == 'json':
+                balance = BalanceSheetService.calculate_user_balance(
+                    user_id, projection=projection, since=date_arg('since'), until=date_arg('until')
+                )
+                response = {
+                    'user_id': balance.user_id,
+                    'name': balance.name,
+                    'total_paid': float(balance.total_paid),
+                    'total_owed': float(balance.total_owed),
+                    'net_balance': float(balance.net_balance)
+                }
+                if projection in ('paid', 'full'):
+                    response['expenses_paid'] = balance.expenses_paid
+                if projection in ('involved', 'full'):
+                    response['expenses_involved'] = balance.expenses_involved
+                return response
+
             # Generate CSV
             filename, csv_data = BalanceSheetService.generate_balance_sheet_csv(user_id)
             
             # Create in-memory file
-            csv_buffer = StringIO(csv_data)
+            csv_buffer = BytesIO(csv_data.encode('utf-8'))
             
             # Return file for download
             return send_file(
@@ -103,4 +154,165 @@ class BalanceSheetResource(Resource):
         except ValueError as e:
             return {"message": str(e)}, 400  
         except Exception as e:
-            return {"message": f"Error generating balance sheet: {str(e)}"}, 500
\ No newline at end of file
+            return {"message": f"Error generating balance sheet: {str(e)}"}, 500
+
+class BalanceSheetBatchResource(Resource):
+    parser = reqparse.RequestParser()
+    parser.add_argument('user_ids', type=int, action='append', required=True,
+                        help='user_ids must be a list of integers', location='json')
+
+    @jwt_required()
+    @read_only
+    @swag_from({
+        'tags': ['Balance Sheet'],
+        'summary': 'Balance totals for many users in one call',
+        'description': 'Users may request themselves and anyone they have shared an expense with; '
+                       'admins may request anyone. Other ids are listed in `unavailable`.',
+        'parameters': [
+            {
+                'name': 'body',
+                'in': 'body',
+                'required': True,
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'user_ids': {
+                            'type': 'array',
+                            'items': {'type': 'integer'},
+                            'example': [1, 2, 3]
+                        }
+                    },
+                    'required': ['user_ids']
+                }
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'Totals keyed by user id',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'object',
+                            'properties': {
+                                'balances': {
+                                    'type': 'object',
+                                    'additionalProperties': {
+                                        'type': 'object',
+                                        'properties': {
+                                            'name': {'type': 'string', 'example': 'John Doe'},
+                                            'total_paid': {'type': 'number', 'format': 'float', 'example': 500.00},
+                                            'total_owed': {'type': 'number', 'format': 'float', 'example': 250.00},
+                                            'net_balance': {'type': 'number', 'format': 'float', 'example': 250.00}
+                                        }
+                                    }
+                                },
+                                'unavailable': {
+                                    'type': 'array',
+                                    'items': {'type': 'integer'}
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            '400': {
+                'description': 'Invalid request'
+            },
+            '401': {
+                'description': 'Authentication required'
+            },
+            '500': {
+                'description': 'Server error'
+            }
+        }
+    })
+    def post(self):
+        user_id = get_jwt_identity()
+        # action='append' would wrap a bare number in a list
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict) or not isinstance(body.get('user_ids'), list):
+            return {"message": "user_ids must be a list of integers"}, 400
+        requested = set(self.parser.parse_args()['user_ids'])
+        max_users = app.config['BALANCE_BATCH_MAX_USERS']
+        if len(requested) > max_users:
+            return {"message": f"At most {max_users} users per batch"}, 400
+
+        try:
+            if is_admin(user_id):
+                allowed = requested
+            else:
+                others = sorted(requested - {user_id})
+                allowed = PairwiseLedgerService.shared_with(user_id, others)
+                if user_id in requested:
+                    allowed.add(user_id)
+
+            balances = BalanceSheetService.calculate_user_balances(allowed)
+            return {
+                'balances': {
+                    str(balance_user_id): {
+                        'name': totals['name'],
+                        'total_paid': float(totals['total_paid']),
+                        'total_owed': float(totals['total_owed']),
+                        'net_balance': float(totals['net_balance'])
+                    }
+                    for balance_user_id, totals in balances.items()
+                },
+                'unavailable': sorted(requested - set(balances))
+            }
+        except Exception as e:
+            return {"message": f"Error retrieving balances: {str(e)}"}, 500
+
+
+class PairwiseBalanceResource(Resource):
+    @jwt_required()
+    @read_only
+    @swag_from({
+        'tags': ['Balances'],
+        'summary': 'Get what the current user owes / is owed by each counterparty',
+        'responses': {
+            '200': {
+                'description': 'Pairwise balances retrieved successfully',
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            'type': 'object',
+                            'properties': {
+                                'user_id': {'type': 'integer', 'example': 1},
+                                'balances': {
+                                    'type': 'array',
+                                    'items': {
+                                        'type': 'object',
+                                        'properties': {
+                                            'user_id': {'type': 'integer', 'example': 2},
+                                            'name': {'type': 'string', 'example': 'Alice'},
+                                            'amount': {'type': 'number', 'format': 'float', 'example': 25.50},
+                                            'direction': {
+                                                'type': 'string',
+                                                'enum': ['owes_you', 'you_owe'],
+                                                'example': 'you_owe'
+                                            }
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            '401': {
+                'description': 'Authentication required'
+            },
+            '500': {
+                'description': 'Server error'
+            }
+        }
+    })
+    def get(self):
+        user_id = get_jwt_identity()
+        try:
+            return {
+                'user_id': user_id,
+                'balances': PairwiseLedgerService.get_user_balances(user_id)
+            }
+        except Exception as e:
+            return {"message": f"Error retrieving pairwise balances: {str(e)}"}, 500
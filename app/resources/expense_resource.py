@@ -1,13 +1,19 @@
 from flasgger import swag_from
 from flask_restful import Resource, reqparse
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import request
 
-from app.models.user import User
 from app.services.balance_sheet_service import BalanceSheetService
-from app.models.expense import Expense, ExpenseParticipation, SplitMethod
-from app.services.expense_calculator import ExpenseCalculator
+from app.models.expense import Expense, ExpenseParticipation
+from app.models.archive import ArchivedExpense, ArchivedExpenseParticipation
+from app.services.archive_service import ArchiveService
+from app.services.expense_service import ExpenseService
+from app.exceptions.exception import (
+    ExpenseCalculationError, ExpenseVersionConflictError, GroupMembershipError
+)
+from app.utils.db_routing import read_only
+from app.utils.query_utils import date_arg
 from app import db
-from decimal import Decimal
 
 class ExpenseResource(Resource):
     parser = reqparse.RequestParser()
@@ -16,6 +22,8 @@ class ExpenseResource(Resource):
     parser.add_argument('split_method', type=str, required=True, 
                        choices=('equal', 'exact', 'percentage'), location='json')
     parser.add_argument('participants', type=dict, required=True, location='json')
+    parser.add_argument('version', type=int, required=False, location='json')
+    parser.add_argument('group_id', type=int, required=False, location='json')
 
     @jwt_required()
     @swag_from({
@@ -42,6 +50,10 @@ class ExpenseResource(Resource):
                                     'percentage': {'type': 'number'}
                                 }
                             }
+                        },
+                        'group_id': {
+                            'type': 'integer',
+                            'description': 'Group the expense belongs to; creator and participants must be members'
                         }
                     },
                     'required': ['description', 'amount', 'split_method', 'participants']
@@ -62,6 +74,9 @@ class ExpenseResource(Resource):
             '400': {
                 'description': 'Invalid input'
             },
+            '403': {
+                'description': 'Creator or a participant is not a member of the group'
+            },
             '500': {
                 'description': 'Server error'
             }
@@ -72,44 +87,30 @@ class ExpenseResource(Resource):
         creator_id = get_jwt_identity()
         
         try:
-            # Create expense
-            expense = Expense(
+            expense = ExpenseService.create_expense(
+                creator_id=creator_id,
                 description=data['description'],
-                amount=Decimal(str(data['amount'])),
-                split_method=SplitMethod(data['split_method']),
-                creator_id=creator_id
-            )
-            db.session.add(expense)
-            db.session.flush()  # Get expense ID without committing
-            
-            # Calculate shares
-            calculator = ExpenseCalculator()
-            shares = calculator.calculate_shares(
-                data['split_method'],
-                data['amount'],
-                data['participants']
+                amount=data['amount'],
+                split_method=data['split_method'],
+                participants=data['participants'],
+                group_id=data['group_id']
             )
-            
-            # Create participations
-            for user_id, share in shares.items():
-                participation = ExpenseParticipation(
-                    expense_id=expense.id,
-                    user_id=user_id,
-                    share_amount=share,
-                    share_percentage=(Decimal(str(data['participants'][user_id]['percentage']))
-                                   if data['split_method'] == 'percentage' else None)
-                )
-                db.session.add(participation)
-            
             db.session.commit()
             return {"message": "Expense created successfully", "expense_id": expense.id}, 201
             
+        except ExpenseCalculationError as e:
+            db.session.rollback()
+            return {"message": str(e)}, 400
+        except GroupMembershipError as e:
+            db.session.rollback()
+            return {"message": str(e)}, 403
         except Exception as e:
             db.session.rollback()
             return {"message": f"Error creating expense: {str(e)}"}, 500
 
 
     @jwt_required()
+    @read_only
     @swag_from({
         'tags': ['Expenses'],
         'parameters': [
@@ -119,6 +120,22 @@ class ExpenseResource(Resource):
                 'type': 'integer',
                 'required': False,
                 'description': 'ID of the expense to retrieve'
+            },
+            {
+                'name': 'since',
+                'in': 'query',
+                'type': 'string',
+                'format': 'date-time',
+                'required': False,
+                'description': 'List only: expenses dated on or after this (ISO 8601)'
+            },
+            {
+                'name': 'until',
+                'in': 'query',
+                'type': 'string',
+                'format': 'date-time',
+                'required': False,
+                'description': 'List only: expenses dated before this (ISO 8601)'
             }
         ],
         'responses': {
@@ -134,7 +151,10 @@ class ExpenseResource(Resource):
                                 'amount': {'type': 'number', 'format': 'float', 'example': 100.50},
                                 'split_method': {'type': 'string', 'example': 'EQUAL'},
                                 'creator_id': {'type': 'integer', 'example': 1},
+                                'group_id': {'type': 'integer', 'example': 3},
                                 'date': {'type': 'string', 'format': 'date-time', 'example': '2024-10-26T10:30:00'},
+                                'version': {'type': 'integer', 'example': 1},
+                                'archived': {'type': 'boolean', 'example': False},
                                 'participations': {
                                     'type': 'array',
                                     'items': {
@@ -164,6 +184,8 @@ class ExpenseResource(Resource):
         
         if expense_id:
             expense = Expense.query.get(expense_id)
+            if not expense:
+                expense = ArchivedExpense.query.get(expense_id)
             if not expense:
                 return {"message": "Expense not found"}, 404
                 
@@ -178,7 +200,10 @@ class ExpenseResource(Resource):
                 "amount": float(expense.amount),
                 "split_method": expense.split_method.value,
                 "creator_id": expense.creator_id,
+                "group_id": expense.group_id,
                 "date": expense.date.isoformat(),
+                "version": expense.version,
+                "archived": isinstance(expense, ArchivedExpense),
                 "participations": [{
                     "user_id": p.user_id,
                     "share_amount": float(p.share_amount),
@@ -186,11 +211,17 @@ class ExpenseResource(Resource):
                 } for p in expense.participations]
             }
         
+        try:
+            since, until = date_arg('since'), date_arg('until')
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
         # Get all expenses where user is a participant
-        expenses = Expense.query.filter(
-            (Expense.creator_id == user_id) |
-            (Expense.participations.any(ExpenseParticipation.user_id == user_id))
-        ).all()
+        expenses = self._user_expenses(Expense, ExpenseParticipation, user_id, since, until)
+        if ArchiveService.reaches_archive(since):
+            expenses = self._user_expenses(
+                ArchivedExpense, ArchivedExpenseParticipation, user_id, since, until
+            ) + expenses
         
         return [{
             "id": e.id,
@@ -200,10 +231,180 @@ class ExpenseResource(Resource):
             "date": e.date.isoformat()
         } for e in expenses]
 
+    @staticmethod
+    def _user_expenses(expense, participation, user_id, since, until):
+        query = expense.query.filter(
+            (expense.creator_id == user_id) |
+            (expense.participations.any(participation.user_id == user_id))
+        )
+        if since is not None:
+            query = query.filter(expense.date >= since)
+        if until is not None:
+            query = query.filter(expense.date < until)
+        return query.all()
+
+    @staticmethod
+    def _owned_expense(expense_id):
+        """Return (expense, None) or (None, error response) for the creator's expense."""
+        expense = Expense.query.get(expense_id)
+        if not expense and ArchivedExpense.query.get(expense_id):
+            return None, ({"message": "Archived expenses are read-only"}, 409)
+        if not expense:
+            return None, ({"message": "Expense not found"}, 404)
+        if expense.creator_id != get_jwt_identity():
+            return None, ({"message": "Only the creator can modify this expense"}, 403)
+        return expense, None
+
+    @jwt_required()
+    @swag_from({
+        'tags': ['Expenses'],
+        'summary': 'Update an expense',
+        'description': 'Recomputes shares and adjusts balances by the difference. '
+                       'Send the version from GET to reject the update if the expense changed meanwhile.',
+        'parameters': [
+            {
+                'name': 'expense_id',
+                'in': 'path',
+                'type': 'integer',
+                'required': True
+            },
+            {
+                'name': 'body',
+                'in': 'body',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'description': {'type': 'string'},
+                        'amount': {'type': 'number'},
+                        'split_method': {
+                            'type': 'string',
+                            'enum': ['equal', 'exact', 'percentage']
+                        },
+                        'participants': {
+                            'type': 'object',
+                            'additionalProperties': {
+                                'type': 'object',
+                                'properties': {
+                                    'share': {'type': 'number'},
+                                    'percentage': {'type': 'number'}
+                                }
+                            }
+                        },
+                        'version': {'type': 'integer'}
+                    },
+                    'required': ['description', 'amount', 'split_method', 'participants']
+                }
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'Expense updated',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'message': {'type': 'string'},
+                        'expense_id': {'type': 'integer'},
+                        'version': {'type': 'integer'}
+                    }
+                }
+            },
+            '400': {
+                'description': 'Invalid input'
+            },
+            '403': {
+                'description': 'Only the creator can modify this expense'
+            },
+            '404': {
+                'description': 'Expense not found'
+            },
+            '409': {
+                'description': 'Expense was modified since the given version, or is archived'
+            }
+        }
+    })
+    def put(self, expense_id):
+        data = self.parser.parse_args()
+        expense, error = self._owned_expense(expense_id)
+        if error:
+            return error
+
+        try:
+            ExpenseService.update_expense(
+                expense,
+                description=data['description'],
+                amount=data['amount'],
+                split_method=data['split_method'],
+                participants=data['participants'],
+                expected_version=data['version']
+            )
+            db.session.commit()
+            return {"message": "Expense updated successfully", "expense_id": expense.id,
+                    "version": expense.version}
+        except ExpenseVersionConflictError as e:
+            db.session.rollback()
+            return {"message": str(e)}, 409
+        except (ExpenseCalculationError, GroupMembershipError) as e:
+            db.session.rollback()
+            return {"message": str(e)}, 400
+        except Exception as e:
+            db.session.rollback()
+            return {"message": f"Error updating expense: {str(e)}"}, 500
+
+    @jwt_required()
+    @swag_from({
+        'tags': ['Expenses'],
+        'summary': 'Delete an expense',
+        'parameters': [
+            {
+                'name': 'expense_id',
+                'in': 'path',
+                'type': 'integer',
+                'required': True
+            },
+            {
+                'name': 'version',
+                'in': 'query',
+                'type': 'integer',
+                'required': False,
+                'description': 'Reject the delete if the expense is no longer at this version'
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'Expense deleted'
+            },
+            '403': {
+                'description': 'Only the creator can modify this expense'
+            },
+            '404': {
+                'description': 'Expense not found'
+            },
+            '409': {
+                'description': 'Expense was modified since the given version, or is archived'
+            }
+        }
+    })
+    def delete(self, expense_id):
+        expense, error = self._owned_expense(expense_id)
+        if error:
+            return error
+
+        try:
+            ExpenseService.delete_expense(expense, expected_version=request.args.get('version', type=int))
+            db.session.commit()
+            return {"message": "Expense deleted successfully", "expense_id": expense_id}
+        except ExpenseVersionConflictError as e:
+            db.session.rollback()
+            return {"message": str(e)}, 409
+        except Exception as e:
+            db.session.rollback()
+            return {"message": f"Error deleting expense: {str(e)}"}, 500
+
   
 # overall expenses
 class ExpenseList(Resource):
     @jwt_required()
+    @read_only
     @swag_from({
         'tags': ['Balances'],
         'summary': 'Get balance summary for all users',
@@ -304,15 +505,4 @@ class ExpenseList(Resource):
         ]
     })
     def get(self):
-        users = User.query.all()
-        balances = []
-
-        for user in users:
-            user_balance = BalanceSheetService.calculate_user_balance(user.id)
-            balances.append({
-                'user_id': user.id,
-                'name': user.name,
-                'net_balance': float(user_balance.net_balance)
-            })
-        
-        return {'balances': balances}
\ No newline at end of file
+        return {'balances': BalanceSheetService.group_net_balances()}
\ No newline at end of file
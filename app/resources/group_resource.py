@@ -0,0 +1,353 @@
+from flasgger import swag_from
+from flask_restful import Resource, reqparse
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import request
+
+from app.exceptions.exception import GroupMembershipError
+from app.models.group import Group
+from app.services.balance_sheet_service import BalanceSheetService
+from app.services.group_service import GroupService
+from app.utils.db_routing import read_only
+from app.utils.query_utils import date_arg
+from app import db
+
+
+def _member_group(group_id):
+    """Return (group, None) or (None, error response) for a group the caller belongs to."""
+    group = Group.query.get(group_id)
+    if not group:
+        return None, ({"message": "Group not found"}, 404)
+    if not GroupService.is_member(group_id, get_jwt_identity()):
+        return None, ({"message": "Only members can access this group"}, 403)
+    return group, None
+
+
+GROUP_PATH_PARAMETER = {
+    'name': 'group_id',
+    'in': 'path',
+    'type': 'integer',
+    'required': True
+}
+
+
+class GroupResource(Resource):
+    parser = reqparse.RequestParser()
+    parser.add_argument('name', type=str, required=True, location='json')
+    parser.add_argument('member_ids', type=int, action='append', default=[], location='json')
+
+    @jwt_required()
+    @swag_from({
+        'tags': ['Groups'],
+        'summary': 'Create a group',
+        'description': 'The creator is always a member.',
+        'parameters': [
+            {
+                'name': 'body',
+                'in': 'body',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'name': {'type': 'string'},
+                        'member_ids': {'type': 'array', 'items': {'type': 'integer'}}
+                    },
+                    'required': ['name']
+                }
+            }
+        ],
+        'responses': {
+            '201': {
+                'description': 'Group created',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'id': {'type': 'integer'},
+                        'name': {'type': 'string'},
+                        'creator_id': {'type': 'integer'},
+                        'created_at': {'type': 'string', 'format': 'date-time'},
+                        'members': {'type': 'array', 'items': {'type': 'object'}}
+                    }
+                }
+            },
+            '400': {
+                'description': 'Unknown member ids'
+            },
+            '500': {
+                'description': 'Server error'
+            }
+        }
+    })
+    def post(self):
+        data = self.parser.parse_args()
+        try:
+            group = GroupService.create_group(get_jwt_identity(), data['name'], data['member_ids'])
+            db.session.commit()
+            return GroupService.to_dict(group, GroupService.members(group.id)), 201
+        except GroupMembershipError as e:
+            db.session.rollback()
+            return {"message": str(e)}, 400
+        except Exception as e:
+            db.session.rollback()
+            return {"message": f"Error creating group: {str(e)}"}, 500
+
+    @jwt_required()
+    @read_only
+    @swag_from({
+        'tags': ['Groups'],
+        'summary': "List the current user's groups, or get one group with its members",
+        'parameters': [
+            {
+                'name': 'group_id',
+                'in': 'path',
+                'type': 'integer',
+                'required': False
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'Group(s) retrieved'
+            },
+            '403': {
+                'description': 'Not a member of this group'
+            },
+            '404': {
+                'description': 'Group not found'
+            }
+        }
+    })
+    def get(self, group_id=None):
+        if group_id is None:
+            return [GroupService.to_dict(group) for group in GroupService.user_groups(get_jwt_identity())]
+
+        group, error = _member_group(group_id)
+        if error:
+            return error
+        return GroupService.to_dict(group, GroupService.members(group_id))
+
+
+class GroupMemberResource(Resource):
+    parser = reqparse.RequestParser()
+    parser.add_argument('user_ids', type=int, action='append', required=True, location='json')
+
+    @jwt_required()
+    @swag_from({
+        'tags': ['Groups'],
+        'summary': 'Add members to a group',
+        'description': 'Any member can add others; users already in the group are skipped.',
+        'parameters': [
+            GROUP_PATH_PARAMETER,
+            {
+                'name': 'body',
+                'in': 'body',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'user_ids': {'type': 'array', 'items': {'type': 'integer'}}
+                    },
+                    'required': ['user_ids']
+                }
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'Members added',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'group_id': {'type': 'integer'},
+                        'added': {'type': 'array', 'items': {'type': 'integer'}}
+                    }
+                }
+            },
+            '400': {
+                'description': 'Unknown user ids'
+            },
+            '403': {
+                'description': 'Not a member of this group'
+            },
+            '404': {
+                'description': 'Group not found'
+            }
+        }
+    })
+    def post(self, group_id):
+        data = self.parser.parse_args()
+        _, error = _member_group(group_id)
+        if error:
+            return error
+        try:
+            added = GroupService.add_members(group_id, data['user_ids'])
+            db.session.commit()
+            return {"group_id": group_id, "added": added}
+        except GroupMembershipError as e:
+            db.session.rollback()
+            return {"message": str(e)}, 400
+        except Exception as e:
+            db.session.rollback()
+            return {"message": f"Error adding members: {str(e)}"}, 500
+
+
+class GroupBalanceResource(Resource):
+    @jwt_required()
+    @read_only
+    @swag_from({
+        'tags': ['Groups'],
+        'summary': "Net balance of each member, from the group's expenses only",
+        'parameters': [GROUP_PATH_PARAMETER],
+        'responses': {
+            '200': {
+                'description': 'Member balances',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'group_id': {'type': 'integer'},
+                        'balances': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'user_id': {'type': 'integer', 'example': 1},
+                                    'name': {'type': 'string', 'example': 'Alice'},
+                                    'net_balance': {'type': 'number', 'format': 'float', 'example': 12.5}
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            '403': {
+                'description': 'Not a member of this group'
+            },
+            '404': {
+                'description': 'Group not found'
+            }
+        }
+    })
+    def get(self, group_id):
+        _, error = _member_group(group_id)
+        if error:
+            return error
+        return {'group_id': group_id, 'balances': BalanceSheetService.member_net_balances(group_id)}
+
+
+class GroupSettlementResource(Resource):
+    @jwt_required()
+    @read_only
+    @swag_from({
+        'tags': ['Groups'],
+        'summary': 'Recommended transfers to settle a group',
+        'parameters': [
+            GROUP_PATH_PARAMETER,
+            {
+                'name': 'mode',
+                'in': 'query',
+                'type': 'string',
+                'enum': ['greedy', 'exact'],
+                'default': 'greedy',
+                'required': False,
+                'description': 'exact finds the fewest transfers, within a time budget'
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'Settlements',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'group_id': {'type': 'integer'},
+                        'settlements': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'from_user_id': {'type': 'integer'},
+                                    'from_user': {'type': 'string'},
+                                    'to_user_id': {'type': 'integer'},
+                                    'to_user': {'type': 'string'},
+                                    'amount': {'type': 'number', 'format': 'float'}
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            '400': {
+                'description': 'Invalid settlement mode'
+            },
+            '403': {
+                'description': 'Not a member of this group'
+            },
+            '404': {
+                'description': 'Group not found'
+            }
+        }
+    })
+    def get(self, group_id):
+        _, error = _member_group(group_id)
+        if error:
+            return error
+        try:
+            settlements = BalanceSheetService.calculate_group_balance(
+                mode=request.args.get('mode', 'greedy'), group_id=group_id
+            )
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        return {'group_id': group_id, 'settlements': settlements}
+
+
+class GroupExpenseResource(Resource):
+    @jwt_required()
+    @read_only
+    @swag_from({
+        'tags': ['Groups'],
+        'summary': "List a group's expenses, oldest first",
+        'parameters': [
+            GROUP_PATH_PARAMETER,
+            {
+                'name': 'since',
+                'in': 'query',
+                'type': 'string',
+                'format': 'date-time',
+                'required': False,
+                'description': 'Expenses dated on or after this (ISO 8601)'
+            },
+            {
+                'name': 'until',
+                'in': 'query',
+                'type': 'string',
+                'format': 'date-time',
+                'required': False,
+                'description': 'Expenses dated before this (ISO 8601)'
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'Expenses'
+            },
+            '400': {
+                'description': 'Invalid date'
+            },
+            '403': {
+                'description': 'Not a member of this group'
+            },
+            '404': {
+                'description': 'Group not found'
+            }
+        }
+    })
+    def get(self, group_id):
+        _, error = _member_group(group_id)
+        if error:
+            return error
+        try:
+            since, until = date_arg('since'), date_arg('until')
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        return [{
+            "id": e.id,
+            "description": e.description,
+            "amount": float(e.amount),
+            "split_method": e.split_method.value,
+            "creator_id": e.creator_id,
+            "date": e.date.isoformat()
+        } for e in GroupService.expenses(group_id, since, until)]
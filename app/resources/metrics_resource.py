@@ -0,0 +1,82 @@
+from flask_restful import Resource
+from flasgger import swag_from
+from flask import current_app as app, request
+from app.auth.jwt_manager import admin_required
+
+
+class AdmissionMetricsResource(Resource):
+    @admin_required
+    @swag_from({
+        'tags': ['Metrics'],
+        'summary': 'Admission control counters per endpoint (admin only)',
+        'responses': {
+            '200': {
+                'description': 'Admitted, queued and rejected request counts',
+                'schema': {
+                    'type': 'object',
+                    'additionalProperties': {
+                        'type': 'object',
+                        'properties': {
+                            'admitted': {'type': 'integer'},
+                            'queued': {'type': 'integer'},
+                            'rejected_rate': {'type': 'integer'},
+                            'rejected_full': {'type': 'integer'},
+                            'rejected_timeout': {'type': 'integer'},
+                            'waiting': {'type': 'integer'}
+                        }
+                    }
+                }
+            },
+            '403': {
+                'description': 'Admin privileges required'
+            }
+        }
+    })
+    def get(self):
+        controller = app.extensions.get('admission')
+        return controller.snapshot() if controller else {}
+
+
+class SlowQueryResource(Resource):
+    @admin_required
+    @swag_from({
+        'tags': ['Metrics'],
+        'summary': 'Recent slow queries (admin only)',
+        'parameters': [
+            {
+                'name': 'limit',
+                'in': 'query',
+                'type': 'integer',
+                'default': 100,
+                'required': False
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'Slow queries, newest first',
+                'schema': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'captured_at': {'type': 'string', 'format': 'date-time'},
+                            'duration_ms': {'type': 'number'},
+                            'sql': {'type': 'string'},
+                            'parameters': {'type': 'string'},
+                            'request_id': {'type': 'string'},
+                            'route': {'type': 'string'},
+                            'plan': {'type': 'object'}
+                        }
+                    }
+                }
+            },
+            '403': {
+                'description': 'Admin privileges required'
+            }
+        }
+    })
+    def get(self):
+        recorder = app.extensions.get('slow_query')
+        if not recorder:
+            return []
+        return recorder.recent(request.args.get('limit', 100, type=int))
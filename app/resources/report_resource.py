@@ -0,0 +1,161 @@
+import os
+from flask_restful import Resource, reqparse
+from flasgger import swag_from
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import send_file
+from app.exceptions.exception import ReportJobLimitError
+from app.models.report_job import ReportJobStatus
+from app.services.report_job_service import ReportJobService
+
+
+class ReportJobResource(Resource):
+    parser = reqparse.RequestParser()
+    parser.add_argument('scope', type=str, default='user',
+                        choices=('user', 'group'), location='json')
+    parser.add_argument('settlement_mode', type=str, default='greedy',
+                        choices=('greedy', 'exact'), location='json')
+
+    @jwt_required()
+    @swag_from({
+        'tags': ['Reports'],
+        'summary': 'Queue a balance sheet report',
+        'parameters': [
+            {
+                'name': 'body',
+                'in': 'body',
+                'required': False,
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'scope': {
+                            'type': 'string',
+                            'enum': ['user', 'group'],
+                            'default': 'user'
+                        },
+                        'settlement_mode': {
+                            'type': 'string',
+                            'enum': ['greedy', 'exact'],
+                            'default': 'greedy',
+                            'description': 'Group reports: exact finds the fewest transfers, within a time budget'
+                        }
+                    }
+                }
+            }
+        ],
+        'responses': {
+            '202': {
+                'description': 'Report queued',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'job_id': {'type': 'integer'},
+                        'status': {'type': 'string', 'example': 'queued'}
+                    }
+                }
+            },
+            '429': {
+                'description': 'Too many active report jobs for this user'
+            },
+            '500': {
+                'description': 'Server error'
+            }
+        }
+    })
+    def post(self):
+        data = self.parser.parse_args()
+        user_id = get_jwt_identity()
+        try:
+            job = ReportJobService.enqueue(user_id, data['scope'], data['settlement_mode'])
+            return ReportJobService.to_dict(job), 202
+        except ReportJobLimitError as e:
+            return {"message": str(e)}, 429
+        except Exception as e:
+            return {"message": f"Error queueing report: {str(e)}"}, 500
+
+    @jwt_required()
+    @swag_from({
+        'tags': ['Reports'],
+        'summary': 'Poll the status of a report job',
+        'parameters': [
+            {
+                'name': 'job_id',
+                'in': 'path',
+                'type': 'integer',
+                'required': True
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'Job status',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'job_id': {'type': 'integer'},
+                        'scope': {'type': 'string', 'example': 'group'},
+                        'status': {'type': 'string', 'example': 'running'},
+                        'progress': {'type': 'integer', 'example': 40},
+                        'filename': {'type': 'string'},
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            '404': {
+                'description': 'Job not found'
+            }
+        }
+    })
+    def get(self, job_id):
+        job = ReportJobService.get_job(job_id, get_jwt_identity())
+        if not job:
+            return {"message": "Job not found"}, 404
+        return ReportJobService.to_dict(job)
+
+
+class ReportDownloadResource(Resource):
+    @jwt_required()
+    @swag_from({
+        'tags': ['Reports'],
+        'summary': 'Download a finished report',
+        'parameters': [
+            {
+                'name': 'job_id',
+                'in': 'path',
+                'type': 'integer',
+                'required': True
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'CSV report',
+                'content': {
+                    'text/csv': {
+                        'schema': {
+                            'type': 'string',
+                            'format': 'binary'
+                        }
+                    }
+                }
+            },
+            '404': {
+                'description': 'Job not found'
+            },
+            '409': {
+                'description': 'Report is not ready'
+            }
+        }
+    })
+    def get(self, job_id):
+        job = ReportJobService.get_job(job_id, get_jwt_identity())
+        if not job:
+            return {"message": "Job not found"}, 404
+        if job.status != ReportJobStatus.SUCCEEDED:
+            return {"message": f"Report is {job.status.value}"}, 409
+        if not job.artifact_path or not os.path.exists(job.artifact_path):
+            return {"message": "Report artifact is no longer available"}, 404
+
+        return send_file(
+            job.artifact_path,
+            mimetype='text/csv',
+            as_attachment=True,
+            download_name=job.filename
+        )
@@ -0,0 +1,162 @@
+from flasgger import swag_from
+from flask_restful import Resource, reqparse
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.exceptions.exception import GroupMembershipError, InvalidSettlementError
+from app.models.settlement import Settlement
+from app.services.settlement_service import SettlementService
+from app.utils.db_routing import read_only
+from app.utils.query_utils import date_arg
+from app import db
+
+SETTLEMENT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'id': {'type': 'integer', 'example': 1},
+        'payer_id': {'type': 'integer', 'example': 2},
+        'payee_id': {'type': 'integer', 'example': 1},
+        'amount': {'type': 'number', 'format': 'float', 'example': 25.50},
+        'group_id': {'type': 'integer', 'example': 3},
+        'note': {'type': 'string', 'example': 'Dinner, cash'},
+        'date': {'type': 'string', 'format': 'date-time', 'example': '2024-10-26T10:30:00'}
+    }
+}
+
+
+class SettlementResource(Resource):
+    parser = reqparse.RequestParser()
+    parser.add_argument('payer_id', type=int, required=False, location='json')
+    parser.add_argument('payee_id', type=int, required=True, location='json')
+    parser.add_argument('amount', type=str, required=True, location='json')
+    parser.add_argument('group_id', type=int, required=False, location='json')
+    parser.add_argument('note', type=str, required=False, location='json')
+
+    @jwt_required()
+    @swag_from({
+        'tags': ['Settlements'],
+        'summary': 'Record a payment from one user to another',
+        'description': 'The caller must be the payer or the payee; payer_id defaults to the caller.',
+        'parameters': [
+            {
+                'name': 'body',
+                'in': 'body',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'payer_id': {'type': 'integer'},
+                        'payee_id': {'type': 'integer'},
+                        'amount': {'type': 'number'},
+                        'group_id': {
+                            'type': 'integer',
+                            'description': 'Group the payment settles; payer and payee must be members'
+                        },
+                        'note': {'type': 'string'}
+                    },
+                    'required': ['payee_id', 'amount']
+                }
+            }
+        ],
+        'responses': {
+            '201': {
+                'description': 'Settlement recorded',
+                'schema': SETTLEMENT_SCHEMA
+            },
+            '400': {
+                'description': 'Invalid amount or users'
+            },
+            '403': {
+                'description': 'Caller is not a party, or a party is not a member of the group'
+            },
+            '500': {
+                'description': 'Server error'
+            }
+        }
+    })
+    def post(self):
+        data = self.parser.parse_args()
+        user_id = get_jwt_identity()
+        payer_id = data['payer_id'] if data['payer_id'] is not None else user_id
+        if user_id not in (payer_id, data['payee_id']):
+            return {"message": "Only the payer or the payee can record a settlement"}, 403
+
+        try:
+            settlement = SettlementService.record_settlement(
+                payer_id=payer_id,
+                payee_id=data['payee_id'],
+                amount=data['amount'],
+                group_id=data['group_id'],
+                note=data['note']
+            )
+            db.session.commit()
+            return SettlementService.to_dict(settlement), 201
+        except InvalidSettlementError as e:
+            db.session.rollback()
+            return {"message": str(e)}, 400
+        except GroupMembershipError as e:
+            db.session.rollback()
+            return {"message": str(e)}, 403
+        except Exception as e:
+            db.session.rollback()
+            return {"message": f"Error recording settlement: {str(e)}"}, 500
+
+    @jwt_required()
+    @read_only
+    @swag_from({
+        'tags': ['Settlements'],
+        'summary': "List the current user's settlements (newest first), or get one",
+        'parameters': [
+            {
+                'name': 'settlement_id',
+                'in': 'path',
+                'type': 'integer',
+                'required': False
+            },
+            {
+                'name': 'since',
+                'in': 'query',
+                'type': 'string',
+                'format': 'date-time',
+                'required': False,
+                'description': 'List only: settlements dated on or after this (ISO 8601)'
+            },
+            {
+                'name': 'until',
+                'in': 'query',
+                'type': 'string',
+                'format': 'date-time',
+                'required': False,
+                'description': 'List only: settlements dated before this (ISO 8601)'
+            }
+        ],
+        'responses': {
+            '200': {
+                'description': 'Settlement(s) retrieved',
+                'schema': SETTLEMENT_SCHEMA
+            },
+            '400': {
+                'description': 'Invalid date'
+            },
+            '403': {
+                'description': 'Not a party to this settlement'
+            },
+            '404': {
+                'description': 'Settlement not found'
+            }
+        }
+    })
+    def get(self, settlement_id=None):
+        user_id = get_jwt_identity()
+        if settlement_id is not None:
+            settlement = Settlement.query.get(settlement_id)
+            if not settlement:
+                return {"message": "Settlement not found"}, 404
+            if user_id not in (settlement.payer_id, settlement.payee_id):
+                return {"message": "Unauthorized to view this settlement"}, 403
+            return SettlementService.to_dict(settlement)
+
+        try:
+            since, until = date_arg('since'), date_arg('until')
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        return [SettlementService.to_dict(settlement)
+                for settlement in SettlementService.user_settlements(user_id, since, until)]
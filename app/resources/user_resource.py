@@ -1,9 +1,14 @@
 # from app.auth.jwt_manager import admin_required
 import re
 from flask_restful import Resource, reqparse
+from flask import current_app as app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flasgger import swag_from
 from app.models.user import User
+from app.services.user_import_service import UserImportService
+from app.services.hot_queries import HotQueries
+from app.auth.jwt_manager import admin_required
+from app.utils.db_routing import read_only
 from app import db
 
 
@@ -12,6 +17,7 @@ class UserResource(Resource):
     parser.add_argument('name', type=str, required=True, help='Name cannot be blank', location='json')
     parser.add_argument('mobile', type=str, required=True, help='Mobile number cannot be blank', location='json') 
     parser.add_argument('email', type=str, required=True, help='Email cannot be blank', location='json')
+    parser.add_argument('password', type=str, location='json')
     
     @swag_from({
         'tags': ['Users'],
@@ -66,11 +72,11 @@ class UserResource(Resource):
             return {"message": "Invalid email format"}, 400
         
         # Validate password strength
-        if len(data['password']) < 8:
+        if not data['password'] or len(data['password']) < 8:
             return {"message": "Password must be at least 8 characters long"}, 400
 
 
-        if User.query.filter_by(email=data['email']).first():
+        if HotQueries.user_by_email(data['email']):
             return {"message": "User with this email already exists"}, 400
             
         try:
@@ -94,6 +100,7 @@ class UserResource(Resource):
             return {"message": f"Error creating user: {str(e)}"}, 500
 
     @jwt_required()
+    @read_only
     @swag_from({
         'tags': ['Users'],
         'summary': 'Get user information',
@@ -220,3 +227,87 @@ class UserResource(Resource):
             return {"message": f"Error updating user: {str(e)}"}, 500
 
 
+class UserImportResource(Resource):
+    parser = reqparse.RequestParser()
+    parser.add_argument('users', type=dict, action='append', required=True,
+                        help='users must be a list of user objects', location='json')
+
+    @admin_required
+    @swag_from({
+        'tags': ['Users'],
+        'summary': 'Bulk import users (admin only)',
+        'parameters': [
+            {
+                'name': 'body',
+                'in': 'body',
+                'required': True,
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'users': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'name': {'type': 'string'},
+                                    'email': {'type': 'string', 'format': 'email'},
+                                    'mobile': {'type': 'string'},
+                                    'password': {'type': 'string', 'format': 'password'}
+                                }
+                            }
+                        }
+                    },
+                    'required': ['users']
+                }
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Per-row import results',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'created': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'row': {'type': 'integer'},
+                                    'email': {'type': 'string'},
+                                    'user_id': {'type': 'integer'}
+                                }
+                            }
+                        },
+                        'errors': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'row': {'type': 'integer'},
+                                    'email': {'type': 'string'},
+                                    'error': {'type': 'string'}
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            400: {
+                'description': 'Invalid input data'
+            },
+            403: {
+                'description': 'Admin privileges required'
+            }
+        }
+    })
+    def post(self):
+        data = self.parser.parse_args()
+        max_rows = app.config['USER_IMPORT_MAX_ROWS']
+        if len(data['users']) > max_rows:
+            return {"message": f"At most {max_rows} users per import"}, 400
+
+        try:
+            return UserImportService.import_users(data['users'])
+        except Exception as e:
+            db.session.rollback()
+            return {"message": f"Error importing users: {str(e)}"}, 500
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Optional
+
+from flask import current_app as app
+from sqlalchemy import DateTime, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.archive import ArchivedExpense, ArchivedExpenseParticipation, CarriedBalance, ArchiveState
+from app.models.expense import Expense, ExpenseParticipation
+from app.utils.query_utils import id_filter
+from app import db
+
+ZERO = Decimal('0.00')
+EXPENSE_COLUMNS = ('id', 'description', 'amount', 'date', 'split_method', 'creator_id', 'group_id', 'version')
+PARTICIPATION_COLUMNS = ('id', 'expense_id', 'user_id', 'share_amount', 'share_percentage')
+
+
+class ArchiveService:
+    @staticmethod
+    def horizon() -> Optional[datetime]:
+        """Expenses dated before this may be archived; None if nothing ever was."""
+        state = ArchiveState.query.get(1)
+        return state.horizon if state else None
+
+    @staticmethod
+    def reaches_archive(since: Optional[datetime] = None) -> bool:
+        """Whether reading expenses dated on/after `since` (None: all time) needs the archive."""
+        horizon = ArchiveService.horizon()
+        return horizon is not None and (since is None or since < horizon)
+
+    @staticmethod
+    def _advance_horizon(before: datetime) -> None:
+        state = ArchiveState.query.with_for_update().get(1)
+        if state is None:
+            db.session.add(ArchiveState(id=1, horizon=before))
+        elif state.horizon is None or state.horizon < before:
+            state.horizon = before
+        db.session.commit()
+
+    @staticmethod
+    def _fold(paid: Dict[int, Decimal], owed: Dict[int, Decimal]) -> None:
+        """Add archived totals to each user's carried-forward balance in one statement."""
+        user_ids = sorted(set(paid) | set(owed))
+        if not user_ids:
+            return
+
+        table = CarriedBalance.__table__
+        dialect = db.engine.dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={
+                'total_paid': table.c.total_paid + stmt.excluded.total_paid,
+                'total_owed': table.c.total_owed + stmt.excluded.total_owed,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        now = datetime.utcnow()
+        db.session.execute(stmt, [
+            {
+                'user_id': user_id,
+                'total_paid': paid.get(user_id, ZERO),
+                'total_owed': owed.get(user_id, ZERO),
+                'updated_at': now
+            }
+            for user_id in user_ids
+        ])
+
+    @staticmethod
+    def archive_batch(before: datetime, batch_size: int) -> int:
+        """Move up to `batch_size` expenses dated before `before` into the archive.
+
+        Copies, folds the totals into CarriedBalance and deletes in the
+        caller's transaction, so a user's balance never changes. Returns the
+        number of expenses moved.
+        """
+        ids = [row.id for row in db.session.query(Expense.id).filter(
+            Expense.date < before
+        ).order_by(Expense.id).limit(batch_size).with_for_update(skip_locked=True)]
+        if not ids:
+            return 0
+
+        expense = Expense.__table__
+        participation = ExpenseParticipation.__table__
+        db.session.execute(ArchivedExpense.__table__.insert().from_select(
+            EXPENSE_COLUMNS + ('archived_at',),
+            select(*[expense.c[column] for column in EXPENSE_COLUMNS],
+                   literal(datetime.utcnow(), type_=DateTime)).where(id_filter(expense.c.id, ids))
+        ))
+        db.session.execute(ArchivedExpenseParticipation.__table__.insert().from_select(
+            PARTICIPATION_COLUMNS,
+            select(*[participation.c[column] for column in PARTICIPATION_COLUMNS])
+            .where(id_filter(participation.c.expense_id, ids))
+        ))
+
+        paid = dict(db.session.query(Expense.creator_id, func.sum(Expense.amount)).filter(
+            id_filter(Expense.id, ids)
+        ).group_by(Expense.creator_id).all())
+        owed = dict(db.session.query(ExpenseParticipation.user_id, func.sum(ExpenseParticipation.share_amount)).filter(
+            id_filter(ExpenseParticipation.expense_id, ids)
+        ).group_by(ExpenseParticipation.user_id).all())
+        ArchiveService._fold(paid, owed)
+
+        db.session.execute(participation.delete().where(id_filter(participation.c.expense_id, ids)))
+        db.session.execute(expense.delete().where(id_filter(expense.c.id, ids)))
+        return len(ids)
+
+    @staticmethod
+    def archive(before: Optional[datetime] = None, batch_size: Optional[int] = None,
+                max_batches: Optional[int] = None) -> dict:
+        """Archive every expense dated before `before` (default: ARCHIVE_AFTER_DAYS ago).
+
+        The horizon moves first, so reads that reach below it check both the
+        working and the archive tables while batches are in flight.
+        """
+        before = before or datetime.utcnow() - timedelta(days=app.config['ARCHIVE_AFTER_DAYS'])
+        batch_size = batch_size or app.config['ARCHIVE_BATCH_SIZE']
+        ArchiveService._advance_horizon(before)
+
+        archived = batches = 0
+        while max_batches is None or batches < max_batches:
+            moved = ArchiveService.archive_batch(before, batch_size)
+            db.session.commit()
+            if not moved:
+                break
+            archived += moved
+            batches += 1
+        return {'archived': archived, 'batches': batches, 'horizon': before}
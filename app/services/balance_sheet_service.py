@@ -1,13 +1,27 @@
 from decimal import Decimal
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 import csv
 from io import StringIO
 from dataclasses import dataclass
 from app.models.expense import Expense, ExpenseParticipation
 from app.models.user import User
-from sqlalchemy import func
-from app import db
+from app.models.pairwise import PairwiseBalance
+from app.models.archive import ArchivedExpense, ArchivedExpenseParticipation, CarriedBalance
+from app.models.group import GroupMembership
+from app.models.journal import ExpenseEvent
+from app.models.settlement import Settlement
+from app.services.archive_service import ArchiveService
+from app.services.hot_queries import HotQueries
+from app.services import settlement_solver
+from flask import current_app as app
+from sqlalchemy import and_, func, literal, or_, union_all
+from app.utils.query_utils import id_filter
+from app.utils.invalidation import GROUP
+from app import db, invalidation
+
+ZERO = Decimal('0.00')
+
 
 @dataclass
 class UserBalance:
@@ -21,58 +35,148 @@ class UserBalance:
 
 
 class BalanceSheetService:
+    # summary: totals only; paid/involved: totals plus that list; full: everything
+    PROJECTIONS = ('summary', 'paid', 'involved', 'full')
+    SETTLEMENT_MODES = ('greedy', 'exact')
+
     @staticmethod
-    def calculate_user_balance(user_id: int) -> UserBalance:
-        """Calculate detailed balance for a specific user."""
+    def _dated(query, date_column, since: Optional[datetime], until: Optional[datetime]):
+        if since is not None:
+            query = query.filter(date_column >= since)
+        if until is not None:
+            query = query.filter(date_column < until)
+        return query
+
+    @staticmethod
+    def _paid_query(expense, user_id: int, since: Optional[datetime], until: Optional[datetime]):
+        query = db.session.query(
+            expense.id,
+            expense.description,
+            expense.amount,
+            expense.date,
+            expense.split_method
+        ).filter(expense.creator_id == user_id)
+        return BalanceSheetService._dated(query, expense.date, since, until)
+
+    @staticmethod
+    def _involved_query(expense, participation, user_id: int,
+                        since: Optional[datetime], until: Optional[datetime]):
+        query = db.session.query(
+            expense.id,
+            expense.description,
+            participation.share_amount
+        ).join(
+            participation, participation.expense_id == expense.id
+        ).filter(
+            participation.user_id == user_id
+        )
+        query = BalanceSheetService._dated(query, expense.date, since, until)
+        if participation is ExpenseParticipation:
+            # Lets a range-partitioned table prune to the months in range; rows
+            # written before expense_date existed still match through expense.date
+            undated = participation.expense_date.is_(None)
+            if since is not None:
+                query = query.filter(or_(undated, participation.expense_date >= since))
+            if until is not None:
+                query = query.filter(or_(undated, participation.expense_date < until))
+        return query
+
+    @staticmethod
+    def calculate_user_balance(user_id: int, projection: str = 'full',
+                               since: Optional[datetime] = None,
+                               until: Optional[datetime] = None) -> UserBalance:
+        """Calculate detailed balance for a specific user.
+
+        Totals not backed by a requested list are computed with SUM() in SQL,
+        so a 'summary' projection allocates nothing per expense. `since` and
+        `until` limit the lists to expenses dated in [since, until); totals
+        always cover all time. Archive tables are only read when the lists
+        reach back past the archive horizon. Settlements count as paid by the
+        payer and owed by the payee, and a user who has one gets totals from
+        its running totals (see _settled_totals). With CACHE_ENABLED, results
+        without a date range are cached per worker until the user is touched.
+        The returned value is shared, so don't modify it.
+        """
+        if since is None and until is None:
+            return invalidation.cache('user_balance').get_or_compute(
+                (user_id, projection), [user_id],
+                lambda: BalanceSheetService._compute_user_balance(user_id, projection, None, None)
+            )
+        return BalanceSheetService._compute_user_balance(user_id, projection, since, until)
+
+    @staticmethod
+    def _compute_user_balance(user_id: int, projection: str, since: Optional[datetime],
+                              until: Optional[datetime]) -> UserBalance:
+        if projection not in BalanceSheetService.PROJECTIONS:
+            raise ValueError(f"Invalid projection: {projection}")
+
         # Get user details
         user = User.query.get(user_id)
         if not user:
             raise ValueError(f"User {user_id} not found")
 
-        # Calculate expenses paid by user
-        expenses_paid = db.session.query(
-            Expense.id,
-            Expense.description,
-            Expense.amount,
-            Expense.date,
-            Expense.split_method
-        ).filter(Expense.creator_id == user_id).all()
-
-        total_paid = sum(expense.amount for expense in expenses_paid)
-
-        # Calculate expenses where user is involved
-        expenses_involved = db.session.query(
-            Expense.id,
-            Expense.description,
-            ExpenseParticipation.share_amount
-        ).join(
-            ExpenseParticipation
-        ).filter(
-            ExpenseParticipation.user_id == user_id
-        ).all()
+        expenses_paid_list = []
+        expenses_involved_list = []
+        # Lists over all of history add up to the totals themselves
+        all_time = since is None and until is None
+        with_archive = projection != 'summary' and ArchiveService.reaches_archive(since)
+        settled = BalanceSheetService._settled_totals([user_id]).get(user_id)
 
-        total_owed = sum(expense.share_amount for expense in expenses_involved)
+        if projection in ('paid', 'full'):
+            # Calculate expenses paid by user
+            query = BalanceSheetService._paid_query(Expense, user_id, since, until)
+            if with_archive:
+                # One statement, so rows an archive batch moves mid-read aren't missed
+                query = BalanceSheetService._paid_query(
+                    ArchivedExpense, user_id, since, until
+                ).union_all(query)
+            expenses_paid = query.all()
 
-        # Format expenses for response
-        expenses_paid_list = [
-            {
-                'id': exp.id,
-                'description': exp.description,
-                'amount': float(exp.amount),
-                'date': exp.date.strftime('%Y-%m-%d %H:%M:%S'),
-                'split_method': exp.split_method.value
-            }
-            for exp in expenses_paid
-        ]
+            expenses_paid_list = [
+                {
+                    'id': exp.id,
+                    'description': exp.description,
+                    'amount': float(exp.amount),
+                    'date': exp.date.strftime('%Y-%m-%d %H:%M:%S'),
+                    'split_method': exp.split_method.value
+                }
+                for exp in expenses_paid
+            ]
+        if settled is not None:
+            total_paid = settled[0]
+        elif projection in ('paid', 'full') and all_time:
+            total_paid = sum(expense.amount for expense in expenses_paid)
+        else:
+            total_paid = HotQueries.paid_total(user_id)
 
-        expenses_involved_list = [
-            {
-                'id': exp.id,
-                'description': exp.description,
-                'share_amount': float(exp.share_amount)
-            }
-            for exp in expenses_involved
-        ]
+        if projection in ('involved', 'full'):
+            # Calculate expenses where user is involved
+            query = BalanceSheetService._involved_query(
+                Expense, ExpenseParticipation, user_id, since, until
+            )
+            if with_archive:
+                query = BalanceSheetService._involved_query(
+                    ArchivedExpense, ArchivedExpenseParticipation, user_id, since, until
+                ).union_all(query)
+            expenses_involved = query.all()
+
+            expenses_involved_list = [
+                {
+                    'id': exp.id,
+                    'description': exp.description,
+                    'share_amount': float(exp.share_amount)
+                }
+                for exp in expenses_involved
+            ]
+        if settled is not None:
+            total_owed = settled[1]
+        elif projection in ('involved', 'full') and all_time:
+            total_owed = sum(expense.share_amount for expense in expenses_involved)
+        else:
+            total_owed = HotQueries.owed_total(user_id)
+
+        total_paid = Decimal(total_paid)
+        total_owed = Decimal(total_owed)
 
         return UserBalance(
             user_id=user_id,
@@ -83,27 +187,317 @@ class BalanceSheetService:
             expenses_paid=expenses_paid_list,
             expenses_involved=expenses_involved_list
         )
-        
+
+    @staticmethod
+    def _settled_totals(user_ids: List[int]) -> Dict[int, Tuple[Decimal, Decimal]]:
+        """(total_paid, total_owed) of each of `user_ids` who has a settlement.
+
+        Starts from the running totals kept on the user's latest settlement
+        (the top of its payer or payee index range) and adds only the journal
+        events written after it, so the cost follows the activity since then
+        rather than the whole expense history.
+        """
+        sides = union_all(
+            db.session.query(
+                Settlement.payer_id.label('user_id'),
+                func.max(Settlement.id).label('settlement_id')
+            ).filter(id_filter(Settlement.payer_id, user_ids)).group_by(Settlement.payer_id),
+            db.session.query(
+                Settlement.payee_id.label('user_id'),
+                func.max(Settlement.id).label('settlement_id')
+            ).filter(id_filter(Settlement.payee_id, user_ids)).group_by(Settlement.payee_id)
+        ).subquery()
+        latest = db.session.query(
+            sides.c.user_id,
+            func.max(sides.c.settlement_id).label('settlement_id')
+        ).group_by(sides.c.user_id).subquery()
+
+        totals = {}
+        for user_id, settlement in db.session.query(latest.c.user_id, Settlement).join(
+            Settlement, Settlement.id == latest.c.settlement_id
+        ):
+            if user_id == settlement.payer_id:
+                totals[user_id] = (settlement.payer_total_paid, settlement.payer_total_owed)
+            else:
+                totals[user_id] = (settlement.payee_total_paid, settlement.payee_total_owed)
+        if not totals:
+            return totals
+
+        marks = db.session.query(
+            latest.c.user_id,
+            Settlement.last_event_id
+        ).join(Settlement, Settlement.id == latest.c.settlement_id).subquery()
+        tail = db.session.query(
+            ExpenseEvent.user_id,
+            func.sum(ExpenseEvent.paid_delta),
+            func.sum(ExpenseEvent.owed_delta)
+        ).join(
+            marks, and_(marks.c.user_id == ExpenseEvent.user_id, ExpenseEvent.id > marks.c.last_event_id)
+        ).group_by(ExpenseEvent.user_id)
+        for user_id, paid_delta, owed_delta in tail:
+            total_paid, total_owed = totals[user_id]
+            totals[user_id] = (total_paid + (paid_delta or ZERO), total_owed + (owed_delta or ZERO))
+        return totals
+
+    @staticmethod
+    def calculate_user_balances(user_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Totals for many users in one grouped query.
+
+        Returns {user_id: {name, total_paid, total_owed, net_balance}}; ids
+        that don't exist are left out. Users with a settlement get their
+        totals from _settled_totals instead of summing their history.
+        """
+        user_ids = sorted({int(user_id) for user_id in user_ids})
+        if not user_ids:
+            return {}
+        settled = BalanceSheetService._settled_totals(user_ids)
+        unsettled = [user_id for user_id in user_ids if user_id not in settled]
+
+        zero = literal(0, type_=Expense.amount.type)
+        movements = union_all(
+            db.session.query(
+                Expense.creator_id.label('user_id'),
+                Expense.amount.label('paid'),
+                zero.label('owed')
+            ).filter(id_filter(Expense.creator_id, unsettled)),
+            db.session.query(
+                ExpenseParticipation.user_id.label('user_id'),
+                zero.label('paid'),
+                ExpenseParticipation.share_amount.label('owed')
+            ).filter(id_filter(ExpenseParticipation.user_id, unsettled)),
+            db.session.query(
+                CarriedBalance.user_id.label('user_id'),
+                CarriedBalance.total_paid.label('paid'),
+                CarriedBalance.total_owed.label('owed')
+            ).filter(id_filter(CarriedBalance.user_id, unsettled))
+        ).subquery()
+
+        rows = db.session.query(
+            User.id,
+            User.name,
+            func.coalesce(func.sum(movements.c.paid), 0),
+            func.coalesce(func.sum(movements.c.owed), 0)
+        ).outerjoin(
+            movements, movements.c.user_id == User.id
+        ).filter(
+            id_filter(User.id, user_ids)
+        ).group_by(User.id, User.name)
+
+        balances = {}
+        for user_id, name, total_paid, total_owed in rows:
+            if user_id in settled:
+                total_paid, total_owed = settled[user_id]
+            total_paid = Decimal(total_paid)
+            total_owed = Decimal(total_owed)
+            balances[user_id] = {
+                'name': name,
+                'total_paid': total_paid,
+                'total_owed': total_owed,
+                'net_balance': total_paid - total_owed
+            }
+        return balances
+
+    @staticmethod
+    def group_net_balances() -> List[Dict]:
+        """[{user_id, name, net_balance}] for every user, ordered by id.
+
+        Served from the in-memory ledger when MEMORY_LEDGER_ENABLED is set,
+        otherwise cached per worker (CACHE_ENABLED) until any user is touched.
+        """
+        ledger = app.extensions.get('memory_ledger')
+        if ledger is not None:
+            return ledger.group_balances()
+        return invalidation.cache('group_balances').get_or_compute(
+            'all', [GROUP], BalanceSheetService._compute_group_net_balances
+        )
+
     @staticmethod
-    def calculate_group_balance() -> List[Dict]:
-        """Calculate balances for all users and optimize settlements."""
-        users = User.query.all()
-        balances = []
+    def _compute_group_net_balances() -> List[Dict]:
+        user_ids = [row.id for row in db.session.query(User.id).order_by(User.id)]
+        totals = BalanceSheetService.calculate_user_balances(user_ids)
+        return [
+            {
+                'user_id': user_id,
+                'name': totals[user_id]['name'],
+                'net_balance': float(totals[user_id]['net_balance'])
+            }
+            for user_id in user_ids if user_id in totals
+        ]
+
+    @staticmethod
+    def member_net_balances(group_id: int) -> List[Dict]:
+        """[{user_id, name, net_balance}] for each member of a group, ordered by id.
+
+        Only the group's own expenses and settlements count, so every sum
+        starts from the group's range of a (group_id, date) index and the
+        cost follows the group's activity, not the number of users.
+        """
+        sources = [(Expense, ExpenseParticipation)]
+        if ArchiveService.reaches_archive():
+            sources.append((ArchivedExpense, ArchivedExpenseParticipation))
+
+        zero = literal(0, type_=Expense.amount.type)
+        parts = []
+        for expense, participation in sources:
+            parts.append(db.session.query(
+                expense.creator_id.label('user_id'),
+                expense.amount.label('paid'),
+                zero.label('owed')
+            ).filter(expense.group_id == group_id))
+            parts.append(db.session.query(
+                participation.user_id.label('user_id'),
+                zero.label('paid'),
+                participation.share_amount.label('owed')
+            ).join(
+                expense, expense.id == participation.expense_id
+            ).filter(expense.group_id == group_id))
+        parts.append(db.session.query(
+            Settlement.payer_id.label('user_id'),
+            Settlement.amount.label('paid'),
+            zero.label('owed')
+        ).filter(Settlement.group_id == group_id))
+        parts.append(db.session.query(
+            Settlement.payee_id.label('user_id'),
+            zero.label('paid'),
+            Settlement.amount.label('owed')
+        ).filter(Settlement.group_id == group_id))
+        movements = union_all(*parts).subquery()
+
+        rows = db.session.query(
+            User.id,
+            User.name,
+            func.coalesce(func.sum(movements.c.paid), 0),
+            func.coalesce(func.sum(movements.c.owed), 0)
+        ).select_from(GroupMembership).join(
+            User, User.id == GroupMembership.user_id
+        ).outerjoin(
+            movements, movements.c.user_id == User.id
+        ).filter(
+            GroupMembership.group_id == group_id
+        ).group_by(User.id, User.name).order_by(User.id)
+
+        return [
+            {
+                'user_id': user_id,
+                'name': name,
+                'net_balance': float(Decimal(total_paid) - Decimal(total_owed))
+            }
+            for user_id, name, total_paid, total_owed in rows
+        ]
+
+    @staticmethod
+    def calculate_group_balance(progress: Optional[Callable[[int, int], None]] = None,
+                                mode: str = 'greedy', group_id: Optional[int] = None) -> List[Dict]:
+        """Calculate balances and optimize settlements, for one group or all users.
+
+        Without `group_id` every user is netted together. `mode` is 'greedy'
+        (fast, not always minimal) or 'exact' (minimum number of transfers,
+        see exact_settlements). `progress`, if given, is called with
+        (users_done, users_total).
+        """
+        if mode not in BalanceSheetService.SETTLEMENT_MODES:
+            raise ValueError(f"Invalid settlement mode: {mode}")
 
-        for user in users:
-            user_balance = BalanceSheetService.calculate_user_balance(user.id)
-            balances.append({
-                'user_id': user.id,
-                'name': user.name,
-                'net_balance': float(user_balance.net_balance)
-            })
+        if group_id is None:
+            balances = BalanceSheetService.group_net_balances()
+        else:
+            balances = BalanceSheetService.member_net_balances(group_id)
+        if progress:
+            progress(len(balances), len(balances))
 
+        if mode == 'exact':
+            return BalanceSheetService.exact_settlements(balances, group_id)
         return BalanceSheetService.optimize_settlements(balances)
 
+    @staticmethod
+    def _to_cents(balances: List[Dict]) -> Dict[int, int]:
+        return {
+            balance['user_id']: int((Decimal(str(balance['net_balance'])) * 100).to_integral_value())
+            for balance in balances
+        }
 
     @staticmethod
-    def generate_balance_sheet_csv(user_id: int = None) -> Tuple[str, str]:
-        """Generate a CSV balance sheet for download."""
+    def _settlement_rows(transfers, balances: List[Dict]) -> List[Dict]:
+        names = {balance['user_id']: balance['name'] for balance in balances}
+        return [
+            {
+                'from_user_id': from_user_id,
+                'from_user': names[from_user_id],
+                'to_user_id': to_user_id,
+                'to_user': names[to_user_id],
+                'amount': cents / 100
+            }
+            for from_user_id, to_user_id, cents in transfers
+        ]
+
+    @staticmethod
+    def optimize_settlements(balances: List[Dict]) -> List[Dict]:
+        """Greedily match the largest debtor with the largest creditor.
+
+        Works in cents so the settlements add up exactly to the balances.
+        """
+        transfers = settlement_solver.greedy_transfers(BalanceSheetService._to_cents(balances))
+        return BalanceSheetService._settlement_rows(transfers, balances)
+
+    @staticmethod
+    def _group_edges(group_id: int) -> List[Tuple[int, int]]:
+        """Distinct (creator, participant) pairs of the group's expenses, and its payers and payees."""
+        sources = [(Expense, ExpenseParticipation)]
+        if ArchiveService.reaches_archive():
+            sources.append((ArchivedExpense, ArchivedExpenseParticipation))
+        edges = set(db.session.query(Settlement.payer_id, Settlement.payee_id).filter(
+            Settlement.group_id == group_id
+        ).distinct())
+        for expense, participation in sources:
+            rows = db.session.query(expense.creator_id, participation.user_id).join(
+                participation, participation.expense_id == expense.id
+            ).filter(
+                expense.group_id == group_id,
+                participation.user_id != expense.creator_id
+            ).distinct()
+            edges.update(rows)
+        return list(edges)
+
+    @staticmethod
+    def exact_settlements(balances: List[Dict], group_id: Optional[int] = None) -> List[Dict]:
+        """Provably minimum number of transfers, within SETTLEMENT_EXACT_TIME_BUDGET.
+
+        Components come from the pairwise ledger, or for a group from who
+        shared its expenses: users who don't owe each other, directly or
+        through others, are solved independently. Components too large or
+        too slow to solve exactly use the greedy matching.
+        """
+        if group_id is not None:
+            edges = BalanceSheetService._group_edges(group_id)
+        else:
+            edges = db.session.query(
+                PairwiseBalance.user_id, PairwiseBalance.counterparty_id
+            ).filter(
+                PairwiseBalance.user_id < PairwiseBalance.counterparty_id,
+                PairwiseBalance.amount != 0
+            ).all()
+
+        transfers, stats = settlement_solver.solve(
+            BalanceSheetService._to_cents(balances),
+            edges,
+            time_budget=app.config['SETTLEMENT_EXACT_TIME_BUDGET'],
+            max_size=app.config['SETTLEMENT_EXACT_MAX_SIZE'],
+            processes=app.config['SETTLEMENT_EXACT_PROCESSES']
+        )
+        if stats['fallback']:
+            app.logger.info(f"Exact settlement fell back to greedy for {stats['fallback']} "
+                            f"of {stats['components']} component(s)")
+        return BalanceSheetService._settlement_rows(transfers, balances)
+
+
+    @staticmethod
+    def generate_balance_sheet_csv(user_id: int = None,
+                                   progress: Optional[Callable[[int, int], None]] = None,
+                                   settlement_mode: str = 'greedy') -> Tuple[str, str]:
+        """Generate a CSV balance sheet for download.
+
+        `progress`, if given, is called with (done, total) as the sheet is built.
+        """
         output = StringIO()
         writer = csv.writer(output)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -113,6 +507,12 @@ class BalanceSheetService:
             balance = BalanceSheetService.calculate_user_balance(user_id)
             filename = f"user_{user_id}_balance_{timestamp}.csv"
 
+            # Computing the balance counts as the first half; writing the rows is the rest
+            rows = len(balance.expenses_paid) + len(balance.expenses_involved)
+            written = 0
+            if progress:
+                progress(rows, 2 * rows)
+
             # Write header
             writer.writerow(['Personal Balance Sheet'])
             writer.writerow(['Name', balance.name])
@@ -132,6 +532,9 @@ class BalanceSheetService:
                     expense['date'],
                     expense['split_method']
                 ])
+                written += 1
+                if progress:
+                    progress(rows + written, 2 * rows)
 
             # Write expenses involved
             writer.writerow([])
@@ -143,10 +546,13 @@ class BalanceSheetService:
                     expense['description'],
                     expense['share_amount']
                 ])
+                written += 1
+                if progress:
+                    progress(rows + written, 2 * rows)
 
         else:
             # Group balance sheet
-            balances = BalanceSheetService.calculate_group_balance()
+            balances = BalanceSheetService.calculate_group_balance(progress, mode=settlement_mode)
             filename = f"group_balance_{timestamp}.csv"
 
             # Write header
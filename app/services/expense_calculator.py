@@ -1,4 +1,4 @@
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from decimal import Decimal, InvalidOperation, ROUND_DOWN, ROUND_HALF_UP
 from typing import Dict
 from flask import current_app as app
 from app.exceptions.exception import (
@@ -55,14 +55,15 @@ class EqualSplitStrategy(ExpenseSplitStrategy):
             if num_participants == 0:
                 raise InvalidParticipantsError("No participants for equal split")
 
-            share_amount = (total_amount / num_participants).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            # Round down so the leftover cents are never negative
+            share_amount = (total_amount / num_participants).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
             
             # Ensure rounding doesn't affect total
             shares = {user_id: share_amount for user_id in participants_data.keys()}
             rounding_adjustment = total_amount - sum(shares.values())
             
             if rounding_adjustment != 0:
-                # Add any rounding difference to first participant
+                # Add the leftover cents to first participant
                 first_user_id = next(iter(shares))
                 shares[first_user_id] += rounding_adjustment
 
@@ -91,6 +92,9 @@ class ExactSplitStrategy(ExpenseSplitStrategy):
                 for user_id, share in participants_data.items()
             }
 
+            if any(share < 0 for share in shares.values()):
+                raise InvalidAmountError("Shares must not be negative")
+
             total_shares = sum(shares.values())
             if total_shares != total_amount:
                 raise InvalidAmountError(
@@ -124,15 +128,18 @@ class PercentageSplitStrategy(ExpenseSplitStrategy):
                 for user_id, percentage in participants_data.items()
             }
 
+            if any(percentage < 0 for percentage in percentages.values()):
+                raise InvalidParticipantsError("Percentages must not be negative")
+
             total_percentage = sum(percentages.values())
             if total_percentage != Decimal('100'):
                 raise InvalidParticipantsError(
                     f"Sum of percentages ({total_percentage}) must equal 100"
                 )
 
-            # Calculate shares
+            # Calculate shares, rounded down so the leftover cents are never negative
             shares = {
-                user_id: (percentage * total_amount / Decimal('100')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                user_id: (percentage * total_amount / Decimal('100')).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
                 for user_id, percentage in percentages.items()
             }
 
@@ -141,7 +148,7 @@ class PercentageSplitStrategy(ExpenseSplitStrategy):
             rounding_adjustment = total_amount - total_shares
             
             if rounding_adjustment != 0:
-                # Add any rounding difference to the participant with the highest percentage
+                # Add the leftover cents to the participant with the highest percentage
                 max_percentage_user = max(percentages.items(), key=lambda x: x[1])[0]
                 shares[max_percentage_user] += rounding_adjustment
 
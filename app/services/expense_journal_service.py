@@ -0,0 +1,386 @@
+from decimal import Decimal
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from dataclasses import dataclass
+from sqlalchemy import func, text
+from app.models.expense import Expense, ExpenseParticipation
+from app.models.journal import ExpenseEvent, ExpenseEventType, BalanceSnapshot
+from app.models.archive import CarriedBalance
+from app.models.settlement import Settlement
+from app.models.user import User
+from app.utils.query_utils import id_filter
+from app import db
+
+ZERO = Decimal('0.00')
+
+
+@dataclass
+class JournalBalance:
+    user_id: int
+    total_paid: Decimal
+    total_owed: Decimal
+    last_event_id: int
+
+    @property
+    def net_balance(self) -> Decimal:
+        return self.total_paid - self.total_owed
+
+
+class ExpenseJournalService:
+    @staticmethod
+    def _hold_users(user_ids: Iterable[int]) -> None:
+        """Share-lock the users' rows until commit (PostgreSQL).
+
+        SettlementService locks the payer and payee exclusively while it
+        reads their totals and picks a journal position, so none of their
+        events can be in flight then and commit later under a lower id.
+        """
+        if db.engine.dialect.name != 'postgresql':
+            return
+        user_ids = sorted({int(user_id) for user_id in user_ids})
+        db.session.query(User.id).filter(
+            id_filter(User.id, user_ids)
+        ).order_by(User.id).with_for_update(read=True, key_share=True).all()
+
+    @staticmethod
+    def record_expense(expense: Expense, shares: Dict[int, Decimal]) -> None:
+        """Append the events for a newly created expense.
+
+        Runs as one executemany INSERT inside the caller's transaction, so the
+        journal commits (or rolls back) together with the expense.
+        """
+        ExpenseJournalService._hold_users([expense.creator_id, *shares])
+        created_at = datetime.utcnow()
+        events = [
+            {
+                'event_type': ExpenseEventType.EXPENSE_CREATED,
+                'expense_id': expense.id,
+                'user_id': expense.creator_id,
+                'paid_delta': expense.amount,
+                'owed_delta': ZERO,
+                'created_at': created_at
+            }
+        ]
+        events.extend(
+            {
+                'event_type': ExpenseEventType.SHARE_ASSIGNED,
+                'expense_id': expense.id,
+                'user_id': int(user_id),
+                'paid_delta': ZERO,
+                'owed_delta': share,
+                'created_at': created_at
+            }
+            for user_id, share in shares.items()
+        )
+        db.session.execute(ExpenseEvent.__table__.insert(), events)
+
+    @staticmethod
+    def record_adjustment(expense_id: int, creator_id: int, event_type: ExpenseEventType,
+                          paid_delta: Decimal, owed_deltas: Dict[int, Decimal]) -> None:
+        """Append the balance changes caused by editing or deleting an expense.
+
+        Only non-zero deltas are written; snapshots stay valid because the
+        adjustment events land after every existing journal position.
+        """
+        ExpenseJournalService._hold_users([creator_id, *owed_deltas])
+        created_at = datetime.utcnow()
+        events = []
+        if paid_delta:
+            events.append({
+                'event_type': event_type,
+                'expense_id': expense_id,
+                'user_id': int(creator_id),
+                'paid_delta': paid_delta,
+                'owed_delta': ZERO,
+                'created_at': created_at
+            })
+        events.extend(
+            {
+                'event_type': event_type,
+                'expense_id': expense_id,
+                'user_id': int(user_id),
+                'paid_delta': ZERO,
+                'owed_delta': delta,
+                'created_at': created_at
+            }
+            for user_id, delta in sorted(owed_deltas.items()) if delta
+        )
+        if events:
+            db.session.execute(ExpenseEvent.__table__.insert(), events)
+
+    @staticmethod
+    def record_settlement(settlement: Settlement) -> int:
+        """Append the payer's and payee's events for a settlement; returns the last event id.
+
+        The caller must already hold both users' rows (see SettlementService).
+        """
+        created_at = datetime.utcnow()
+        events = [
+            ExpenseEvent(
+                event_type=ExpenseEventType.SETTLEMENT_PAID,
+                settlement_id=settlement.id,
+                user_id=settlement.payer_id,
+                paid_delta=settlement.amount,
+                owed_delta=ZERO,
+                created_at=created_at
+            ),
+            ExpenseEvent(
+                event_type=ExpenseEventType.SETTLEMENT_RECEIVED,
+                settlement_id=settlement.id,
+                user_id=settlement.payee_id,
+                paid_delta=ZERO,
+                owed_delta=settlement.amount,
+                created_at=created_at
+            )
+        ]
+        db.session.add_all(events)
+        db.session.flush()
+        return max(event.id for event in events)
+
+    @staticmethod
+    def _latest_snapshots(user_ids: Optional[Iterable[int]] = None) -> Dict[int, BalanceSnapshot]:
+        """Return the most recent snapshot per user."""
+        latest = db.session.query(
+            func.max(BalanceSnapshot.id).label('id')
+        ).group_by(BalanceSnapshot.user_id)
+        if user_ids is not None:
+            latest = latest.filter(BalanceSnapshot.user_id.in_(list(user_ids)))
+
+        snapshots = BalanceSnapshot.query.filter(
+            BalanceSnapshot.id.in_(latest)
+        ).all()
+        return {snapshot.user_id: snapshot for snapshot in snapshots}
+
+    @staticmethod
+    def rebuild_balances(user_ids: Optional[Iterable[int]] = None,
+                         upto_event_id: Optional[int] = None) -> Dict[int, JournalBalance]:
+        """Rebuild balances as latest snapshot + replay of later events."""
+        if user_ids is not None:
+            user_ids = [int(user_id) for user_id in user_ids]
+        else:
+            user_ids = [row.id for row in db.session.query(User.id).all()]
+
+        if upto_event_id is None:
+            upto_event_id = db.session.query(func.max(ExpenseEvent.id)).scalar() or 0
+
+        snapshots = ExpenseJournalService._latest_snapshots(user_ids)
+        balances = {
+            user_id: JournalBalance(
+                user_id=user_id,
+                total_paid=snapshots[user_id].total_paid if user_id in snapshots else ZERO,
+                total_owed=snapshots[user_id].total_owed if user_id in snapshots else ZERO,
+                last_event_id=snapshots[user_id].last_event_id if user_id in snapshots else 0
+            )
+            for user_id in user_ids
+        }
+        if not balances:
+            return balances
+
+        # Users snapshotted together share a journal position, so replay the
+        # tail with one grouped query per distinct position.
+        positions: Dict[int, List[int]] = {}
+        for balance in balances.values():
+            positions.setdefault(balance.last_event_id, []).append(balance.user_id)
+
+        for position, position_user_ids in positions.items():
+            tail = db.session.query(
+                ExpenseEvent.user_id,
+                func.sum(ExpenseEvent.paid_delta),
+                func.sum(ExpenseEvent.owed_delta)
+            ).filter(
+                ExpenseEvent.user_id.in_(position_user_ids),
+                ExpenseEvent.id > position,
+                ExpenseEvent.id <= upto_event_id
+            ).group_by(ExpenseEvent.user_id)
+
+            for user_id, paid_delta, owed_delta in tail:
+                balances[user_id].total_paid += paid_delta or ZERO
+                balances[user_id].total_owed += owed_delta or ZERO
+
+        for balance in balances.values():
+            balance.last_event_id = max(balance.last_event_id, upto_event_id)
+
+        return balances
+
+    @staticmethod
+    def rebuild_user_balance(user_id: int) -> JournalBalance:
+        """Rebuild a single user's balance from the journal."""
+        if not User.query.get(user_id):
+            raise ValueError(f"User {user_id} not found")
+        return ExpenseJournalService.rebuild_balances([user_id])[int(user_id)]
+
+    @staticmethod
+    def rebuild_group_balance() -> List[JournalBalance]:
+        """Rebuild every user's balance from the journal."""
+        return list(ExpenseJournalService.rebuild_balances().values())
+
+    @staticmethod
+    def take_snapshots(user_ids: Optional[Iterable[int]] = None) -> int:
+        """Persist a snapshot for each user at the current journal head.
+
+        Event ids are assigned at insert but become visible at commit, so a
+        writer still in flight can commit an id below max(id) after it has
+        been read; a snapshot at that position would never replay the event.
+        On PostgreSQL the table is share-locked first: that waits out every
+        open writer and holds new ones until the snapshots commit. SQLite
+        serialises writers, so ids there always commit in order.
+
+        Returns the number of snapshots written.
+        """
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(text('LOCK TABLE expense_event IN SHARE MODE'))
+        upto_event_id = db.session.query(func.max(ExpenseEvent.id)).scalar() or 0
+        balances = ExpenseJournalService.rebuild_balances(user_ids, upto_event_id)
+
+        db.session.add_all(
+            BalanceSnapshot(
+                user_id=balance.user_id,
+                total_paid=balance.total_paid,
+                total_owed=balance.total_owed,
+                last_event_id=upto_event_id
+            )
+            for balance in balances.values()
+        )
+        db.session.commit()
+        return len(balances)
+
+    @staticmethod
+    def recompute_balances(user_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, Decimal]]:
+        """Recompute totals from Expense/ExpenseParticipation, settlements and archived carry-forwards."""
+        paid_query = db.session.query(
+            Expense.creator_id, func.sum(Expense.amount)
+        ).group_by(Expense.creator_id)
+        owed_query = db.session.query(
+            ExpenseParticipation.user_id, func.sum(ExpenseParticipation.share_amount)
+        ).group_by(ExpenseParticipation.user_id)
+        carried_query = db.session.query(
+            CarriedBalance.user_id, CarriedBalance.total_paid, CarriedBalance.total_owed
+        )
+        sent_query = db.session.query(
+            Settlement.payer_id, func.sum(Settlement.amount)
+        ).group_by(Settlement.payer_id)
+        received_query = db.session.query(
+            Settlement.payee_id, func.sum(Settlement.amount)
+        ).group_by(Settlement.payee_id)
+
+        if user_ids is not None:
+            user_ids = [int(user_id) for user_id in user_ids]
+            paid_query = paid_query.filter(Expense.creator_id.in_(user_ids))
+            owed_query = owed_query.filter(ExpenseParticipation.user_id.in_(user_ids))
+            carried_query = carried_query.filter(CarriedBalance.user_id.in_(user_ids))
+            sent_query = sent_query.filter(Settlement.payer_id.in_(user_ids))
+            received_query = received_query.filter(Settlement.payee_id.in_(user_ids))
+        else:
+            user_ids = [row.id for row in db.session.query(User.id).all()]
+
+        totals = {user_id: {'total_paid': ZERO, 'total_owed': ZERO} for user_id in user_ids}
+        for user_id, amount in paid_query:
+            totals.setdefault(user_id, {'total_paid': ZERO, 'total_owed': ZERO})['total_paid'] = amount
+        for user_id, amount in owed_query:
+            totals.setdefault(user_id, {'total_paid': ZERO, 'total_owed': ZERO})['total_owed'] = amount
+        for user_id, carried_paid, carried_owed in carried_query:
+            user_totals = totals.setdefault(user_id, {'total_paid': ZERO, 'total_owed': ZERO})
+            user_totals['total_paid'] += carried_paid
+            user_totals['total_owed'] += carried_owed
+        for user_id, amount in sent_query:
+            totals.setdefault(user_id, {'total_paid': ZERO, 'total_owed': ZERO})['total_paid'] += amount
+        for user_id, amount in received_query:
+            totals.setdefault(user_id, {'total_paid': ZERO, 'total_owed': ZERO})['total_owed'] += amount
+        return totals
+
+    @staticmethod
+    def verify(user_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Compare snapshot+replay against the full recomputation.
+
+        Returns one entry per user whose totals disagree; an empty list means
+        the journal is consistent with the expense tables.
+        """
+        rebuilt = ExpenseJournalService.rebuild_balances(user_ids)
+        expected = ExpenseJournalService.recompute_balances(user_ids)
+
+        mismatches = []
+        for user_id, totals in expected.items():
+            balance = rebuilt.get(user_id)
+            journal_paid = balance.total_paid if balance else ZERO
+            journal_owed = balance.total_owed if balance else ZERO
+            if journal_paid != totals['total_paid'] or journal_owed != totals['total_owed']:
+                mismatches.append({
+                    'user_id': user_id,
+                    'journal_paid': journal_paid,
+                    'journal_owed': journal_owed,
+                    'expected_paid': totals['total_paid'],
+                    'expected_owed': totals['total_owed']
+                })
+        return mismatches
+
+    @staticmethod
+    def backfill() -> int:
+        """Journal expenses that predate the event log.
+
+        An expense is journaled once it has its EXPENSE_CREATED event. One
+        created before the log but edited or deleted since has only adjustment
+        events, so its creation is backfilled as the amounts those adjustments
+        started from: the current amounts (zero once deleted) minus their deltas.
+
+        Returns the number of expenses that were backfilled.
+        """
+        created = db.session.query(ExpenseEvent.expense_id).filter(
+            ExpenseEvent.event_type == ExpenseEventType.EXPENSE_CREATED
+        )
+        adjustments = db.session.query(
+            ExpenseEvent.expense_id,
+            ExpenseEvent.user_id,
+            func.sum(ExpenseEvent.paid_delta),
+            func.sum(ExpenseEvent.owed_delta)
+        ).filter(
+            ExpenseEvent.expense_id.isnot(None),
+            ~ExpenseEvent.expense_id.in_(created)
+        ).group_by(ExpenseEvent.expense_id, ExpenseEvent.user_id)
+
+        # expense id -> {user id: [paid, owed]} still to be journaled
+        missing: Dict[int, Dict[int, List[Decimal]]] = {}
+        for expense_id, user_id, paid_delta, owed_delta in adjustments:
+            missing.setdefault(expense_id, {})[user_id] = [-(paid_delta or ZERO), -(owed_delta or ZERO)]
+
+        creators = {}
+        for expense in Expense.query.filter(~Expense.id.in_(created)).order_by(Expense.id):
+            creators[expense.id] = expense.creator_id
+            totals = missing.setdefault(expense.id, {})
+            totals.setdefault(expense.creator_id, [ZERO, ZERO])[0] += expense.amount
+            for participation in expense.participations:
+                totals.setdefault(participation.user_id, [ZERO, ZERO])[1] += participation.share_amount
+
+        ExpenseJournalService._hold_users(
+            user_id for totals in missing.values() for user_id in totals
+        )
+        created_at = datetime.utcnow()
+        events = []
+        for expense_id, totals in sorted(missing.items()):
+            # A deleted expense's creator is whoever its adjustments paid back
+            creator_id = creators.get(expense_id) or next(
+                (user_id for user_id, (paid, _) in totals.items() if paid), next(iter(totals))
+            )
+            events.append({
+                'event_type': ExpenseEventType.EXPENSE_CREATED,
+                'expense_id': expense_id,
+                'user_id': creator_id,
+                'paid_delta': totals[creator_id][0],
+                'owed_delta': ZERO,
+                'created_at': created_at
+            })
+            events.extend(
+                {
+                    'event_type': ExpenseEventType.SHARE_ASSIGNED,
+                    'expense_id': expense_id,
+                    'user_id': user_id,
+                    'paid_delta': ZERO,
+                    'owed_delta': owed,
+                    'created_at': created_at
+                }
+                for user_id, (_, owed) in sorted(totals.items()) if owed
+            )
+
+        if events:
+            db.session.execute(ExpenseEvent.__table__.insert(), events)
+        db.session.commit()
+        return len(missing)
@@ -0,0 +1,203 @@
+from decimal import Decimal
+from typing import Dict, Optional
+from sqlalchemy import and_, bindparam
+from sqlalchemy.orm.exc import StaleDataError
+from app.models.expense import Expense, ExpenseParticipation, SplitMethod
+from app.models.journal import ExpenseEventType
+from app.services.expense_calculator import ExpenseCalculator
+from app.exceptions.exception import ExpenseVersionConflictError
+from app.services.expense_journal_service import ExpenseJournalService
+from app.services.pairwise_ledger_service import PairwiseLedgerService
+from app.services.group_service import GroupService
+from app import db, invalidation
+
+ZERO = Decimal('0.00')
+
+
+class ExpenseService:
+    @staticmethod
+    def _split_values(split_method: str, participants: Dict) -> Dict:
+        """Unwrap {"share": x} / {"percentage": x} participant objects for the calculator."""
+        key = {'exact': 'share', 'percentage': 'percentage'}.get(split_method)
+        if key is None:
+            return participants
+        return {
+            user_id: value.get(key) if isinstance(value, dict) else value
+            for user_id, value in participants.items()
+        }
+
+    @staticmethod
+    def create_expense(creator_id: int, description: str, amount: Decimal,
+                       split_method: str, participants: Dict,
+                       group_id: Optional[int] = None) -> Expense:
+        """Create an expense with its participations in the current transaction.
+
+        Participations are written with a single executemany INSERT instead of
+        one ORM flush per participant. With `group_id`, the creator and every
+        participant must be members of that group (GroupMembershipError
+        otherwise). The caller is responsible for commit or rollback.
+        """
+        amount = Decimal(str(amount))
+        if group_id is not None:
+            GroupService.require_members(group_id, [creator_id, *participants])
+        expense = Expense(
+            description=description,
+            amount=amount,
+            split_method=SplitMethod(split_method),
+            creator_id=creator_id,
+            group_id=group_id
+        )
+        db.session.add(expense)
+        db.session.flush()  # Get expense ID without committing
+
+        values = ExpenseService._split_values(split_method, participants)
+        calculator = ExpenseCalculator()
+        shares = calculator.calculate_shares(split_method, amount, values)
+
+        rows = [
+            {
+                'expense_id': expense.id,
+                'user_id': int(user_id),
+                'share_amount': share,
+                'share_percentage': (Decimal(str(values[user_id]))
+                                     if split_method == 'percentage' else None),
+                'expense_date': expense.date
+            }
+            for user_id, share in shares.items()
+        ]
+        db.session.execute(ExpenseParticipation.__table__.insert(), rows)
+
+        ExpenseJournalService.record_expense(expense, shares)
+        PairwiseLedgerService.record_expense(expense, shares)
+        invalidation.touch([creator_id, *(int(user_id) for user_id in shares)])
+        return expense
+
+    @staticmethod
+    def _claim(expense: Expense, expected_version: Optional[int]) -> None:
+        """Bump the version, failing if the expense changed since it was read.
+
+        The flushed UPDATE matches on the old version, so of two concurrent
+        edits the second finds no row and gets a conflict instead of waiting
+        on a lock for the whole request. Holding the row from here on also
+        keeps the participation diff below from racing another writer.
+        """
+        if expected_version is not None and expense.version != expected_version:
+            raise ExpenseVersionConflictError(
+                f"Expense {expense.id} is at version {expense.version}, not {expected_version}"
+            )
+        expense_id = expense.id
+        expense.version += 1
+        try:
+            db.session.flush()
+        except StaleDataError:
+            raise ExpenseVersionConflictError(f"Expense {expense_id} was modified concurrently")
+
+    @staticmethod
+    def _participations(expense_id: int) -> Dict[int, tuple]:
+        """user_id -> (share_amount, share_percentage) as currently stored."""
+        rows = db.session.query(
+            ExpenseParticipation.user_id,
+            ExpenseParticipation.share_amount,
+            ExpenseParticipation.share_percentage
+        ).filter(ExpenseParticipation.expense_id == expense_id)
+        return {row.user_id: (row.share_amount, row.share_percentage) for row in rows}
+
+    @staticmethod
+    def update_expense(expense: Expense, description: str, amount: Decimal, split_method: str,
+                       participants: Dict, expected_version: Optional[int] = None) -> Expense:
+        """Replace an expense's amount/split and apply only the resulting deltas.
+
+        Shares are recomputed through ExpenseCalculator and diffed against the
+        stored participations: removed participants are deleted, changed ones
+        updated and new ones inserted, and the journal and pairwise ledger get
+        the per-user differences. A group expense only takes members of its
+        group. The caller is responsible for commit or rollback.
+        """
+        amount = Decimal(str(amount))
+        if expense.group_id is not None:
+            GroupService.require_members(expense.group_id, participants)
+        values = ExpenseService._split_values(split_method, participants)
+        shares = ExpenseCalculator().calculate_shares(split_method, amount, values)
+        new = {
+            int(user_id): (share, Decimal(str(values[user_id]))
+                           if split_method == 'percentage' else None)
+            for user_id, share in shares.items()
+        }
+
+        old_amount = expense.amount
+        expense.description = description
+        expense.amount = amount
+        expense.split_method = SplitMethod(split_method)
+        ExpenseService._claim(expense, expected_version)
+        old = ExpenseService._participations(expense.id)
+
+        table = ExpenseParticipation.__table__
+        removed = [user_id for user_id in old if user_id not in new]
+        if removed:
+            db.session.execute(table.delete().where(and_(
+                table.c.expense_id == expense.id, table.c.user_id.in_(removed)
+            )))
+
+        changed = [
+            {'b_user_id': user_id, 'share_amount': share, 'share_percentage': percentage}
+            for user_id, (share, percentage) in new.items()
+            if user_id in old and old[user_id] != (share, percentage)
+        ]
+        if changed:
+            db.session.execute(
+                table.update().where(and_(
+                    table.c.expense_id == expense.id, table.c.user_id == bindparam('b_user_id')
+                )),
+                changed
+            )
+
+        added = [
+            {'expense_id': expense.id, 'user_id': user_id,
+             'share_amount': share, 'share_percentage': percentage, 'expense_date': expense.date}
+            for user_id, (share, percentage) in new.items() if user_id not in old
+        ]
+        if added:
+            db.session.execute(table.insert(), added)
+        db.session.expire(expense, ['participations'])
+
+        old_shares = {user_id: share for user_id, (share, _) in old.items()}
+        new_shares = {user_id: share for user_id, (share, _) in new.items()}
+        owed_deltas = {
+            user_id: new_shares.get(user_id, ZERO) - old_shares.get(user_id, ZERO)
+            for user_id in old_shares.keys() | new_shares.keys()
+        }
+        ExpenseJournalService.record_adjustment(
+            expense.id, expense.creator_id, ExpenseEventType.EXPENSE_UPDATED,
+            amount - old_amount, owed_deltas
+        )
+        PairwiseLedgerService.record_adjustment(expense.creator_id, old_shares, new_shares)
+        invalidation.touch([expense.creator_id, *owed_deltas])
+        return expense
+
+    @staticmethod
+    def delete_expense(expense: Expense, expected_version: Optional[int] = None) -> None:
+        """Delete an expense and reverse its effect on the journal and ledger.
+
+        The caller is responsible for commit or rollback.
+        """
+        expense_id = expense.id
+        ExpenseService._claim(expense, expected_version)
+        old_shares = {user_id: share for user_id, (share, _) in
+                      ExpenseService._participations(expense.id).items()}
+
+        ExpenseJournalService.record_adjustment(
+            expense.id, expense.creator_id, ExpenseEventType.EXPENSE_DELETED,
+            -expense.amount, {user_id: -share for user_id, share in old_shares.items()}
+        )
+        PairwiseLedgerService.record_adjustment(expense.creator_id, old_shares, {})
+        invalidation.touch([expense.creator_id, *old_shares])
+
+        db.session.execute(ExpenseParticipation.__table__.delete().where(
+            ExpenseParticipation.__table__.c.expense_id == expense.id
+        ))
+        db.session.expire(expense, ['participations'])
+        db.session.delete(expense)
+        try:
+            db.session.flush()
+        except StaleDataError:
+            raise ExpenseVersionConflictError(f"Expense {expense_id} was modified concurrently")
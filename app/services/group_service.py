@@ -0,0 +1,123 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.exceptions.exception import GroupMembershipError
+from app.models.archive import ArchivedExpense
+from app.models.expense import Expense
+from app.models.group import Group, GroupMembership
+from app.models.user import User
+from app.services.archive_service import ArchiveService
+from app.utils.query_utils import id_filter
+from app import db
+
+
+class GroupService:
+    @staticmethod
+    def _existing_users(user_ids: Set[int]) -> None:
+        found = {row.id for row in db.session.query(User.id).filter(id_filter(User.id, sorted(user_ids)))}
+        missing = user_ids - found
+        if missing:
+            raise GroupMembershipError(f"Unknown user(s): {', '.join(map(str, sorted(missing)))}")
+
+    @staticmethod
+    def create_group(creator_id: int, name: str, member_ids: Iterable[int] = ()) -> Group:
+        """Create a group with the creator and `member_ids` as members.
+
+        The caller is responsible for commit or rollback.
+        """
+        group = Group(name=name, creator_id=creator_id)
+        db.session.add(group)
+        db.session.flush()
+        GroupService.add_members(group.id, [creator_id, *member_ids])
+        return group
+
+    @staticmethod
+    def add_members(group_id: int, user_ids: Iterable[int]) -> List[int]:
+        """Add users to a group; returns the ids that weren't members yet.
+
+        The caller is responsible for commit or rollback.
+        """
+        user_ids = {int(user_id) for user_id in user_ids}
+        if not user_ids:
+            return []
+        GroupService._existing_users(user_ids)
+        added = sorted(user_ids - GroupService.members_among(group_id, user_ids))
+        if added:
+            now = datetime.utcnow()
+            db.session.execute(GroupMembership.__table__.insert(), [
+                {'group_id': group_id, 'user_id': user_id, 'joined_at': now} for user_id in added
+            ])
+        return added
+
+    @staticmethod
+    def members_among(group_id: int, user_ids: Iterable[int]) -> Set[int]:
+        """The subset of `user_ids` that belong to the group (one primary key range scan)."""
+        user_ids = sorted({int(user_id) for user_id in user_ids})
+        if not user_ids:
+            return set()
+        rows = db.session.query(GroupMembership.user_id).filter(
+            GroupMembership.group_id == group_id,
+            id_filter(GroupMembership.user_id, user_ids)
+        )
+        return {row.user_id for row in rows}
+
+    @staticmethod
+    def is_member(group_id: int, user_id: int) -> bool:
+        return bool(GroupService.members_among(group_id, [user_id]))
+
+    @staticmethod
+    def require_members(group_id: int, user_ids: Iterable[int]) -> None:
+        """Raise GroupMembershipError unless every user belongs to the group."""
+        user_ids = {int(user_id) for user_id in user_ids}
+        missing = user_ids - GroupService.members_among(group_id, user_ids)
+        if missing:
+            raise GroupMembershipError(
+                f"User(s) {', '.join(map(str, sorted(missing)))} are not members of group {group_id}"
+            )
+
+    @staticmethod
+    def members(group_id: int) -> List[Dict]:
+        rows = db.session.query(User.id, User.name).join(
+            GroupMembership, GroupMembership.user_id == User.id
+        ).filter(GroupMembership.group_id == group_id).order_by(User.id)
+        return [{'user_id': row.id, 'name': row.name} for row in rows]
+
+    @staticmethod
+    def user_groups(user_id: int) -> List[Group]:
+        return Group.query.join(
+            GroupMembership, GroupMembership.group_id == Group.id
+        ).filter(GroupMembership.user_id == user_id).order_by(Group.id).all()
+
+    @staticmethod
+    def _group_expenses(expense, group_id: int, since: Optional[datetime], until: Optional[datetime]):
+        query = expense.query.filter(expense.group_id == group_id)
+        if since is not None:
+            query = query.filter(expense.date >= since)
+        if until is not None:
+            query = query.filter(expense.date < until)
+        return query.order_by(expense.date, expense.id).all()
+
+    @staticmethod
+    def expenses(group_id: int, since: Optional[datetime] = None,
+                 until: Optional[datetime] = None) -> List:
+        """The group's expenses dated in [since, until), oldest first.
+
+        Reads a range of ix_expense_group_id_date, plus the archive's
+        equivalent when the range reaches back past the archive horizon.
+        """
+        expenses = GroupService._group_expenses(Expense, group_id, since, until)
+        if ArchiveService.reaches_archive(since):
+            expenses = GroupService._group_expenses(ArchivedExpense, group_id, since, until) + expenses
+        return expenses
+
+    @staticmethod
+    def to_dict(group: Group, members: Optional[List[Dict]] = None) -> Dict:
+        result = {
+            'id': group.id,
+            'name': group.name,
+            'creator_id': group.creator_id,
+            'created_at': group.created_at.isoformat()
+        }
+        if members is not None:
+            result['members'] = members
+        return result
@@ -0,0 +1,45 @@
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import bindparam, func, lambda_stmt, select, union_all
+
+from app.models.archive import CarriedBalance
+from app.models.expense import Expense, ExpenseParticipation
+from app.models.user import User
+from app import db, prepared
+
+# Built once: lambda statements are cached by code location, so SQLAlchemy
+# skips rebuilding the construct and its cache key, and reuses the compiled
+# SQL. Values go in as named bind parameters rather than closure variables.
+# The totals read the working rows and the archive's carried-forward total in
+# one statement: an archive batch moves rows from one to the other in a single
+# transaction, so a separate read of each could miss them.
+PAID_TOTAL = lambda_stmt(lambda: select(func.coalesce(func.sum(union_all(
+    select(Expense.amount.label('amount')).where(Expense.creator_id == bindparam('user_id')),
+    select(CarriedBalance.total_paid.label('amount')).where(CarriedBalance.user_id == bindparam('user_id'))
+).subquery().c.amount), 0)))
+OWED_TOTAL = lambda_stmt(lambda: select(func.coalesce(func.sum(union_all(
+    select(ExpenseParticipation.share_amount.label('amount')).where(
+        ExpenseParticipation.user_id == bindparam('user_id')
+    ),
+    select(CarriedBalance.total_owed.label('amount')).where(CarriedBalance.user_id == bindparam('user_id'))
+).subquery().c.amount), 0)))
+USER_BY_EMAIL = lambda_stmt(lambda: select(User).where(User.email == bindparam('email')).limit(1))
+
+
+class HotQueries:
+    """The statements run on nearly every request, cached and (optionally) prepared."""
+
+    @staticmethod
+    def paid_total(user_id: int) -> Decimal:
+        """Sum of the amounts of expenses `user_id` created, archived ones included."""
+        return Decimal(prepared.execute('hot_paid_total', PAID_TOTAL, {'user_id': user_id}).scalar())
+
+    @staticmethod
+    def owed_total(user_id: int) -> Decimal:
+        """Sum of `user_id`'s shares, archived ones included."""
+        return Decimal(prepared.execute('hot_owed_total', OWED_TOTAL, {'user_id': user_id}).scalar())
+
+    @staticmethod
+    def user_by_email(email: str) -> Optional[User]:
+        return db.session.execute(USER_BY_EMAIL, {'email': email}).scalars().first()
@@ -0,0 +1,125 @@
+from datetime import datetime
+from typing import Iterable, Optional
+from sqlalchemy import select, or_, union_all
+from app.models.archive import ArchivedExpense, ArchivedExpenseParticipation
+from app.models.expense import Expense, ExpenseParticipation
+from app.services.archive_service import ArchiveService
+from app import db
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+
+def _ledger_schema():
+    return pa.schema([
+        ('expense_id', pa.int64()),
+        ('date', pa.timestamp('us')),
+        ('description', pa.string()),
+        ('amount', pa.decimal128(10, 2)),
+        ('split_method', pa.dictionary(pa.int32(), pa.string())),
+        ('creator_id', pa.int64()),
+        ('user_id', pa.int64()),
+        ('share_amount', pa.decimal128(10, 2)),
+        ('share_percentage', pa.decimal128(5, 2)),
+    ])
+
+
+class LedgerExportService:
+    BATCH_SIZE = 50_000
+
+    @staticmethod
+    def _ledger_select(expense, participation,
+                       start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None,
+                       user_ids: Optional[Iterable[int]] = None):
+        stmt = select(
+            expense.id,
+            expense.date,
+            expense.description,
+            expense.amount,
+            expense.split_method,
+            expense.creator_id,
+            participation.user_id,
+            participation.share_amount,
+            participation.share_percentage
+        ).join(
+            participation, participation.expense_id == expense.id
+        )
+
+        if start_date:
+            stmt = stmt.where(expense.date >= start_date)
+        if end_date:
+            stmt = stmt.where(expense.date < end_date)
+        if user_ids:
+            stmt = stmt.where(or_(
+                expense.creator_id.in_(user_ids),
+                participation.user_id.in_(user_ids)
+            ))
+        return stmt
+
+    @staticmethod
+    def _ledger_query(start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      user_ids: Optional[Iterable[int]] = None):
+        """One row per participation joined with its expense, in expense order.
+
+        Archived expenses are included when the range reaches past the
+        archive horizon.
+        """
+        user_ids = list(user_ids) if user_ids else None
+        stmt = LedgerExportService._ledger_select(
+            Expense, ExpenseParticipation, start_date, end_date, user_ids
+        )
+        if not ArchiveService.reaches_archive(start_date):
+            return stmt.order_by(Expense.id, ExpenseParticipation.user_id)
+
+        ledger = union_all(
+            LedgerExportService._ledger_select(
+                ArchivedExpense, ArchivedExpenseParticipation, start_date, end_date, user_ids
+            ),
+            stmt
+        ).subquery()
+        return select(ledger).order_by(ledger.c.id, ledger.c.user_id)
+
+    @staticmethod
+    def export_parquet(path: str,
+                       start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None,
+                       user_ids: Optional[Iterable[int]] = None,
+                       batch_size: int = BATCH_SIZE) -> int:
+        """Write the expense/participation ledger to a Parquet file.
+
+        Rows are streamed from a server-side cursor and converted to Arrow
+        record batches of `batch_size`, so memory stays bounded regardless of
+        ledger size. Amounts keep their exact decimal type and dates stay
+        timestamps. Returns the number of rows written.
+        """
+        if pa is None:
+            raise RuntimeError("pyarrow is required for Parquet export")
+
+        schema = _ledger_schema()
+        stmt = LedgerExportService._ledger_query(start_date, end_date, user_ids)
+        result = db.session.execute(
+            stmt.execution_options(stream_results=True, max_row_buffer=batch_size)
+        )
+
+        rows_written = 0
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            for rows in result.partitions(batch_size):
+                columns = list(zip(*rows))
+                arrays = [
+                    pa.array(column, type=field.type)
+                    for column, field in zip(columns, schema)
+                    if field.name != 'split_method'
+                ]
+                arrays.insert(4, pa.array(
+                    [method.value for method in columns[4]], type=pa.string()
+                ).dictionary_encode())
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                rows_written += len(rows)
+
+        return rows_written
@@ -0,0 +1,184 @@
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.archive import ArchivedExpense, ArchivedExpenseParticipation
+from app.models.expense import Expense, ExpenseParticipation
+from app.models.pairwise import PairwiseBalance
+from app.models.settlement import Settlement
+from app.models.user import User
+from app.services.archive_service import ArchiveService
+from app.utils.query_utils import id_filter
+from app import db
+
+ZERO = Decimal('0.00')
+
+
+class PairwiseLedgerService:
+    @staticmethod
+    def _upsert(deltas: Dict[Tuple[int, int], Decimal]) -> None:
+        """Add each (user_id, counterparty_id) delta to the ledger in one statement."""
+        if not deltas:
+            return
+
+        dialect = db.engine.dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(PairwiseBalance.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'counterparty_id'],
+            set_={'amount': PairwiseBalance.__table__.c.amount + stmt.excluded.amount}
+        )
+
+        # Sorted keys give concurrent writers a consistent lock order.
+        rows = [
+            {'user_id': user_id, 'counterparty_id': counterparty_id, 'amount': amount}
+            for (user_id, counterparty_id), amount in sorted(deltas.items())
+        ]
+        db.session.execute(stmt, rows)
+
+    @staticmethod
+    def _add_share_deltas(deltas: Dict[Tuple[int, int], Decimal], creditor_id: int,
+                          shares: Dict[int, Decimal], sign: int = 1) -> None:
+        """Each participant owes the creditor their share (reversed for sign=-1)."""
+        creditor_id = int(creditor_id)
+        for user_id, share in shares.items():
+            debtor_id = int(user_id)
+            if debtor_id == creditor_id or not share:
+                continue
+            amount = share * sign
+            deltas[(creditor_id, debtor_id)] = deltas.get((creditor_id, debtor_id), ZERO) + amount
+            deltas[(debtor_id, creditor_id)] = deltas.get((debtor_id, creditor_id), ZERO) - amount
+
+    @staticmethod
+    def record_expense(expense: Expense, shares: Dict[int, Decimal]) -> None:
+        """Apply a new expense to the ledger: each participant owes the creator their share."""
+        deltas = {}
+        PairwiseLedgerService._add_share_deltas(deltas, expense.creator_id, shares)
+        PairwiseLedgerService._upsert(deltas)
+
+    @staticmethod
+    def record_adjustment(creator_id: int, old_shares: Dict[int, Decimal],
+                          new_shares: Dict[int, Decimal]) -> None:
+        """Move the ledger from an expense's old shares to its new ones.
+
+        Pass empty `new_shares` for a deleted expense. Pairs whose amount is
+        unchanged are not touched.
+        """
+        deltas = {}
+        PairwiseLedgerService._add_share_deltas(deltas, creator_id, old_shares, sign=-1)
+        PairwiseLedgerService._add_share_deltas(deltas, creator_id, new_shares)
+        PairwiseLedgerService._upsert({pair: amount for pair, amount in deltas.items() if amount})
+
+    @staticmethod
+    def record_settlement(payer_id: int, payee_id: int, amount: Decimal) -> None:
+        """Apply a payment: the payee now owes the payer `amount` more (or is owed that much less)."""
+        deltas = {}
+        PairwiseLedgerService._add_share_deltas(deltas, payer_id, {payee_id: amount})
+        PairwiseLedgerService._upsert(deltas)
+
+    @staticmethod
+    def get_user_balances(user_id: int) -> List[Dict]:
+        """Return non-zero balances between a user and each counterparty."""
+        rows = db.session.query(
+            PairwiseBalance.counterparty_id,
+            User.name,
+            PairwiseBalance.amount
+        ).join(
+            User, User.id == PairwiseBalance.counterparty_id
+        ).filter(
+            PairwiseBalance.user_id == user_id,
+            PairwiseBalance.amount != 0
+        ).order_by(PairwiseBalance.counterparty_id).all()
+
+        return [
+            {
+                'user_id': row.counterparty_id,
+                'name': row.name,
+                'amount': float(abs(row.amount)),
+                'direction': 'owes_you' if row.amount > 0 else 'you_owe'
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def shared_with(user_id: int, candidate_ids: List[int]) -> set:
+        """The subset of `candidate_ids` that has ever shared an expense with `user_id`."""
+        if not candidate_ids:
+            return set()
+        rows = db.session.query(PairwiseBalance.counterparty_id).filter(
+            PairwiseBalance.user_id == user_id,
+            id_filter(PairwiseBalance.counterparty_id, candidate_ids)
+        )
+        return {row.counterparty_id for row in rows}
+
+    @staticmethod
+    def compute_from_expenses(user_id: Optional[int] = None) -> Dict[Tuple[int, int], Decimal]:
+        """Derive net pairwise amounts straight from the expense tables, archive and settlements included."""
+        tables = [(Expense, ExpenseParticipation)]
+        if ArchiveService.reaches_archive():
+            tables.append((ArchivedExpense, ArchivedExpenseParticipation))
+
+        # A payment counts like an expense the payer paid for the payee alone
+        settlements = db.session.query(
+            Settlement.payer_id, Settlement.payee_id, func.sum(Settlement.amount)
+        ).group_by(Settlement.payer_id, Settlement.payee_id)
+        if user_id is not None:
+            settlements = settlements.filter((Settlement.payer_id == user_id) | (Settlement.payee_id == user_id))
+        rows = settlements.all()
+
+        for expense, participation in tables:
+            creditor = expense.creator_id
+            debtor = participation.user_id
+            query = db.session.query(
+                creditor, debtor, func.sum(participation.share_amount)
+            ).join(
+                participation, participation.expense_id == expense.id
+            ).filter(creditor != debtor).group_by(creditor, debtor)
+
+            if user_id is not None:
+                query = query.filter((creditor == user_id) | (debtor == user_id))
+            rows.extend(query)
+
+        amounts = {}
+        for creditor_id, debtor_id, amount in rows:
+            amounts[(creditor_id, debtor_id)] = amounts.get((creditor_id, debtor_id), ZERO) + amount
+            amounts[(debtor_id, creditor_id)] = amounts.get((debtor_id, creditor_id), ZERO) - amount
+
+        if user_id is not None:
+            amounts = {key: value for key, value in amounts.items() if key[0] == user_id}
+        return {key: value for key, value in amounts.items() if value != 0}
+
+    @staticmethod
+    def verify(user_id: Optional[int] = None) -> List[Dict]:
+        """Compare the maintained ledger against the raw tables.
+
+        Returns one entry per pair that disagrees; empty means consistent.
+        """
+        query = PairwiseBalance.query.filter(PairwiseBalance.amount != 0)
+        if user_id is not None:
+            query = query.filter(PairwiseBalance.user_id == user_id)
+        ledger = {(row.user_id, row.counterparty_id): row.amount for row in query}
+        expected = PairwiseLedgerService.compute_from_expenses(user_id)
+
+        return [
+            {
+                'user_id': key[0],
+                'counterparty_id': key[1],
+                'ledger_amount': ledger.get(key, ZERO),
+                'expected_amount': expected.get(key, ZERO)
+            }
+            for key in sorted(set(ledger) | set(expected))
+            if ledger.get(key, ZERO) != expected.get(key, ZERO)
+        ]
+
+    @staticmethod
+    def rebuild() -> int:
+        """Replace the ledger with amounts derived from the raw tables.
+
+        Returns the number of rows written.
+        """
+        amounts = PairwiseLedgerService.compute_from_expenses()
+        PairwiseBalance.query.delete()
+        PairwiseLedgerService._upsert(amounts)
+        db.session.commit()
+        return len(amounts)
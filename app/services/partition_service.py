@@ -0,0 +1,226 @@
+"""Declarative PostgreSQL partitioning of expense_participation.
+
+Two layouts are supported:
+
+* ``hash``: ``PARTITION BY HASH (user_id)`` into a fixed number of
+  partitions. Every per-user query prunes to one partition and the
+  ``unique_expense_user (expense_id, user_id)`` constraint is kept as is.
+* ``range``: ``PARTITION BY RANGE (expense_date)`` with one partition per
+  month plus a default partition. Old months can be detached or dropped
+  whole, and queries with a date range prune to the months they cover.
+  PostgreSQL requires the partition key in every unique constraint, so the
+  constraint becomes ``(expense_id, user_id, expense_date)``. That is the
+  same rule, because ``expense_date`` is copied from the expense.
+
+``convert`` rebuilds the table in one transaction under an exclusive lock.
+Run it in a maintenance window.
+"""
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from flask import current_app as app
+from sqlalchemy import text
+
+from app import db
+
+TABLE = 'expense_participation'
+STRATEGIES = ('hash', 'range')
+
+
+def _require_postgresql() -> None:
+    if db.engine.dialect.name != 'postgresql':
+        raise RuntimeError("Table partitioning requires PostgreSQL")
+
+
+def _month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _partitioned_catalog() -> Dict[str, set]:
+    """{'parents': partitioned table names, 'children': their partitions}."""
+    if db.engine.dialect.name != 'postgresql':
+        return {'parents': set(), 'children': set()}
+    with db.engine.connect() as conn:
+        parents = set(conn.execute(text(
+            "SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid"
+        )).scalars())
+        children = set(conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_partitioned_table p ON p.partrelid = i.inhparent"
+        )).scalars())
+    return {'parents': parents, 'children': children}
+
+
+def migration_filter():
+    """Alembic include_object hook that leaves partitioning DDL alone.
+
+    Without it, autogenerate would drop the partitions (tables missing from
+    the models) and fight over the constraints of the partitioned parent.
+    Columns of the parent that exist on both sides aren't compared either:
+    the range layout makes ``expense_date`` NOT NULL (it is in the primary
+    key) while the model, which also fits the hash layout, leaves it
+    nullable. Columns added to the model are still picked up.
+    """
+    catalog = {}
+
+    def include_object(obj, name, type_, reflected, compare_to):
+        if not catalog:
+            catalog.update(_partitioned_catalog())
+        if type_ == 'table':
+            return name not in catalog['children']
+        table = getattr(obj, 'table', None)
+        if type_ in ('index', 'unique_constraint') and table is not None:
+            return table.name not in catalog['parents']
+        if type_ == 'column' and compare_to is not None and table is not None:
+            return table.name not in catalog['parents']
+        return True
+
+    return include_object
+
+
+class PartitionService:
+    @staticmethod
+    def status() -> dict:
+        """Partitioning strategy of expense_participation and its partitions."""
+        _require_postgresql()
+        strategy = db.session.execute(text(
+            "SELECT p.partstrat FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"
+        ), {'table': TABLE}).scalar()
+        partitions = db.session.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "WHERE parent.relname = :table ORDER BY c.relname"
+        ), {'table': TABLE}).all()
+        return {
+            'strategy': {'h': 'hash', 'r': 'range', 'l': 'list'}.get(strategy),
+            'partitions': [
+                {'name': name, 'bound': bound, 'estimated_rows': max(int(rows), 0)}
+                for name, bound, rows in partitions
+            ]
+        }
+
+    @staticmethod
+    def _create_month(start: date) -> Optional[str]:
+        """Create the partition for the month starting at `start` unless it exists."""
+        name = f"{TABLE}_{start:%Y_%m}"
+        exists = db.session.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar()
+        if exists:
+            return None
+        db.session.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_add_months(start, 1).isoformat()}')"
+        ))
+        return name
+
+    @staticmethod
+    def create_future_partitions(months_ahead: Optional[int] = None) -> List[str]:
+        """Create monthly partitions from this month to `months_ahead` months out.
+
+        Only applies to the range layout. Run it from cron well before month
+        end. If rows for a month are already in the default partition, that
+        month's partition can't be created and PostgreSQL raises an error.
+        """
+        _require_postgresql()
+        if PartitionService.status()['strategy'] != 'range':
+            raise RuntimeError(f"{TABLE} is not range partitioned")
+        months_ahead = app.config['PARTICIPATION_PARTITION_MONTHS_AHEAD'] if months_ahead is None else months_ahead
+
+        this_month = _month_start(datetime.utcnow().date())
+        created = [
+            name for name in (
+                PartitionService._create_month(_add_months(this_month, offset))
+                for offset in range(months_ahead + 1)
+            ) if name
+        ]
+        db.session.commit()
+        return created
+
+    @staticmethod
+    def convert(strategy: Optional[str] = None, partitions: Optional[int] = None,
+                months_ahead: Optional[int] = None, keep_old: bool = False) -> dict:
+        """Rebuild expense_participation as a partitioned table and copy the rows.
+
+        The old table is renamed to expense_participation_old. It is dropped at
+        the end unless `keep_old` is set. Everything runs in one transaction, so
+        a failure leaves the original table in place.
+        """
+        _require_postgresql()
+        strategy = strategy or app.config['PARTICIPATION_PARTITION_STRATEGY']
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Invalid partition strategy: {strategy}")
+        if PartitionService.status()['strategy'] is not None:
+            raise RuntimeError(f"{TABLE} is already partitioned")
+        partitions = partitions or app.config['PARTICIPATION_HASH_PARTITIONS']
+        months_ahead = app.config['PARTICIPATION_PARTITION_MONTHS_AHEAD'] if months_ahead is None else months_ahead
+
+        execute = db.session.execute
+        execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+        # Constraint and index names are schema-wide, so free them up first
+        execute(text(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_old"))
+        execute(text(f"ALTER TABLE {TABLE}_old RENAME CONSTRAINT {TABLE}_pkey TO {TABLE}_old_pkey"))
+        execute(text(f"ALTER TABLE {TABLE}_old RENAME CONSTRAINT unique_expense_user TO unique_expense_user_old"))
+        execute(text(f"ALTER INDEX IF EXISTS ix_{TABLE}_user_id RENAME TO ix_{TABLE}_old_user_id"))
+
+        if strategy == 'hash':
+            key, date_type, partition_by = 'user_id', 'timestamp', 'HASH (user_id)'
+            unique = '(expense_id, user_id)'
+        else:
+            key, date_type, partition_by = 'expense_date', 'timestamp NOT NULL', 'RANGE (expense_date)'
+            unique = '(expense_id, user_id, expense_date)'
+        execute(text(f"""
+            CREATE TABLE {TABLE} (
+                id integer NOT NULL DEFAULT nextval('{TABLE}_id_seq'),
+                expense_id integer NOT NULL REFERENCES expense (id),
+                user_id integer NOT NULL REFERENCES "user" (id),
+                share_amount numeric(10, 2) NOT NULL,
+                share_percentage numeric(5, 2),
+                expense_date {date_type},
+                CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, {key}),
+                CONSTRAINT unique_expense_user UNIQUE {unique}
+            ) PARTITION BY {partition_by}
+        """))
+        # Keep the sequence alive when the old table is dropped
+        execute(text(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id"))
+        # Created on the parent, so every partition gets its own copy
+        execute(text(f"CREATE INDEX ix_{TABLE}_user_id ON {TABLE} (user_id)"))
+
+        created = []
+        if strategy == 'hash':
+            for remainder in range(partitions):
+                name = f"{TABLE}_p{remainder}"
+                execute(text(f"CREATE TABLE {name} PARTITION OF {TABLE} "
+                             f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"))
+                created.append(name)
+        else:
+            oldest = execute(text(
+                f"SELECT min(e.date) FROM {TABLE}_old p JOIN expense e ON e.id = p.expense_id"
+            )).scalar()
+            month = _month_start((oldest or datetime.utcnow()).date())
+            last = _add_months(_month_start(datetime.utcnow().date()), months_ahead)
+            while month <= last:
+                created.append(PartitionService._create_month(month))
+                month = _add_months(month, 1)
+            # Undated rows, and dates past the last month created ahead
+            execute(text(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT"))
+            created.append(f"{TABLE}_default")
+
+        copied = execute(text(f"""
+            INSERT INTO {TABLE} (id, expense_id, user_id, share_amount, share_percentage, expense_date)
+            SELECT p.id, p.expense_id, p.user_id, p.share_amount, p.share_percentage,
+                   COALESCE(e.date, '-infinity')
+            FROM {TABLE}_old p JOIN expense e ON e.id = p.expense_id
+        """)).rowcount
+        if not keep_old:
+            execute(text(f"DROP TABLE {TABLE}_old"))
+        db.session.commit()
+
+        execute(text(f"ANALYZE {TABLE}"))
+        db.session.commit()
+        return {'strategy': strategy, 'partitions': created, 'rows': copied}
@@ -0,0 +1,209 @@
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from flask import current_app as app
+from sqlalchemy import func
+from app.models.report_job import ReportJob, ReportJobStatus, ReportScope, SettlementMode
+from app.services.balance_sheet_service import BalanceSheetService
+from app.exceptions.exception import ReportJobLeaseLostError, ReportJobLimitError
+from app import db
+
+
+class ReportJobService:
+    ACTIVE_STATUSES = (ReportJobStatus.QUEUED, ReportJobStatus.RUNNING)
+
+    @staticmethod
+    def enqueue(user_id: int, scope: str, settlement_mode: str = 'greedy') -> ReportJob:
+        """Queue a balance sheet report for the background workers."""
+        active = ReportJob.query.filter(
+            ReportJob.user_id == user_id,
+            ReportJob.status.in_(ReportJobService.ACTIVE_STATUSES)
+        ).count()
+        limit = app.config['REPORT_JOBS_PER_USER']
+        if active >= limit:
+            raise ReportJobLimitError(f"At most {limit} report jobs may be active at once")
+
+        job = ReportJob(user_id=user_id, scope=ReportScope(scope),
+                        settlement_mode=SettlementMode(settlement_mode), status=ReportJobStatus.QUEUED)
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    @staticmethod
+    def get_job(job_id: int, user_id: int) -> Optional[ReportJob]:
+        """Return a job if it belongs to the user."""
+        return ReportJob.query.filter_by(id=job_id, user_id=user_id).first()
+
+    @staticmethod
+    def to_dict(job: ReportJob) -> dict:
+        return {
+            'job_id': job.id,
+            'scope': job.scope.value,
+            'settlement_mode': job.settlement_mode.value,
+            'status': job.status.value,
+            'progress': job.progress,
+            'filename': job.filename,
+            'error': job.error,
+            'created_at': job.created_at.isoformat(),
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None
+        }
+
+    @staticmethod
+    def recover_stale() -> int:
+        """Requeue RUNNING jobs whose worker stopped renewing its lease.
+
+        A job that has already been claimed REPORT_JOB_MAX_ATTEMPTS times is
+        failed instead, so a report that kills its worker can't loop forever.
+        Returns the number of jobs recovered.
+        """
+        now = datetime.utcnow()
+        stale = (
+            (ReportJob.status == ReportJobStatus.RUNNING)
+            & (func.coalesce(ReportJob.heartbeat_at, ReportJob.started_at)
+               < now - timedelta(seconds=app.config['REPORT_JOB_LEASE_SECONDS']))
+        )
+        exhausted = ReportJob.attempts >= app.config['REPORT_JOB_MAX_ATTEMPTS']
+
+        failed = ReportJob.query.filter(stale, exhausted).update({
+            'status': ReportJobStatus.FAILED,
+            'error': 'Report worker stopped responding',
+            'finished_at': now
+        }, synchronize_session=False)
+        requeued = ReportJob.query.filter(stale, ~exhausted).update({
+            'status': ReportJobStatus.QUEUED,
+            'progress': 0,
+            'started_at': None,
+            'heartbeat_at': None
+        }, synchronize_session=False)
+        db.session.commit()
+        if failed or requeued:
+            app.logger.warning(f"Recovered stale report jobs: {requeued} requeued, {failed} failed")
+        return failed + requeued
+
+    @staticmethod
+    def claim_next() -> Optional[ReportJob]:
+        """Atomically move the oldest queued job to RUNNING.
+
+        The conditional UPDATE makes the claim safe across worker processes on
+        any backend; a worker that loses the race simply tries the next job.
+        Jobs left RUNNING by a dead worker are requeued first.
+        """
+        ReportJobService.recover_stale()
+        candidates = db.session.query(ReportJob.id).filter(
+            ReportJob.status == ReportJobStatus.QUEUED
+        ).order_by(ReportJob.id).limit(10).all()
+
+        for (job_id,) in candidates:
+            claimed = ReportJob.query.filter(
+                ReportJob.id == job_id,
+                ReportJob.status == ReportJobStatus.QUEUED
+            ).update({
+                'status': ReportJobStatus.RUNNING,
+                'started_at': datetime.utcnow(),
+                'heartbeat_at': datetime.utcnow(),
+                'attempts': ReportJob.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return ReportJob.query.get(job_id)
+        return None
+
+    @staticmethod
+    def _update_claimed(job_id: int, attempt: int, values: dict) -> bool:
+        """Write `values` only while this worker's claim (`attempt`) still holds."""
+        updated = ReportJob.query.filter(
+            ReportJob.id == job_id,
+            ReportJob.status == ReportJobStatus.RUNNING,
+            ReportJob.attempts == attempt
+        ).update(values, synchronize_session=False)
+        db.session.commit()
+        return bool(updated)
+
+    @staticmethod
+    def run_job(job: ReportJob) -> None:
+        """Generate the report for a claimed job and store the artifact.
+
+        Progress writes renew the job's lease; the generator must report
+        progress at least every REPORT_JOB_LEASE_SECONDS or the job is
+        handed to another worker. Once that happens this worker's writes are
+        ignored.
+        """
+        job_id, attempt, scope = job.id, job.attempts, job.scope
+        renew_every = app.config['REPORT_JOB_LEASE_SECONDS'] / 3
+        last = {'progress': job.progress, 'renewed': time.monotonic()}
+
+        def report_progress(done: int, total: int) -> None:
+            percent = int(done * 100 / total) if total else 100
+            # Only write when the percentage moves, or the lease needs renewing, to keep UPDATEs cheap
+            if percent == last['progress'] and time.monotonic() - last['renewed'] < renew_every:
+                return
+            if not ReportJobService._update_claimed(job_id, attempt, {
+                'progress': percent, 'heartbeat_at': datetime.utcnow()
+            }):
+                raise ReportJobLeaseLostError(f"Report job {job_id} was taken over by another worker")
+            last.update(progress=percent, renewed=time.monotonic())
+
+        try:
+            user_id = job.user_id if scope == ReportScope.USER else None
+            filename, csv_data = BalanceSheetService.generate_balance_sheet_csv(
+                user_id, progress=report_progress, settlement_mode=job.settlement_mode.value
+            )
+
+            artifact_dir = app.config['REPORT_ARTIFACT_DIR']
+            os.makedirs(artifact_dir, exist_ok=True)
+            # Per attempt, so a worker that lost its lease can't overwrite the new run's file
+            artifact_path = os.path.join(artifact_dir, f"job_{job_id}_{attempt}_{filename}")
+            with open(artifact_path, 'w', newline='') as artifact:
+                artifact.write(csv_data)
+
+            result = {
+                'filename': filename,
+                'artifact_path': artifact_path,
+                'progress': 100,
+                'status': ReportJobStatus.SUCCEEDED
+            }
+        except ReportJobLeaseLostError as e:
+            db.session.rollback()
+            app.logger.warning(str(e))
+            return
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Report job {job_id} failed: {str(e)}")
+            result = {'error': str(e), 'status': ReportJobStatus.FAILED}
+
+        result['finished_at'] = datetime.utcnow()
+        if not ReportJobService._update_claimed(job_id, attempt, result):
+            app.logger.warning(f"Report job {job_id} was taken over by another worker; result discarded")
+
+    @staticmethod
+    def work(max_jobs: Optional[int] = None, exit_when_idle: bool = False) -> int:
+        """Poll for and run jobs until `max_jobs` have been processed.
+
+        Runs forever when `max_jobs` is None unless `exit_when_idle` is set.
+        Returns the number of jobs run.
+        """
+        processed = 0
+        poll_interval = app.config['REPORT_WORKER_POLL_INTERVAL']
+        while max_jobs is None or processed < max_jobs:
+            job = ReportJobService.claim_next()
+            if job is None:
+                if exit_when_idle:
+                    break
+                time.sleep(poll_interval)
+                continue
+            ReportJobService.run_job(job)
+            processed += 1
+            # Don't carry identity-mapped rows between jobs
+            db.session.remove()
+        return processed
+
+
+def _worker_main() -> None:
+    """Entry point for a worker process; owns its own app and DB pool."""
+    from app import create_app
+
+    worker_app = create_app()
+    with worker_app.app_context():
+        ReportJobService.work()
@@ -0,0 +1,92 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional
+
+from app.exceptions.exception import InvalidSettlementError
+from app.models.settlement import Settlement
+from app.models.user import User
+from app.services.balance_sheet_service import BalanceSheetService
+from app.services.expense_journal_service import ExpenseJournalService
+from app.services.group_service import GroupService
+from app.services.pairwise_ledger_service import PairwiseLedgerService
+from app.utils.query_utils import id_filter
+from app import db, invalidation
+
+CENT = Decimal('0.01')
+
+
+class SettlementService:
+    @staticmethod
+    def record_settlement(payer_id: int, payee_id: int, amount: Decimal,
+                          group_id: Optional[int] = None, note: Optional[str] = None) -> Settlement:
+        """Record that `payer_id` paid `payee_id` back `amount`.
+
+        Both users' rows stay locked until commit, so their running totals
+        stored on the settlement can't miss a concurrent expense write. With
+        `group_id`, both must be members of that group. The caller is
+        responsible for commit or rollback.
+        """
+        payer_id, payee_id = int(payer_id), int(payee_id)
+        try:
+            amount = Decimal(str(amount))
+        except InvalidOperation:
+            raise InvalidSettlementError(f"Invalid settlement amount: {amount}")
+        if not amount.is_finite() or amount <= 0 or amount != amount.quantize(CENT):
+            raise InvalidSettlementError(f"Invalid settlement amount: {amount}")
+        if payer_id == payee_id:
+            raise InvalidSettlementError("Payer and payee must be different users")
+        if group_id is not None:
+            GroupService.require_members(group_id, [payer_id, payee_id])
+
+        found = db.session.query(User.id).filter(
+            id_filter(User.id, sorted([payer_id, payee_id]))
+        ).order_by(User.id).with_for_update().all()
+        missing = {payer_id, payee_id} - {row.id for row in found}
+        if missing:
+            raise InvalidSettlementError(f"User {min(missing)} not found")
+
+        totals = BalanceSheetService.calculate_user_balances([payer_id, payee_id])
+        payer, payee = totals[payer_id], totals[payee_id]
+        settlement = Settlement(
+            payer_id=payer_id,
+            payee_id=payee_id,
+            amount=amount,
+            group_id=group_id,
+            note=note,
+            date=datetime.utcnow(),
+            payer_total_paid=payer['total_paid'] + amount,
+            payer_total_owed=payer['total_owed'],
+            payee_total_paid=payee['total_paid'],
+            payee_total_owed=payee['total_owed'] + amount,
+            last_event_id=0
+        )
+        db.session.add(settlement)
+        db.session.flush()
+        settlement.last_event_id = ExpenseJournalService.record_settlement(settlement)
+
+        PairwiseLedgerService.record_settlement(payer_id, payee_id, amount)
+        invalidation.touch([payer_id, payee_id])
+        return settlement
+
+    @staticmethod
+    def user_settlements(user_id: int, since: Optional[datetime] = None,
+                         until: Optional[datetime] = None) -> List[Settlement]:
+        """Settlements the user paid or received, dated in [since, until), newest first."""
+        query = Settlement.query.filter((Settlement.payer_id == user_id) | (Settlement.payee_id == user_id))
+        if since is not None:
+            query = query.filter(Settlement.date >= since)
+        if until is not None:
+            query = query.filter(Settlement.date < until)
+        return query.order_by(Settlement.id.desc()).all()
+
+    @staticmethod
+    def to_dict(settlement: Settlement) -> Dict:
+        return {
+            'id': settlement.id,
+            'payer_id': settlement.payer_id,
+            'payee_id': settlement.payee_id,
+            'amount': float(settlement.amount),
+            'group_id': settlement.group_id,
+            'note': settlement.note,
+            'date': settlement.date.isoformat()
+        }
@@ -0,0 +1,205 @@
+"""Minimum-transfer settlement solver.
+
+Settling n non-zero balances takes at most n - 1 transfers, and a set that
+splits into k disjoint zero-sum groups takes exactly n - k (each group is
+settled with one transfer fewer than its size). The exact solver maximises k:
+
+1. users are split into connected components of the debt graph; no transfer
+   ever needs to cross components,
+2. balances that cancel exactly (x and -x) are paired off, which is always
+   part of some optimal partition,
+3. the rest of each component is partitioned by a bitmask DP over subsets,
+   giving the maximum number of zero-sum groups.
+
+The DP is O(2^n * n), so components above ``max_size`` members, and any
+component that misses the deadline, fall back to the greedy matching. All
+amounts are integer cents; functions are module level so they can run in a
+process pool.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from typing import Dict, Iterable, List, Tuple
+
+Transfer = Tuple[int, int, int]  # (from_user_id, to_user_id, cents)
+
+
+class SolveTimeout(Exception):
+    pass
+
+
+def greedy_transfers(amounts: Dict[int, int]) -> List[Transfer]:
+    """Repeatedly match the largest debtor with the largest creditor."""
+    creditors = sorted(([cents, user_id] for user_id, cents in amounts.items() if cents > 0),
+                       key=lambda entry: entry[0], reverse=True)
+    debtors = sorted(([-cents, user_id] for user_id, cents in amounts.items() if cents < 0),
+                     key=lambda entry: entry[0], reverse=True)
+
+    transfers = []
+    i = j = 0
+    while i < len(debtors) and j < len(creditors):
+        cents = min(debtors[i][0], creditors[j][0])
+        transfers.append((debtors[i][1], creditors[j][1], cents))
+        debtors[i][0] -= cents
+        creditors[j][0] -= cents
+        if debtors[i][0] == 0:
+            i += 1
+        if creditors[j][0] == 0:
+            j += 1
+    return transfers
+
+
+def components(amounts: Dict[int, int], edges: Iterable[Tuple[int, int]]) -> List[Dict[int, int]]:
+    """Group users with non-zero balances by connectivity in `edges`."""
+    parent = {user_id: user_id for user_id, cents in amounts.items() if cents}
+
+    def find(user_id):
+        while parent[user_id] != user_id:
+            parent[user_id] = parent[parent[user_id]]
+            user_id = parent[user_id]
+        return user_id
+
+    for a, b in edges:
+        if a in parent and b in parent:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    groups: Dict[int, Dict[int, int]] = {}
+    for user_id in parent:
+        groups.setdefault(find(user_id), {})[user_id] = amounts[user_id]
+    return [groups[root] for root in sorted(groups)]
+
+
+def _pair_opposites(amounts: Dict[int, int]) -> Tuple[List[Dict[int, int]], Dict[int, int]]:
+    """Split off {x, -x} pairs; return (pairs, remaining balances)."""
+    waiting: Dict[int, List[int]] = {}
+    pairs = []
+    rest = {}
+    for user_id, cents in sorted(amounts.items()):
+        partners = waiting.get(-cents)
+        if partners:
+            partner = partners.pop()
+            pairs.append({partner: -cents, user_id: cents})
+        else:
+            waiting.setdefault(cents, []).append(user_id)
+    for cents, user_ids in waiting.items():
+        for user_id in user_ids:
+            rest[user_id] = cents
+    return pairs, rest
+
+
+def max_zero_sum_partition(values: List[int], deadline: float) -> List[List[int]]:
+    """Partition indexes of `values` (summing to 0) into the most zero-sum groups.
+
+    dp[mask] is the most zero-sum prefixes over any ordering of `mask`; the
+    ordering that achieves dp[full] is rebuilt by walking back from the full
+    set, and its zero-sum prefixes delimit the groups.
+    """
+    size = 1 << len(values)
+    sums = [0] * size
+    dp = [0] * size
+    for mask in range(1, size):
+        if not mask & 0xFFF and time.time() > deadline:
+            raise SolveTimeout()
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + values[low.bit_length() - 1]
+        best = 0
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            if dp[mask ^ bit] > best:
+                best = dp[mask ^ bit]
+            rest ^= bit
+        dp[mask] = best + (sums[mask] == 0)
+
+    order = []
+    mask = size - 1
+    while mask:
+        target = dp[mask] - (sums[mask] == 0)
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            if dp[mask ^ bit] == target:
+                break
+            rest ^= bit
+        order.append(bit.bit_length() - 1)
+        mask ^= bit
+    order.reverse()
+
+    groups, current, running = [], [], 0
+    for index in order:
+        current.append(index)
+        running += values[index]
+        if running == 0:
+            groups.append(current)
+            current = []
+    return groups
+
+
+def solve_component(amounts: Dict[int, int], deadline: float, max_size: int) -> Tuple[List[Transfer], bool]:
+    """Minimum transfers for one zero-sum component; returns (transfers, exact)."""
+    pairs, rest = _pair_opposites(amounts)
+    transfers = [transfer for pair in pairs for transfer in greedy_transfers(pair)]
+    if not rest:
+        return transfers, True
+    if len(rest) > max_size or sum(rest.values()) != 0:
+        return transfers + greedy_transfers(rest), False
+
+    user_ids = list(rest)
+    try:
+        groups = max_zero_sum_partition([rest[user_id] for user_id in user_ids], deadline)
+    except SolveTimeout:
+        return transfers + greedy_transfers(rest), False
+
+    for group in groups:
+        # A group with no zero-sum subgroup settles greedily in len(group) - 1
+        transfers.extend(greedy_transfers({user_ids[i]: rest[user_ids[i]] for i in group}))
+    return transfers, True
+
+
+def solve(amounts: Dict[int, int], edges: Iterable[Tuple[int, int]], time_budget: float,
+          max_size: int = 18, processes: int = 1, pool_min_size: int = 16) -> Tuple[List[Transfer], Dict]:
+    """Exact settlement for all balances within `time_budget` seconds.
+
+    Components of at least `pool_min_size` members are solved across
+    `processes` worker processes; smaller ones are cheaper to solve inline
+    than to ship. Returns (transfers, stats).
+    """
+    deadline = time.time() + time_budget
+    parts = components(amounts, edges)
+    if any(sum(part.values()) != 0 for part in parts):
+        # Edges disagree with the balances (e.g. a stale ledger); don't split
+        parts = [{user_id: cents for user_id, cents in amounts.items() if cents}]
+
+    heavy = [part for part in parts if len(part) >= pool_min_size]
+    light = [part for part in parts if len(part) < pool_min_size]
+    transfers: List[Transfer] = []
+    stats = {'components': len(parts), 'exact': 0, 'fallback': 0}
+
+    def collect(result):
+        part_transfers, exact = result
+        transfers.extend(part_transfers)
+        stats['exact' if exact else 'fallback'] += 1
+
+    for part in light:
+        collect(solve_component(part, deadline, max_size))
+
+    if len(heavy) > 1 and processes > 1:
+        executor = ProcessPoolExecutor(max_workers=min(processes, len(heavy)), mp_context=get_context('spawn'))
+        try:
+            futures = {executor.submit(solve_component, part, deadline, max_size): part for part in heavy}
+            done, _ = wait(futures, timeout=max(0.0, deadline - time.time()) + 1.0)
+            for future, part in futures.items():
+                if future in done and future.exception() is None:
+                    collect(future.result())
+                else:
+                    collect((greedy_transfers(part), False))
+        finally:
+            # Stragglers stop on their own at the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        for part in heavy:
+            collect(solve_component(part, deadline, max_size))
+
+    return transfers, stats
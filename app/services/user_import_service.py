@@ -0,0 +1,141 @@
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional
+
+import bcrypt as bcrypt_lib
+from flask import current_app as app
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from app.models.user import User
+from app import db, invalidation
+
+EMAIL_PATTERN = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+
+def _hash_password(password: str, rounds: int) -> str:
+    """Same hash format as Bcrypt.generate_password_hash; runs in pool workers."""
+    return bcrypt_lib.hashpw(password.encode('utf-8'), bcrypt_lib.gensalt(rounds)).decode('utf-8')
+
+
+class UserImportService:
+    FIELDS = ('name', 'email', 'mobile', 'password')
+
+    @staticmethod
+    def _validate(row: dict) -> Optional[str]:
+        missing = [field for field in UserImportService.FIELDS if not row.get(field)]
+        if missing:
+            return f"Missing {', '.join(missing)}"
+        if not EMAIL_PATTERN.match(row['email']):
+            return "Invalid email format"
+        if len(row['password']) < 8:
+            return "Password must be at least 8 characters long"
+        if len(row['name']) > 80 or len(row['email']) > 120 or len(row['mobile']) > 15:
+            return "Field too long"
+        return None
+
+    @staticmethod
+    def hash_passwords(passwords: List[str], processes: int = 1, rounds: int = None) -> List[str]:
+        """bcrypt-hash passwords, spread across `processes` worker processes."""
+        rounds = rounds or app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        if processes <= 1 or len(passwords) <= 1:
+            return [_hash_password(password, rounds) for password in passwords]
+
+        # spawn: forked children would inherit the app's open DB connections
+        with ProcessPoolExecutor(max_workers=processes,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            chunksize = max(1, len(passwords) // (processes * 4))
+            return list(executor.map(_hash_password, passwords, repeat(rounds), chunksize=chunksize))
+
+    @staticmethod
+    def _insert_batch(rows: List[dict]) -> Dict[int, str]:
+        """Insert one batch; on a conflict retry row by row. Returns {index: error}."""
+        table = User.__table__
+        values = [{key: row[key] for key in ('name', 'email', 'mobile', 'password_hash')} for row in rows]
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert(), values)
+            return {}
+        except IntegrityError:
+            pass
+
+        # Someone else registered one of these since the duplicate check
+        errors = {}
+        for row, value in zip(rows, values):
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert(), value)
+            except IntegrityError:
+                errors[row['row']] = "Email or mobile already registered"
+        return errors
+
+    @staticmethod
+    def import_users(rows: List[dict], processes: int = None, batch_size: int = None) -> dict:
+        """Validate, dedupe, hash and insert users.
+
+        Each input row gets either a `created` entry with its new user id or an
+        `errors` entry; rows are identified by their position in `rows`.
+        """
+        processes = processes or app.config['USER_IMPORT_PROCESSES']
+        batch_size = batch_size or app.config['USER_IMPORT_BATCH_SIZE']
+        errors = []
+        candidates = []
+        seen_emails, seen_mobiles = set(), set()
+
+        for index, raw in enumerate(rows):
+            row = {field: str(raw.get(field) or '').strip() for field in UserImportService.FIELDS}
+            error = UserImportService._validate(row)
+            if error is None and row['email'] in seen_emails:
+                error = "Duplicate email in import"
+            elif error is None and row['mobile'] in seen_mobiles:
+                error = "Duplicate mobile in import"
+            if error:
+                errors.append({'row': index, 'email': row['email'], 'error': error})
+                continue
+            seen_emails.add(row['email'])
+            seen_mobiles.add(row['mobile'])
+            candidates.append({**row, 'row': index})
+
+        # One round trip for every existing email/mobile
+        existing_emails, existing_mobiles = set(), set()
+        if candidates:
+            for email, mobile in db.session.query(User.email, User.mobile).filter(or_(
+                User.email.in_(seen_emails), User.mobile.in_(seen_mobiles)
+            )):
+                existing_emails.add(email)
+                existing_mobiles.add(mobile)
+
+        new_rows = []
+        for row in candidates:
+            if row['email'] in existing_emails:
+                errors.append({'row': row['row'], 'email': row['email'], 'error': "Email already registered"})
+            elif row['mobile'] in existing_mobiles:
+                errors.append({'row': row['row'], 'email': row['email'], 'error': "Mobile already registered"})
+            else:
+                new_rows.append(row)
+
+        hashes = UserImportService.hash_passwords([row['password'] for row in new_rows], processes)
+        for row, password_hash in zip(new_rows, hashes):
+            row['password_hash'] = password_hash
+
+        created = []
+        for start in range(0, len(new_rows), batch_size):
+            batch = new_rows[start:start + batch_size]
+            batch_errors = UserImportService._insert_batch(batch)
+            # New users have no cached entries, but group-wide ones are stale
+            invalidation.touch()
+            db.session.commit()
+
+            inserted = [row for row in batch if row['row'] not in batch_errors]
+            ids = dict(db.session.query(User.email, User.id).filter(
+                User.email.in_([row['email'] for row in inserted])
+            )) if inserted else {}
+            created.extend({'row': row['row'], 'email': row['email'], 'user_id': ids[row['email']]}
+                           for row in inserted)
+            errors.extend({'row': row['row'], 'email': row['email'], 'error': batch_errors[row['row']]}
+                          for row in batch if row['row'] in batch_errors)
+
+        errors.sort(key=lambda error: error['row'])
+        return {'created': created, 'errors': errors}
@@ -0,0 +1,183 @@
+"""Per-route and per-user admission control for expensive endpoints.
+
+Limits are configured in ``ADMISSION_LIMITS`` keyed by Flask endpoint name::
+
+    'expenselist': {
+        'rate': 20, 'burst': 40,          # route-wide token bucket (req/s)
+        'user_rate': 2, 'user_burst': 5,  # per-user token bucket (req/s)
+        'max_in_flight': 4,               # concurrent requests in the view
+        'max_queue': 8,                   # requests allowed to wait for a slot
+        'queue_timeout': 2.0              # seconds a queued request may wait
+    }
+
+Requests over a rate limit get 429, requests that cannot get an in-flight
+slot get 503; both carry ``Retry-After``. Endpoints without an entry are not
+touched, so cheap routes like login keep their own DB connections free.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+
+from flask import g, jsonify, request
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        """Consume a token; return 0 on success or seconds until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def idle(self) -> bool:
+        return self.tokens + (time.monotonic() - self.updated) * self.rate >= self.burst
+
+
+class RouteGate:
+    """Bounded in-flight slots with a bounded wait queue."""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.waiting = 0
+
+    def acquire(self) -> str:
+        """Return 'admitted', 'queued' (admitted after waiting), 'full' or 'timeout'."""
+        if self._slots.acquire(blocking=False):
+            return 'admitted'
+
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                return 'full'
+            self.waiting += 1
+        try:
+            if self._slots.acquire(timeout=self.queue_timeout):
+                return 'queued'
+            return 'timeout'
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def release(self) -> None:
+        self._slots.release()
+
+
+class AdmissionController:
+    MAX_USER_BUCKETS = 10000
+
+    def __init__(self, app=None):
+        self.limits = {}
+        self._route_buckets = {}
+        self._user_buckets = {}
+        self._gates = {}
+        self._lock = threading.Lock()
+        self.metrics = defaultdict(lambda: defaultdict(int))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.limits = app.config.get('ADMISSION_LIMITS', {})
+        if not app.config.get('ADMISSION_ENABLED', True) or not self.limits:
+            return
+
+        for endpoint, limit in self.limits.items():
+            if 'rate' in limit:
+                self._route_buckets[endpoint] = TokenBucket(limit['rate'], limit.get('burst', limit['rate']))
+            if 'max_in_flight' in limit:
+                self._gates[endpoint] = RouteGate(
+                    limit['max_in_flight'],
+                    limit.get('max_queue', 0),
+                    limit.get('queue_timeout', 0.0)
+                )
+
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions['admission'] = self
+
+    def _user_bucket(self, endpoint: str, identity, limit: dict) -> TokenBucket:
+        key = (endpoint, identity)
+        bucket = self._user_buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                if len(self._user_buckets) >= self.MAX_USER_BUCKETS:
+                    # Full buckets carry no state worth keeping
+                    for stale in [k for k, b in self._user_buckets.items() if b.idle()]:
+                        del self._user_buckets[stale]
+                bucket = self._user_buckets.setdefault(
+                    key, TokenBucket(limit['user_rate'], limit.get('user_burst', limit['user_rate']))
+                )
+        return bucket
+
+    @staticmethod
+    def _identity():
+        try:
+            from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            identity = None
+        return identity if identity is not None else request.remote_addr
+
+    @staticmethod
+    def _reject(status: int, message: str, retry_after: float):
+        response = jsonify({'message': message})
+        response.status_code = status
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def _before_request(self):
+        endpoint = request.endpoint
+        limit = self.limits.get(endpoint)
+        if limit is None:
+            return None
+        metrics = self.metrics[endpoint]
+
+        bucket = self._route_buckets.get(endpoint)
+        wait = bucket.take() if bucket else 0.0
+        if not wait and 'user_rate' in limit:
+            wait = self._user_bucket(endpoint, self._identity(), limit).take()
+        if wait:
+            metrics['rejected_rate'] += 1
+            return self._reject(429, "Too many requests", wait)
+
+        gate = self._gates.get(endpoint)
+        if gate is not None:
+            outcome = gate.acquire()
+            if outcome in ('full', 'timeout'):
+                metrics[f'rejected_{outcome}'] += 1
+                return self._reject(503, "Server busy, retry later", gate.queue_timeout or 1)
+            if outcome == 'queued':
+                metrics['queued'] += 1
+            g.admission_gate = gate
+
+        metrics['admitted'] += 1
+        return None
+
+    def _teardown_request(self, exc):
+        gate = g.pop('admission_gate', None)
+        if gate is not None:
+            gate.release()
+
+    def snapshot(self) -> dict:
+        """Current counters and queue depth per controlled endpoint."""
+        return {
+            endpoint: {
+                **dict(self.metrics[endpoint]),
+                'waiting': self._gates[endpoint].waiting if endpoint in self._gates else 0
+            }
+            for endpoint in self.limits
+        }
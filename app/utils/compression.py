@@ -0,0 +1,148 @@
+"""Negotiated response compression.
+
+Responses whose mimetype is in ``COMPRESSION_MIMETYPES`` are compressed with
+the best encoding the client accepts from ``COMPRESSION_ALGORITHMS`` (zstd,
+br, gzip by default; zstd and br only when ``zstandard`` / ``brotli`` are
+installed). Buffered bodies smaller than ``COMPRESSION_MIN_SIZE`` bytes go out
+as-is. Streamed bodies (``send_file``, generators) are compressed chunk by
+chunk as they are sent, so nothing is buffered in full; with no length to
+check they are compressed regardless of size.
+"""
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits 31 = gzip container
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+ENCODERS = {'gzip': _GzipEncoder}
+if brotli is not None:
+    ENCODERS['br'] = _BrotliEncoder
+if zstandard is not None:
+    ENCODERS['zstd'] = _ZstdEncoder
+
+DEFAULT_LEVELS = {'gzip': 6, 'br': 4, 'zstd': 3}
+
+
+def compress_bytes(encoding: str, data: bytes, level: int = None) -> bytes:
+    """Compress a whole body in one go."""
+    encoder = ENCODERS[encoding](DEFAULT_LEVELS[encoding] if level is None else level)
+    return encoder.compress(data) + encoder.finish()
+
+
+def _compress_stream(chunks, encoder, close):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            out = encoder.compress(chunk)
+            if out:
+                yield out
+        yield encoder.finish()
+    finally:
+        if close is not None:
+            close()
+
+
+class ResponseCompressor:
+    def __init__(self, app=None):
+        self.algorithms = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('COMPRESSION_ENABLED', True):
+            return
+        # Server preference order, limited to encoders that are installed
+        self.algorithms = [a for a in app.config.get('COMPRESSION_ALGORITHMS', ('zstd', 'br', 'gzip'))
+                           if a in ENCODERS]
+        self.levels = {**DEFAULT_LEVELS, **app.config.get('COMPRESSION_LEVELS', {})}
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', 1024)
+        self.mimetypes = set(app.config.get('COMPRESSION_MIMETYPES', ('application/json', 'text/csv')))
+        if not self.algorithms:
+            return
+        app.after_request(self._after_request)
+        app.extensions['compression'] = self
+
+    def _choose_encoding(self):
+        # Honours q-values; ties go to the server's order
+        return request.accept_encodings.best_match(self.algorithms)
+
+    def _after_request(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or request.method == 'HEAD'
+                or response.mimetype not in self.mimetypes
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self._choose_encoding()
+        if encoding is None:
+            return response
+
+        streamed = response.is_streamed or response.direct_passthrough
+        length = response.content_length
+        if length is not None and length < self.min_size:
+            return response
+        if not streamed and length is None:
+            length = len(response.get_data())
+            if length < self.min_size:
+                return response
+
+        encoder = ENCODERS[encoding](self.levels[encoding])
+        if streamed:
+            body = response.response
+            response.response = _compress_stream(body, encoder, getattr(body, 'close', None))
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(encoder.compress(response.get_data()) + encoder.finish())
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # The compressed entity is no longer byte-identical to the original
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,178 @@
+"""Read-replica routing for the Flask-SQLAlchemy session.
+
+Requests whose view is decorated with :func:`read_only` send their SELECTs to
+a replica bind (``replica_0``, ``replica_1``, ...). Everything else stays on
+the primary: DML, ``SELECT ... FOR UPDATE``, any query after the session has
+flushed in the current request, and reads by a user who wrote within
+``REPLICA_READ_YOUR_WRITES_SECONDS``. The time of a user's last write
+travels with the client in a signed cookie, so any worker can honour it.
+Replicas lagging by more than
+``REPLICA_MAX_LAG_SECONDS`` are skipped; with no usable replica the primary
+serves the read.
+"""
+import itertools
+import math
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event, orm, text
+
+WRITE_COOKIE = 'last_write'
+
+
+def read_only(f):
+    """Mark a view as safe to serve from a read replica."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _current_identity():
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+class ReplicaRouter:
+    """Picks a healthy replica engine and remembers recent writers per client."""
+
+    def __init__(self):
+        self._cycle = None
+        self._lag = {}          # bind key -> (checked_at, lag_seconds)
+
+    def init_app(self, app):
+        app.after_request(self._remember_write)
+
+    @staticmethod
+    def _serializer(app):
+        # The key that signs the client's access tokens
+        secret = app.config.get('JWT_SECRET_KEY') or app.secret_key
+        return URLSafeTimedSerializer(secret, salt='read-your-writes') if secret else None
+
+    def _remember_write(self, response):
+        """Send the writer's id, signed and timestamped, back in a cookie."""
+        identity = g.get('db_writer')
+        serializer = self._serializer(current_app)
+        if identity is None or serializer is None:
+            return response
+        window = current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS']
+        response.set_cookie(WRITE_COOKIE, serializer.dumps(identity), max_age=math.ceil(window),
+                            httponly=True, samesite='Lax')
+        return response
+
+    def wrote_recently(self, identity, window: float) -> bool:
+        """True if the request's cookie shows `identity` wrote within `window` seconds."""
+        if identity is None or not has_request_context():
+            return False
+        token = request.cookies.get(WRITE_COOKIE)
+        serializer = self._serializer(current_app)
+        if not token or serializer is None:
+            return False
+        try:
+            return serializer.loads(token, max_age=window) == identity
+        except BadSignature:
+            # Tampered, or older than the window
+            return False
+
+    def replica_lag(self, db, app, key: str) -> float:
+        """Seconds the replica is behind, cached for REPLICA_LAG_CHECK_INTERVAL."""
+        interval = app.config['REPLICA_LAG_CHECK_INTERVAL']
+        checked_at, lag = self._lag.get(key, (None, 0.0))
+        if checked_at is not None and time.monotonic() - checked_at < interval:
+            return lag
+
+        engine = db.get_engine(app, bind=key)
+        try:
+            if engine.dialect.name == 'postgresql':
+                with engine.connect() as conn:
+                    lag = conn.execute(text(
+                        "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                    )).scalar() or 0.0
+            else:
+                # File-based replicas (SQLite) have no replication stream
+                lag = 0.0
+        except Exception as e:
+            app.logger.warning(f"Replica {key} lag check failed: {str(e)}")
+            lag = float('inf')
+
+        self._lag[key] = (time.monotonic(), float(lag))
+        return float(lag)
+
+    def choose(self, db, app):
+        """Return a replica engine within the lag budget, or None."""
+        keys = app.config['REPLICA_BIND_KEYS']
+        if not keys:
+            return None
+        if self._cycle is None:
+            self._cycle = itertools.cycle(keys)
+
+        max_lag = app.config['REPLICA_MAX_LAG_SECONDS']
+        for _ in range(len(keys)):
+            key = next(self._cycle)
+            if self.replica_lag(db, app, key) <= max_lag:
+                return db.get_engine(app, bind=key)
+        return None
+
+
+class RoutingSession(SignallingSession):
+    def __init__(self, db, **options):
+        self._db = db
+        SignallingSession.__init__(self, db, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = SignallingSession.get_bind(self, mapper, clause)
+        if getattr(clause, 'is_dml', False):
+            _mark_write(self)
+            return primary
+        if not self._can_use_replica(clause):
+            return primary
+
+        replica = self._db.router.choose(self._db, self.app)
+        if replica is None:
+            return primary
+        g.db_used_replica = True
+        return replica
+
+    def _can_use_replica(self, clause) -> bool:
+        if clause is None or self._flushing or not has_request_context():
+            return False
+        if not g.get('db_read_only') or g.get('db_wrote'):
+            return False
+        if getattr(clause, '_for_update_arg', None) is not None:
+            return False
+        window = self.app.config['REPLICA_READ_YOUR_WRITES_SECONDS']
+        return not self._db.router.wrote_recently(_current_identity(), window)
+
+
+def _mark_write(session) -> None:
+    """Once a request writes, keep it (and its user's next requests) on the primary."""
+    if has_request_context():
+        g.db_wrote = True
+        identity = _current_identity()
+        if identity is not None:
+            g.db_writer = identity
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _pin_to_primary(session, flush_context):
+    _mark_write(session)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def __init__(self, *args, **kwargs):
+        self.router = ReplicaRouter()
+        super().__init__(*args, **kwargs)
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.router.init_app(app)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
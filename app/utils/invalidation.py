@@ -0,0 +1,288 @@
+"""Per-worker caches kept coherent across workers with PostgreSQL LISTEN/NOTIFY.
+
+Each worker process holds its own :class:`LocalCache` instances, whose
+entries are tagged with the user ids they depend on. Writers mark the users
+they changed with :meth:`InvalidationBus.touch`; ORM writes to ``User`` rows
+are marked automatically. After the transaction commits, the worker evicts
+those users from its own caches and sends
+``NOTIFY <CACHE_INVALIDATION_CHANNEL>, '<origin>:<id>,<id>,...'``. A daemon
+thread in every worker LISTENs on the channel and evicts the same users.
+Entries tagged :data:`GROUP` (values covering every user) go on every
+invalidation.
+
+The listener reconnects with backoff. While it is down, entries expire after
+``CACHE_FALLBACK_TTL`` seconds instead of ``CACHE_TTL``. On every
+(re)connect all caches are cleared, because notifications sent in the
+meantime were lost. A value isn't stored if an invalidation arrived while it
+was computed, or if it was read from a read replica. Without PostgreSQL
+there is no bus, only local eviction, so run a single worker.
+"""
+import os
+import select
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Hashable, Iterable
+
+from flask import g, has_request_context
+from sqlalchemy import event, text
+
+GROUP = '*'
+LISTENER_NAME = 'cache_invalidation_listener'
+MAX_PAYLOAD = 7900  # NOTIFY payloads must stay under 8000 bytes
+_PENDING = 'invalidate_user_ids'
+_MISSING = object()
+
+
+class LocalCache:
+    """Thread-safe TTL cache with entries tagged by user id."""
+
+    def __init__(self, bus: 'InvalidationBus', name: str):
+        self.bus = bus
+        self.name = name
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (stored_at, tags, value), oldest first
+        self._generation = 0  # bumped by every eviction
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.bus.ttl():
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def get_or_compute(self, key: Hashable, tags: Iterable, compute: Callable):
+        """Cached value for `key`, or compute() stored under `tags`."""
+        if not self.bus.enabled:
+            return compute()
+        self.bus.start_listener()
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        generation = self._generation
+        value = compute()
+        if self.bus.can_fill():
+            with self._lock:
+                if generation == self._generation:
+                    self._entries.pop(key, None)
+                    self._entries[key] = (time.monotonic(), frozenset(tags), value)
+                    while len(self._entries) > self.bus.max_entries:
+                        del self._entries[next(iter(self._entries))]
+        return value
+
+    def evict(self, user_ids: Iterable[int]) -> None:
+        user_ids = set(user_ids)
+        with self._lock:
+            self._generation += 1
+            self._entries = {key: entry for key, entry in self._entries.items()
+                             if GROUP not in entry[1] and not entry[1] & user_ids}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class InvalidationBus:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.connected = False
+        self.caches: Dict[str, LocalCache] = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._listening = False
+        self._origin = self._origin_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('CACHE_ENABLED', False)
+        if not self.enabled:
+            return
+        self.app = app
+        self.channel = app.config.get('CACHE_INVALIDATION_CHANNEL', 'cache_invalidation')
+        self.cache_ttl = app.config.get('CACHE_TTL', 300)
+        self.fallback_ttl = app.config.get('CACHE_FALLBACK_TTL', 5)
+        self.max_entries = app.config.get('CACHE_MAX_ENTRIES', 10000)
+        self.poll_interval = app.config.get('CACHE_LISTENER_POLL_INTERVAL', 5.0)
+        self.max_backoff = app.config.get('CACHE_LISTENER_MAX_BACKOFF', 30.0)
+
+        from app.utils.db_routing import RoutingSession
+        if not event.contains(RoutingSession, 'after_flush', _collect_user_writes):
+            event.listen(RoutingSession, 'after_flush', _collect_user_writes)
+            event.listen(RoutingSession, 'after_commit', _publish_after_commit)
+            event.listen(RoutingSession, 'after_rollback', _discard_on_rollback)
+        app.extensions['cache_invalidation'] = self
+
+    @property
+    def origin(self) -> str:
+        """Tags this process's notifications; regenerated after a fork."""
+        if self._origin_pid != os.getpid():
+            self._origin = uuid.uuid4().hex[:12]
+            self._origin_pid = os.getpid()
+        return self._origin
+
+    def cache(self, name: str) -> LocalCache:
+        with self._lock:
+            if name not in self.caches:
+                self.caches[name] = LocalCache(self, name)
+            return self.caches[name]
+
+    def ttl(self) -> float:
+        return self.cache_ttl if self.connected or not self._listening else self.fallback_ttl
+
+    @staticmethod
+    def can_fill() -> bool:
+        # A lagging replica can return data from before the last invalidation
+        return not (has_request_context() and g.get('db_used_replica'))
+
+    def touch(self, user_ids: Iterable[int] = ()) -> None:
+        """Invalidate `user_ids` (and GROUP entries) once the current transaction commits."""
+        if not self.enabled:
+            return
+        from app import db
+
+        db.session.info.setdefault(_PENDING, set()).update(int(user_id) for user_id in user_ids)
+
+    def evict(self, user_ids: Iterable[int]) -> None:
+        user_ids = set(user_ids)
+        for cache in list(self.caches.values()):
+            cache.evict(user_ids)
+
+    def clear(self) -> None:
+        for cache in list(self.caches.values()):
+            cache.clear()
+
+    def _payloads(self, user_ids):
+        prefix = f"{self.origin}:"
+        chunk = []
+        for user_id in user_ids:
+            if chunk and len(prefix) + len(','.join(chunk)) + len(str(user_id)) + 1 > MAX_PAYLOAD:
+                yield prefix + ','.join(chunk)
+                chunk = []
+            chunk.append(str(user_id))
+        yield prefix + ','.join(chunk)
+
+    def publish(self, user_ids: Iterable[int]) -> None:
+        """Evict locally, then tell the other workers. Called after commit."""
+        from app import db
+
+        user_ids = sorted(set(user_ids))
+        self.evict(user_ids)
+        if db.engine.dialect.name != 'postgresql':
+            return
+        try:
+            with db.engine.begin() as conn:
+                for payload in self._payloads(user_ids):
+                    conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                                 {'channel': self.channel, 'payload': payload})
+        except Exception as e:
+            # Other workers keep the stale entries until CACHE_TTL
+            self.app.logger.warning(f"Cache invalidation NOTIFY failed: {str(e)}")
+
+    def start_listener(self) -> None:
+        """Start this process's listener thread on first cache use (PostgreSQL only)."""
+        if self._pid == os.getpid():
+            return
+        from app import db
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Forked from a parent that may have cached or listened already
+            self._pid = os.getpid()
+            self.connected = False
+            self.clear()
+            self._listening = db.engine.dialect.name == 'postgresql'
+            if self._listening:
+                engine = db.engine
+                threading.Thread(target=self._listen, args=(engine,), name=LISTENER_NAME,
+                                 daemon=True).start()
+
+    def _connect(self, engine):
+        fairy = engine.raw_connection()
+        # Keep the connection out of the pool; it is parked in LISTEN for good
+        fairy.detach()
+        conn = fairy.dbapi_connection
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"SET application_name = '{LISTENER_NAME}'")
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return conn
+
+    def _receive(self, payload: str) -> None:
+        origin, _, ids = payload.partition(':')
+        if origin != self.origin:
+            self.evict(int(user_id) for user_id in ids.split(',') if user_id)
+
+    def _consume(self, conn) -> None:
+        while True:
+            readable, _, _ = select.select([conn], [], [], self.poll_interval)
+            if readable:
+                conn.poll()
+            else:
+                # Idle: fails fast if the server dropped the connection
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            while conn.notifies:
+                self._receive(conn.notifies.pop(0).payload)
+
+    def _listen(self, engine) -> None:
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                conn = self._connect(engine)
+                self.clear()
+                self.connected = True
+                backoff = 1.0
+                self._consume(conn)
+            except Exception as e:
+                self.app.logger.warning(f"Cache invalidation listener disconnected: {str(e)}")
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+def _bus(session):
+    app = getattr(session, 'app', None)
+    return app.extensions.get('cache_invalidation') if app is not None else None
+
+
+def _collect_user_writes(session, flush_context):
+    from app.models.user import User
+
+    if _bus(session) is None:
+        return
+    user_ids = {obj.id for obj in session.new | session.dirty | session.deleted if isinstance(obj, User)}
+    if user_ids:
+        session.info.setdefault(_PENDING, set()).update(user_ids)
+
+
+def _publish_after_commit(session):
+    user_ids = session.info.pop(_PENDING, None)
+    bus = _bus(session)
+    if user_ids is not None and bus is not None:
+        bus.publish(user_ids)
+
+
+def _discard_on_rollback(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,91 @@
+"""Non-blocking logging pipeline.
+
+Request threads only enqueue records through a ``QueueHandler``; a
+``QueueListener`` thread formats and writes them. Request-scoped data (the
+request id) and sampling decisions are resolved on the request thread, before
+the record is queued.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import has_request_context, request
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', None),
+            'route': getattr(record, 'route', None),
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class RouteSamplingFilter(logging.Filter):
+    """Keep a fraction of sub-WARNING records per route.
+
+    ``rates`` maps Flask endpoint names to the fraction of records to keep;
+    warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: dict, default_rate: float = 1.0):
+        super().__init__()
+        self.rates = rates
+        self.default_rate = default_rate
+
+    def filter(self, record):
+        endpoint = request.endpoint if has_request_context() else None
+        record.route = endpoint
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(endpoint, self.default_rate)
+        return rate >= 1.0 or random.random() < rate
+
+
+class LeanQueueHandler(QueueHandler):
+    """QueueHandler that does the minimum on the calling thread.
+
+    The stock ``prepare`` formats and copies every record; here only the
+    message (and traceback, if any) is resolved so the record can cross
+    threads, and all formatting happens on the listener.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def start_queue_logging(target_handlers, filters, level=logging.DEBUG):
+    """Return a QueueHandler feeding a background listener for `target_handlers`."""
+    log_queue = queue.SimpleQueue()
+    queue_handler = LeanQueueHandler(log_queue)
+    queue_handler.setLevel(level)
+    for log_filter in filters:
+        queue_handler.addFilter(log_filter)
+
+    listener = QueueListener(log_queue, *target_handlers, respect_handler_level=True)
+    listener.start()
+
+    def flush_on_exit():
+        # Already stopped listeners have no thread to join
+        if listener._thread is not None:
+            listener.stop()
+    atexit.register(flush_on_exit)
+    return queue_handler, listener
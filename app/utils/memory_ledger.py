@@ -0,0 +1,296 @@
+"""In-process balance ledger.
+
+Per-user paid and owed totals are held as int64 cents in NumPy arrays, in the
+order of a sorted user id array (``np.searchsorted`` maps ids to positions).
+The ledger is bulk-loaded from the expense tables on first use and kept
+current by tailing the expense journal: every expense write and settlement
+appends events, and each read first applies the events it hasn't seen yet.
+
+Journal ids are not committed in id order, so ids skipped while tailing are
+asked for again on later reads, for up to ``MEMORY_LEDGER_GAP_TIMEOUT``
+seconds (a rolled-back insert leaves a gap for good). Every
+``MEMORY_LEDGER_VERIFY_INTERVAL`` seconds the totals are rebuilt from the
+expense tables (plus carried-forward archive totals and settlements) and
+compared; on any drift the rebuilt copy replaces the old one. Each worker
+process keeps its own copy. Requires NumPy.
+"""
+import sys
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from flask import current_app
+from sqlalchemy import func, or_, select
+
+# Gaps wider than this are left to the periodic verify
+MAX_TRACKED_GAP = 10000
+
+
+def _cents(value) -> int:
+    return int((Decimal(str(value or 0)) * 100).to_integral_value())
+
+
+class _LedgerState:
+    """One consistent copy of the ledger, as of journal id `watermark`."""
+
+    def __init__(self, ids, names, paid, owed, watermark, pending=None):
+        self.ids = ids
+        self.names = names
+        self.paid = paid
+        self.owed = owed
+        self.watermark = watermark
+        self.pending = pending or {}  # skipped journal id -> monotonic time first missed
+
+
+class MemoryLedger:
+    def __init__(self, app=None):
+        self._state = None
+        self._lock = threading.RLock()
+        self._synced_at = 0.0
+        self._verified_at = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('MEMORY_LEDGER_ENABLED', False):
+            return
+        if np is None:
+            app.logger.warning("MEMORY_LEDGER_ENABLED is set but NumPy is not installed")
+            return
+        self.sync_interval = app.config.get('MEMORY_LEDGER_SYNC_INTERVAL', 0.0)
+        self.verify_interval = app.config.get('MEMORY_LEDGER_VERIFY_INTERVAL', 300)
+        self.gap_timeout = app.config.get('MEMORY_LEDGER_GAP_TIMEOUT', 60)
+        # Warm up before the first request; CLI workers load on first use
+        app.before_first_request(self.load)
+        app.extensions['memory_ledger'] = self
+
+    @staticmethod
+    def _snapshot_connection():
+        from app import db
+
+        engine = db.engine
+        if engine.dialect.name == 'postgresql':
+            # All snapshot queries must see the same committed state
+            engine = engine.execution_options(isolation_level='REPEATABLE READ')
+        return engine.connect()
+
+    @staticmethod
+    def _snapshot(conn, pending: Dict[int, float]) -> _LedgerState:
+        """Totals from the expense and settlement tables and the journal head, in one transaction."""
+        from app.models.archive import CarriedBalance
+        from app.models.expense import Expense, ExpenseParticipation
+        from app.models.journal import ExpenseEvent
+        from app.models.settlement import Settlement
+        from app.models.user import User
+        from app.utils.query_utils import id_filter
+
+        with conn.begin():
+            users = conn.execute(select(User.id, User.name).order_by(User.id)).all()
+            paid_by = dict(conn.execute(
+                select(Expense.creator_id, func.sum(Expense.amount)).group_by(Expense.creator_id)
+            ).all())
+            owed_by = dict(conn.execute(
+                select(ExpenseParticipation.user_id, func.sum(ExpenseParticipation.share_amount))
+                .group_by(ExpenseParticipation.user_id)
+            ).all())
+            carried = conn.execute(
+                select(CarriedBalance.user_id, CarriedBalance.total_paid, CarriedBalance.total_owed)
+            ).all()
+            sent_by = dict(conn.execute(
+                select(Settlement.payer_id, func.sum(Settlement.amount)).group_by(Settlement.payer_id)
+            ).all())
+            received_by = dict(conn.execute(
+                select(Settlement.payee_id, func.sum(Settlement.amount)).group_by(Settlement.payee_id)
+            ).all())
+            watermark = conn.execute(select(func.coalesce(func.max(ExpenseEvent.id), 0))).scalar()
+            committed = set()
+            if pending:
+                committed = set(conn.execute(
+                    select(ExpenseEvent.id).where(id_filter(ExpenseEvent.id, sorted(pending)))
+                ).scalars())
+
+        # Archived expenses count through their carried-forward totals
+        carried_paid = {user_id: _cents(paid) for user_id, paid, _ in carried}
+        carried_owed = {user_id: _cents(owed) for user_id, _, owed in carried}
+        return _LedgerState(
+            ids=np.array([user_id for user_id, _ in users], dtype=np.int64),
+            names=[name for _, name in users],
+            paid=np.array([_cents(paid_by.get(user_id)) + carried_paid.get(user_id, 0)
+                           + _cents(sent_by.get(user_id)) for user_id, _ in users], dtype=np.int64),
+            owed=np.array([_cents(owed_by.get(user_id)) + carried_owed.get(user_id, 0)
+                           + _cents(received_by.get(user_id)) for user_id, _ in users], dtype=np.int64),
+            watermark=watermark,
+            # Still uncommitted at the snapshot, so not in the totals
+            pending={event_id: first_missed for event_id, first_missed in pending.items()
+                     if event_id not in committed}
+        )
+
+    @staticmethod
+    def _add_users(state: _LedgerState, users: List) -> None:
+        new_ids = np.array([user_id for user_id, _ in users], dtype=np.int64)
+        zeros = np.zeros(len(users), dtype=np.int64)
+        if not len(state.ids) or new_ids.min() > state.ids[-1]:
+            # The usual case: new registrations get the highest ids
+            order = np.argsort(new_ids, kind='stable')
+            state.ids = np.concatenate([state.ids, new_ids[order]])
+            state.names = state.names + [users[i][1] for i in order]
+            state.paid = np.concatenate([state.paid, zeros])
+            state.owed = np.concatenate([state.owed, zeros])
+            return
+
+        ids = np.concatenate([state.ids, new_ids])
+        order = np.argsort(ids, kind='stable')
+        names = state.names + [name for _, name in users]
+        state.ids = ids[order]
+        state.names = [names[i] for i in order]
+        state.paid = np.concatenate([state.paid, zeros])[order]
+        state.owed = np.concatenate([state.owed, zeros])[order]
+
+    def _catch_up(self, state: _LedgerState, conn, upto: int = None) -> None:
+        """Apply new users and the journal events `state` hasn't seen."""
+        from app.models.journal import ExpenseEvent
+        from app.models.user import User
+        from app.utils.query_utils import id_filter
+
+        last_user = int(state.ids[-1]) if len(state.ids) else 0
+        new_users = conn.execute(
+            select(User.id, User.name).where(User.id > last_user).order_by(User.id)
+        ).all()
+        if new_users:
+            self._add_users(state, new_users)
+
+        unseen = ExpenseEvent.id > state.watermark
+        if upto is not None:
+            unseen = unseen & (ExpenseEvent.id <= upto)
+        if state.pending:
+            unseen = or_(unseen, id_filter(ExpenseEvent.id, sorted(state.pending)))
+        events = conn.execute(
+            select(ExpenseEvent.id, ExpenseEvent.user_id, ExpenseEvent.paid_delta, ExpenseEvent.owed_delta)
+            .where(unseen).order_by(ExpenseEvent.id)
+        ).all()
+
+        now = time.monotonic()
+        state.pending = {event_id: first_missed for event_id, first_missed in state.pending.items()
+                         if now - first_missed < self.gap_timeout}
+        if not events:
+            return
+
+        event_ids = {event_id for event_id, _, _, _ in events}
+        for event_id in event_ids:
+            state.pending.pop(event_id, None)
+        top = max(event_ids)
+        if top > state.watermark and top - state.watermark <= MAX_TRACKED_GAP:
+            for event_id in range(state.watermark + 1, top):
+                if event_id not in event_ids:
+                    state.pending[event_id] = now
+        state.watermark = max(state.watermark, top)
+
+        user_ids = np.array([user_id for _, user_id, _, _ in events], dtype=np.int64)
+        positions = np.searchsorted(state.ids, user_ids)
+        known = positions < len(state.ids)
+        known[known] = state.ids[positions[known]] == user_ids[known]
+        if not known.all():
+            # Users committed out of id order since the last catch-up
+            missing = sorted(set(user_ids[~known].tolist()))
+            self._add_users(state, conn.execute(
+                select(User.id, User.name).where(id_filter(User.id, missing))
+            ).all())
+            positions = np.searchsorted(state.ids, user_ids)
+
+        np.add.at(state.paid, positions,
+                  np.array([_cents(paid) for _, _, paid, _ in events], dtype=np.int64))
+        np.add.at(state.owed, positions,
+                  np.array([_cents(owed) for _, _, _, owed in events], dtype=np.int64))
+
+    def load(self) -> None:
+        """Bulk-load the ledger from the database."""
+        with self._lock:
+            with self._snapshot_connection() as conn:
+                self._state = self._snapshot(conn, {})
+            self._synced_at = self._verified_at = time.monotonic()
+
+    def sync(self) -> None:
+        """Apply journal events written since the last sync."""
+        from app import db
+
+        with self._lock:
+            if self._state is None:
+                return self.load()
+            with db.engine.connect() as conn:
+                self._catch_up(self._state, conn)
+            self._synced_at = time.monotonic()
+
+    def verify(self) -> int:
+        """Rebuild from the expense tables and compare.
+
+        Returns the number of users whose totals or name differed; if any did
+        (or users were missing), the rebuilt copy replaces the current one.
+        """
+        from app import db
+
+        with self._lock:
+            if self._state is None:
+                self.load()
+                return 0
+            current = self._state
+            with self._snapshot_connection() as conn:
+                fresh = self._snapshot(conn, current.pending)
+            with db.engine.connect() as conn:
+                self._catch_up(current, conn)
+                # Bring the rebuilt copy to the same journal position
+                self._catch_up(fresh, conn, upto=current.watermark)
+
+            _, current_at, fresh_at = np.intersect1d(current.ids, fresh.ids, assume_unique=True,
+                                                     return_indices=True)
+            renamed = np.fromiter((current.names[i] != fresh.names[j]
+                                   for i, j in zip(current_at.tolist(), fresh_at.tolist())),
+                                  dtype=bool, count=len(current_at))
+            differs = (renamed
+                       | (current.paid[current_at] != fresh.paid[fresh_at])
+                       | (current.owed[current_at] != fresh.owed[fresh_at]))
+            # Plus users present in only one copy
+            drift = int(np.count_nonzero(differs)) + len(current.ids) + len(fresh.ids) - 2 * len(current_at)
+
+            now = time.monotonic()
+            self._synced_at = self._verified_at = now
+            if drift:
+                current_app.logger.warning(f"In-memory ledger drifted for {drift} user(s); reloaded")
+                self._state = fresh
+            return drift
+
+    def _refresh(self) -> _LedgerState:
+        now = time.monotonic()
+        if self._state is None:
+            self.load()
+        elif now - self._verified_at >= self.verify_interval:
+            self.verify()
+        elif now - self._synced_at >= self.sync_interval:
+            self.sync()
+        return self._state
+
+    def group_balances(self) -> List[Dict]:
+        """[{user_id, name, net_balance}] for every user, ordered by id."""
+        with self._lock:
+            state = self._refresh()
+            net = (state.paid - state.owed) / 100
+            return [
+                {'user_id': user_id, 'name': name, 'net_balance': net_balance}
+                for user_id, name, net_balance in zip(state.ids.tolist(), state.names, net.tolist())
+            ]
+
+    def memory_usage(self) -> Dict:
+        """Bytes held by the arrays and by the name list."""
+        state = self._state
+        if state is None:
+            return {'users': 0, 'array_bytes': 0, 'name_bytes': 0}
+        return {
+            'users': len(state.ids),
+            'array_bytes': state.ids.nbytes + state.paid.nbytes + state.owed.nbytes,
+            'name_bytes': sys.getsizeof(state.names) + sum(sys.getsizeof(name) for name in state.names)
+        }
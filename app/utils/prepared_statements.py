@@ -0,0 +1,82 @@
+"""Server-side prepared statements for the hot query set (PostgreSQL).
+
+With ``PREPARED_STATEMENTS_ENABLED``, statements run through
+:meth:`PreparedStatements.execute` are prepared once per database
+connection with ``PREPARE <name> AS ...``. Later calls send
+``EXECUTE <name>(...)``, which skips parsing and, once PostgreSQL settles on a
+generic plan, planning. psycopg2 has no protocol-level prepare, so this uses
+SQL-level PREPARE/EXECUTE. Other dialects and drivers, and the disabled
+case, run the statement normally through the session. Don't enable it behind
+a transaction-pooling pgbouncer: prepared statements live in the server
+session, which such a pooler swaps between transactions.
+"""
+import re
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+_PREPARED = 'prepared_statements'
+_PYFORMAT = re.compile(r'%\((\w+)\)s')
+
+
+def _forget_prepared(dbapi_connection, connection_record):
+    # A new server session has none of the previous connection's statements
+    connection_record.info.pop(_PREPARED, None)
+
+
+class PreparedStatements:
+    def __init__(self, app=None):
+        self.enabled = False
+        self._compiled = {}  # name -> (PREPARE body, EXECUTE statement, default params)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PREPARED_STATEMENTS_ENABLED', False)
+        if not self.enabled:
+            return
+        if not event.contains(Pool, 'connect', _forget_prepared):
+            event.listen(Pool, 'connect', _forget_prepared)
+        app.extensions['prepared_statements'] = self
+
+    def _compile(self, name: str, stmt, dialect):
+        """PREPARE body with $n placeholders, and the matching EXECUTE."""
+        with self._lock:
+            if name in self._compiled:
+                return self._compiled[name]
+            compiled = stmt.compile(dialect=dialect)
+            names = []
+
+            def placeholder(match):
+                if match.group(1) not in names:
+                    names.append(match.group(1))
+                return f"${names.index(match.group(1)) + 1}"
+
+            body = _PYFORMAT.sub(placeholder, compiled.string)
+            args = ', '.join(f"%({param})s" for param in names)
+            execute = f"EXECUTE {name}({args})" if names else f"EXECUTE {name}"
+            self._compiled[name] = (body, execute, dict(compiled.params))
+            return self._compiled[name]
+
+    def execute(self, name: str, stmt, params: dict):
+        """Run a Core `stmt` with `params`, prepared server side as `name` when enabled.
+
+        The result rows are plain tuples; ORM entity statements should go
+        through ``db.session.execute`` directly.
+        """
+        from app import db
+
+        if not self.enabled:
+            return db.session.execute(stmt, params)
+        conn = db.session.connection(bind_arguments={'clause': stmt})
+        if conn.dialect.name != 'postgresql' or conn.dialect.driver != 'psycopg2':
+            return db.session.execute(stmt, params)
+
+        body, execute, defaults = self._compile(name, stmt, conn.dialect)
+        prepared = conn.info.setdefault(_PREPARED, set())
+        if name not in prepared:
+            conn.exec_driver_sql(f"PREPARE {name} AS {body}")
+            prepared.add(name)
+        return conn.exec_driver_sql(execute, {**defaults, **params})
@@ -0,0 +1,160 @@
+"""Opt-in cProfile capture for individual requests.
+
+A request is profiled when it carries a valid ``X-Profile`` header, or when the
+caller's user id is listed in ``PROFILING_USER_IDS``. The header value is
+``<unix_ts>:<hex hmac-sha256(PROFILING_SECRET, "<unix_ts>:<path>")>`` and is
+accepted for ``PROFILING_TOKEN_TTL`` seconds.
+
+Each captured request writes ``<profile_id>.prof`` (pstats) and
+``<profile_id>.json`` (request id, route, status, wall time, SQL statements
+with timings) under ``PROFILING_DIR``. The profile id is a server-generated
+uuid: the request id comes from the client's ``X-Request-ID`` header, so it
+never goes into a file name. When neither a secret nor user ids are configured no
+hooks are installed, so the normal request path is untouched.
+"""
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from flask_log_request_id import current_request_id
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_HEADER = 'X-Profile'
+
+
+def sign_profile_token(secret: str, path: str, timestamp: int = None) -> str:
+    """Build an X-Profile header value for `path`."""
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}:{path}".encode(), hashlib.sha256).hexdigest()
+    return f"{timestamp}:{digest}"
+
+
+class RequestProfiler:
+    def __init__(self, app=None):
+        self.directory = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.secret = app.config.get('PROFILING_SECRET')
+        self.user_ids = set(app.config.get('PROFILING_USER_IDS', ()))
+        self.token_ttl = app.config.get('PROFILING_TOKEN_TTL', 300)
+        self.directory = app.config.get('PROFILING_DIR')
+        if not (self.secret or self.user_ids):
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._start)
+        app.after_request(self._stop)
+        app.teardown_request(self._discard)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _valid_token(self, token: str) -> bool:
+        if not self.secret or not token or ':' not in token:
+            return False
+        timestamp, _ = token.split(':', 1)
+        try:
+            if abs(time.time() - int(timestamp)) > self.token_ttl:
+                return False
+        except ValueError:
+            return False
+        expected = sign_profile_token(self.secret, request.path, int(timestamp))
+        return hmac.compare_digest(expected, token)
+
+    def _flagged_user(self) -> bool:
+        if not self.user_ids:
+            return False
+        try:
+            from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+            verify_jwt_in_request(optional=True)
+            return get_jwt_identity() in self.user_ids
+        except Exception:
+            return False
+
+    def _start(self):
+        if not (self._valid_token(request.headers.get(PROFILE_HEADER)) or self._flagged_user()):
+            return
+        g.profile_sql = []
+        g.profile_started = time.perf_counter()
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    def _stop(self, response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        elapsed = time.perf_counter() - g.pop('profile_started')
+
+        profile_id = uuid.uuid4().hex
+        base = os.path.join(self.directory, profile_id)
+        profiler.dump_stats(f"{base}.prof")
+        with open(f"{base}.json", 'w') as meta:
+            json.dump({
+                'profile_id': profile_id,
+                'request_id': current_request_id(),
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 3),
+                'captured_at': datetime.utcnow().isoformat(),
+                'sql': g.pop('profile_sql', [])
+            }, meta, indent=2)
+
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    def _discard(self, exc):
+        # The view raised before after_request ran; don't leave the profiler on
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile_sql' in g:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile_sql' in g and conn.info.get('profile_query_start'):
+        started = conn.info['profile_query_start'].pop()
+        g.profile_sql.append({
+            'statement': statement,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            'executemany': executemany
+        })
+
+
+def list_profiles(directory: str):
+    """Metadata for every captured profile, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if name.endswith('.json'):
+            with open(os.path.join(directory, name)) as meta:
+                profiles.append(json.load(meta))
+    return sorted(profiles, key=lambda p: p['captured_at'], reverse=True)
+
+
+def find_profiles(directory: str, ident: str):
+    """Profiles whose profile id or request id is `ident`, newest first.
+
+    Each entry's ``prof_path`` is its pstats file.
+    """
+    found = [profile for profile in list_profiles(directory)
+             if ident in (profile.get('profile_id'), profile.get('request_id'))]
+    for profile in found:
+        profile['prof_path'] = os.path.join(directory, f"{profile['profile_id']}.prof")
+    return found
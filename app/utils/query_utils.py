@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from flask import request
+from sqlalchemy import Integer, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app import db
+
+
+def id_filter(column, ids: List[int]):
+    """`column IN ids` as a single bound parameter.
+
+    PostgreSQL gets `= ANY(:ids)` with an integer array, so the statement text
+    (and its cached plan) is the same for every batch size; other backends use
+    an expanding IN.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return column == any_(bindparam('ids', ids, type_=ARRAY(Integer), unique=True))
+    return column.in_(ids)
+
+
+def date_arg(name: str) -> Optional[datetime]:
+    """ISO date or datetime from the query string, as naive UTC like the date columns.
+
+    Raises ValueError if the value is malformed.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
@@ -0,0 +1,126 @@
+"""Engine-level slow query recorder.
+
+Statements slower than ``SLOW_QUERY_THRESHOLD_MS`` are written as JSON lines to
+a rotating file (``SLOW_QUERY_LOG_FILE``) and kept in a bounded in-memory
+buffer served by the admin endpoint. A ``SLOW_QUERY_EXPLAIN_SAMPLE_RATE``
+fraction of slow PostgreSQL SELECTs is re-run under
+``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` on the same connection and the plan
+is attached to the record.
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+from flask_log_request_id import current_request_id
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_IN_LIST = re.compile(r'\((?:\s*(?:%\([^)]+\)s|\?|:\w+)\s*,)+\s*(?:%\([^)]+\)s|\?|:\w+)\s*\)')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace, literals and IN-lists so similar queries group together."""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    return _IN_LIST.sub('(...)', statement)
+
+
+class SlowQueryRecorder:
+    def __init__(self, app=None):
+        self.threshold_ms = None
+        self.records = deque(maxlen=500)
+        self.logger = logging.getLogger('expense_manager.slow_query')
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS')
+        if self.threshold_ms is None:
+            return
+
+        self.explain_rate = app.config.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.0)
+        self.records = deque(maxlen=app.config.get('SLOW_QUERY_BUFFER_SIZE', 500))
+
+        log_file = app.config.get('SLOW_QUERY_LOG_FILE')
+        if log_file and not self.logger.handlers:
+            handler = RotatingFileHandler(
+                log_file,
+                maxBytes=app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+                backupCount=app.config.get('SLOW_QUERY_LOG_BACKUPS', 5)
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.extensions['slow_query'] = self
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        duration_ms = (time.perf_counter() - starts.pop()) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        record = {
+            'captured_at': datetime.utcnow().isoformat(),
+            'duration_ms': round(duration_ms, 3),
+            'sql': normalize_sql(statement),
+            'parameters': repr(parameters)[:1000],
+            'executemany': executemany,
+            'request_id': current_request_id() if has_request_context() else None,
+            'route': request.url_rule.rule if has_request_context() and request.url_rule else None,
+            'method': request.method if has_request_context() else None
+        }
+
+        if (self.explain_rate and conn.dialect.name == 'postgresql' and not executemany
+                and statement.lstrip().upper().startswith('SELECT')
+                and random.random() < self.explain_rate):
+            record['plan'] = self._explain(cursor, statement, parameters)
+
+        self.records.append(record)
+        self.logger.info(json.dumps(record, default=str))
+
+    def _explain(self, cursor, statement, parameters):
+        """Re-run a SELECT under EXPLAIN ANALYZE on the same DBAPI connection.
+
+        The raw DBAPI cursor bypasses engine events, so this doesn't recurse,
+        and the savepoint keeps a failed EXPLAIN from aborting the caller's
+        transaction.
+        """
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                explain_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+                plan = explain_cursor.fetchone()[0]
+                explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+                return plan
+            except Exception as e:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                return {'error': str(e)}
+        except Exception as e:
+            return {'error': str(e)}
+        finally:
+            explain_cursor.close()
+
+    def recent(self, limit: int = 100):
+        """Most recent slow queries, newest first."""
+        return list(self.records)[-limit:][::-1]
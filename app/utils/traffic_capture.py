@@ -0,0 +1,314 @@
+"""Opt-in traffic capture and deterministic replay.
+
+With ``TRAFFIC_CAPTURE_FILE`` set, a ``TRAFFIC_CAPTURE_SAMPLE_RATE`` fraction
+of requests is appended to that file (rotating) as JSON lines: start time,
+method, route, path, query, JSON body, the caller's JWT identity, status,
+duration and the JSON response. Nothing that authenticates is stored. The
+Authorization header is dropped, because replay signs a fresh token for the
+recorded identity. Fields in ``TRAFFIC_CAPTURE_REDACT_FIELDS`` get a fixed
+placeholder. Fields in ``TRAFFIC_CAPTURE_PSEUDONYMIZE_FIELDS`` get a stable
+HMAC pseudonym, so a user who registers in the capture can log in on replay
+under the same pseudonym. Non-JSON request bodies are not recorded.
+
+``replay`` re-issues a capture in recorded order, either against the app in
+process or against a running server. It runs at the recorded pace divided by
+`speed` (0 sends back to back) and compares each status and sanitized JSON
+body with the recorded one. Replayed requests carry ``X-Traffic-Replay`` and
+are never captured themselves.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Iterable, List, Optional
+
+from flask import g, request
+
+REPLAY_HEADER = 'X-Traffic-Replay'
+REDACTED = 'replay-password'  # long enough to pass the registration check
+# Differ between a capture and its replay even when behaviour is identical
+DEFAULT_IGNORE_FIELDS = frozenset({
+    'id', 'expense_id', 'job_id', 'request_id', 'timestamp', 'date',
+    'created_at', 'updated_at', 'started_at', 'finished_at', 'archived_at'
+})
+
+
+class Sanitizer:
+    """Redacts and pseudonymizes fields, by key, anywhere in a JSON value."""
+
+    def __init__(self, redact: Iterable[str], pseudonymize: Iterable[str], salt: str):
+        self.redact = {field.lower() for field in redact}
+        self.pseudonymize = {field.lower() for field in pseudonymize}
+        self.salt = salt.encode()
+
+    def pseudonym(self, field: str, value: str) -> str:
+        digest = hmac.new(self.salt, value.encode(), hashlib.sha256).hexdigest()
+        if 'email' in field:
+            return f"{digest[:16]}@replay.invalid"
+        if 'mobile' in field:
+            return f"{int(digest[:12], 16) % 10 ** 10:010d}"
+        return f"user-{digest[:8]}"
+
+    def __call__(self, value, field: str = ''):
+        if isinstance(value, dict):
+            return {key: self(item, str(key).lower()) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self(item, field) for item in value]
+        if field in self.redact and value is not None:
+            return REDACTED
+        if field in self.pseudonymize and isinstance(value, str):
+            return self.pseudonym(field, value)
+        return value
+
+
+def sanitizer_from_config(config) -> Sanitizer:
+    return Sanitizer(config.get('TRAFFIC_CAPTURE_REDACT_FIELDS', ()),
+                     config.get('TRAFFIC_CAPTURE_PSEUDONYMIZE_FIELDS', ()),
+                     config.get('TRAFFIC_CAPTURE_SALT') or '')
+
+
+class TrafficRecorder:
+    def __init__(self, app=None):
+        self.path = None
+        self.logger = logging.getLogger('expense_manager.traffic')
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.path = app.config.get('TRAFFIC_CAPTURE_FILE')
+        if not self.path:
+            return
+        if not app.config.get('TRAFFIC_CAPTURE_SALT'):
+            # Without a secret salt, pseudonyms are plain hashes anyone can reverse by guessing
+            app.logger.error("TRAFFIC_CAPTURE_FILE is set but TRAFFIC_CAPTURE_SALT is empty; capture disabled")
+            self.path = None
+            return
+
+        self.sample_rate = app.config.get('TRAFFIC_CAPTURE_SAMPLE_RATE', 1.0)
+        self.exclude = tuple(app.config.get('TRAFFIC_CAPTURE_EXCLUDE_PATHS', ()))
+        self.max_body = app.config.get('TRAFFIC_CAPTURE_MAX_BODY_BYTES', 64 * 1024)
+        self.sanitize = sanitizer_from_config(app.config)
+
+        if not self.logger.handlers:
+            handler = RotatingFileHandler(
+                self.path,
+                maxBytes=app.config.get('TRAFFIC_CAPTURE_MAX_BYTES', 100 * 1024 * 1024),
+                backupCount=app.config.get('TRAFFIC_CAPTURE_BACKUPS', 5)
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+
+        # First, so requests turned away by admission control are captured too
+        app.before_request_funcs.setdefault(None, []).insert(0, self._start)
+        # Registered after the compressor, so it runs on the uncompressed body
+        app.after_request(self._record)
+        app.extensions['traffic_capture'] = self
+
+    def _start(self):
+        if (request.headers.get(REPLAY_HEADER) or request.path.startswith(self.exclude)
+                or random.random() >= self.sample_rate):
+            return
+        g.traffic_started = time.time()
+        g.traffic_perf = time.perf_counter()
+
+    @staticmethod
+    def _identity():
+        try:
+            from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+            verify_jwt_in_request(optional=True)
+            return get_jwt_identity()
+        except Exception:
+            return None
+
+    def _response_fields(self, response) -> Dict:
+        if response.is_streamed or (response.content_length or 0) > self.max_body:
+            return {}
+        if response.is_json:
+            return {'response': self.sanitize(response.get_json(silent=True))}
+        return {'response_sha256': hashlib.sha256(response.get_data()).hexdigest()}
+
+    def _record(self, response):
+        started = g.pop('traffic_started', None)
+        if started is None:
+            return response
+        duration_ms = (time.perf_counter() - g.pop('traffic_perf')) * 1000
+
+        body = request.get_json(silent=True) if request.is_json else None
+        record = {
+            'ts': started,
+            'method': request.method,
+            'route': request.url_rule.rule if request.url_rule else None,
+            'path': request.path,
+            'query': self.sanitize(request.args.to_dict(flat=False)),
+            'identity': self._identity(),
+            'body': self.sanitize(body),
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 3),
+            **self._response_fields(response)
+        }
+        if body is None and request.content_length:
+            record['body_omitted'] = request.mimetype
+        self.logger.info(json.dumps(record, default=str))
+        return response
+
+
+def load_capture(paths: Iterable[str]) -> List[Dict]:
+    """Every record in the capture files, in request start order."""
+    records = []
+    for path in paths:
+        with open(path) as capture:
+            records.extend(json.loads(line) for line in capture if line.strip())
+    return sorted(records, key=lambda record: record['ts'])
+
+
+def diff_json(recorded, replayed, ignore=DEFAULT_IGNORE_FIELDS, path: str = '$') -> List[str]:
+    """Paths where two JSON values differ, skipping keys in `ignore`."""
+    if isinstance(recorded, dict) and isinstance(replayed, dict):
+        diffs = []
+        for key in sorted(set(recorded) | set(replayed)):
+            if key in ignore:
+                continue
+            if key not in replayed:
+                diffs.append(f"{path}.{key}: missing")
+            elif key not in recorded:
+                diffs.append(f"{path}.{key}: unexpected")
+            else:
+                diffs.extend(diff_json(recorded[key], replayed[key], ignore, f"{path}.{key}"))
+        return diffs
+    if isinstance(recorded, list) and isinstance(replayed, list):
+        diffs = [] if len(recorded) == len(replayed) else [
+            f"{path}: {len(recorded)} item(s) != {len(replayed)}"
+        ]
+        for i, (old, new) in enumerate(zip(recorded, replayed)):
+            diffs.extend(diff_json(old, new, ignore, f"{path}[{i}]"))
+        return diffs
+    return [] if recorded == replayed else [f"{path}: {recorded!r} != {replayed!r}"]
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(results: List[Dict]) -> List[Dict]:
+    """Latency distribution and mismatch counts per (method, route)."""
+    groups: Dict[tuple, List[Dict]] = {}
+    for result in results:
+        groups.setdefault((result['method'], result['route']), []).append(result)
+
+    summary = []
+    for (method, route), group in sorted(groups.items(), key=lambda item: -len(item[1])):
+        latencies = sorted(result['latency_ms'] for result in group)
+        recorded = sorted(result['recorded_ms'] for result in group if result['recorded_ms'] is not None)
+        summary.append({
+            'method': method,
+            'route': route,
+            'count': len(group),
+            'p50_ms': _percentile(latencies, 50),
+            'p90_ms': _percentile(latencies, 90),
+            'p99_ms': _percentile(latencies, 99),
+            'max_ms': latencies[-1],
+            'recorded_p50_ms': _percentile(recorded, 50) if recorded else None,
+            'status_mismatches': sum(result['status'] != result['recorded_status'] for result in group),
+            'body_mismatches': sum(bool(result['diffs']) for result in group)
+        })
+    return summary
+
+
+class _InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method, path, query, body, headers):
+        response = self.client.open(path, method=method, query_string=query, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True) if response.is_json else None
+
+
+class _HttpClient:
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, method, path, query, body, headers):
+        url = self.base_url + path
+        if query:
+            url += '?' + urllib.parse.urlencode(query, doseq=True)
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers = {**headers, 'Content-Type': 'application/json'}
+        req = urllib.request.Request(url, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req) as response:
+                status, content_type, payload = response.status, response.headers.get_content_type(), response.read()
+        except urllib.error.HTTPError as e:
+            status, content_type, payload = e.code, e.headers.get_content_type(), e.read()
+        if content_type != 'application/json':
+            return status, None
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+
+def replay(app, records: List[Dict], speed: float = 1.0, base_url: Optional[str] = None,
+           ignore: Iterable[str] = DEFAULT_IGNORE_FIELDS) -> List[Dict]:
+    """Re-issue captured requests one at a time, in order, and compare the responses.
+
+    Tokens are signed with this app's JWT settings. A remote `base_url` must
+    share them.
+    """
+    from flask_jwt_extended import create_access_token
+
+    client = _HttpClient(base_url) if base_url else _InProcessClient(app)
+    sanitize = sanitizer_from_config(app.config)
+    ignore = frozenset(ignore)
+    tokens = {}
+    results = []
+    if not records:
+        return results
+
+    first_ts = records[0]['ts']
+    started = time.perf_counter()
+    for record in records:
+        if speed > 0:
+            wait = (record['ts'] - first_ts) / speed - (time.perf_counter() - started)
+            if wait > 0:
+                time.sleep(wait)
+
+        headers = {REPLAY_HEADER: '1'}
+        identity = record.get('identity')
+        if identity is not None:
+            if identity not in tokens:
+                with app.app_context():
+                    tokens[identity] = create_access_token(identity=identity)
+            headers['Authorization'] = f"Bearer {tokens[identity]}"
+
+        sent = time.perf_counter()
+        status, body = client.send(record['method'], record['path'], record.get('query') or {},
+                                   record.get('body'), headers)
+        latency_ms = (time.perf_counter() - sent) * 1000
+
+        diffs = []
+        if 'response' in record:
+            diffs = diff_json(record['response'], sanitize(body), ignore)
+        results.append({
+            'method': record['method'],
+            'route': record.get('route') or record['path'],
+            'path': record['path'],
+            'recorded_status': record['status'],
+            'status': status,
+            'recorded_ms': record.get('duration_ms'),
+            'latency_ms': round(latency_ms, 3),
+            'diffs': diffs
+        })
+    return results
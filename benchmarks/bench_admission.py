@@ -0,0 +1,68 @@
+"""Tail latency of a cheap endpoint while heavy endpoints are hammered.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_admission
+    DATABASE_URL=postgresql://... ADMISSION_ENABLED=false python -m benchmarks.bench_admission
+
+BENCH_HAMMER_THREADS threads loop on /api/expenses/list while one thread
+measures GET /api/users/<id>. Compare the p50/p99 of the cheap endpoint and
+the heavy endpoint status mix with admission control on and off.
+"""
+import statistics
+import threading
+import time
+from collections import Counter
+
+from flask_jwt_extended import create_access_token
+
+from app import db
+from benchmarks.common import bench_app, seed_users, env_int
+
+
+def main():
+    app = bench_app()
+    app.config['JWT_SECRET_KEY'] = app.config.get('JWT_SECRET_KEY') or 'bench-secret'
+    hammer_threads = env_int('BENCH_HAMMER_THREADS', 16)
+    duration = env_int('BENCH_SECONDS', 10)
+
+    with app.app_context():
+        user_ids = seed_users(hammer_threads + 1, prefix='admission')
+        db.session.remove()
+    with app.test_request_context():
+        tokens = {user_id: create_access_token(identity=user_id) for user_id in user_ids}
+
+    stop = threading.Event()
+    heavy_status = Counter()
+
+    def hammer(user_id):
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {tokens[user_id]}'}
+        while not stop.is_set():
+            heavy_status[client.get('/api/expenses/list', headers=headers).status_code] += 1
+
+    threads = [threading.Thread(target=hammer, args=(user_id,)) for user_id in user_ids[1:]]
+    for thread in threads:
+        thread.start()
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {tokens[user_ids[0]]}'}
+    latencies = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        client.get(f'/api/users/{user_ids[0]}', headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    print(f"admission enabled: {app.config['ADMISSION_ENABLED']}")
+    print(f"cheap endpoint: n={len(latencies)} p50={statistics.median(latencies):.2f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99) - 1]:.2f}ms")
+    print(f"heavy endpoint status counts: {dict(heavy_status)}")
+
+
+if __name__ == '__main__':
+    main()
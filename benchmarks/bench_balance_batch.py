@@ -0,0 +1,80 @@
+"""Batched balance totals vs one calculate_user_balance call per user.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_balance_batch
+
+Seeds BENCH_USERS users with BENCH_EXPENSES random expenses, then for each
+batch size in BENCH_BATCH_SIZES reports SQL statement count and latency of
+calculate_user_balances against a per-user loop. Exits non-zero if the batched
+statement count changes with batch size.
+"""
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+from app.services.balance_sheet_service import BalanceSheetService
+from app.services.expense_service import ExpenseService
+from benchmarks.common import bench_app, seed_users, env_int
+
+
+@contextmanager
+def count_statements():
+    counter = {'statements': 0}
+
+    def before_cursor_execute(*args):
+        counter['statements'] += 1
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def main():
+    app = bench_app()
+    user_count = env_int('BENCH_USERS', 200)
+    batch_sizes = [int(size) for size in os.getenv('BENCH_BATCH_SIZES', '1,10,50,200').split(',')]
+
+    with app.test_request_context():
+        user_ids = seed_users(user_count, prefix=f'batch{int(time.time())}')
+        rng = random.Random(0)
+        for _ in range(env_int('BENCH_EXPENSES', 2000)):
+            participants = rng.sample(user_ids, rng.randint(2, 6))
+            ExpenseService.create_expense(participants[0], 'benchmark', rng.randint(10, 500),
+                                          'equal', {str(uid): {} for uid in participants})
+        db.session.commit()
+
+        print(f"{'batch':>6} {'batched stmts':>14} {'batched ms':>11} {'loop stmts':>11} {'loop ms':>9}")
+        batched_counts = set()
+        for size in batch_sizes:
+            batch = user_ids[:size]
+            db.session.expire_all()
+            with count_statements() as batched:
+                start = time.perf_counter()
+                totals = BalanceSheetService.calculate_user_balances(batch)
+                batched_ms = (time.perf_counter() - start) * 1000
+            batched_counts.add(batched['statements'])
+
+            db.session.expire_all()
+            with count_statements() as loop:
+                start = time.perf_counter()
+                for user_id in batch:
+                    balance = BalanceSheetService.calculate_user_balance(user_id, projection='summary')
+                    assert balance.net_balance == totals[user_id]['net_balance'], user_id
+                loop_ms = (time.perf_counter() - start) * 1000
+
+            print(f"{size:>6} {batched['statements']:>14} {batched_ms:>11.1f} "
+                  f"{loop['statements']:>11} {loop_ms:>9.1f}")
+
+    if len(batched_counts) != 1:
+        sys.exit(f"Batched statement count varies with batch size: {sorted(batched_counts)}")
+
+
+if __name__ == '__main__':
+    main()
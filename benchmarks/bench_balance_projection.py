@@ -0,0 +1,58 @@
+"""Latency and peak memory of calculate_user_balance per projection.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_balance_projection
+
+Seeds one user with BENCH_EXPENSES paid expenses (default 100k), each shared
+with a second user, then measures every projection with tracemalloc.
+"""
+import time
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+
+from app import db
+from app.models.expense import Expense, ExpenseParticipation, SplitMethod
+from app.services.balance_sheet_service import BalanceSheetService
+from benchmarks.common import bench_app, seed_users, env_int
+
+
+def seed_expenses(creator_id, other_id, count, batch=10000):
+    """Bulk insert `count` expenses split evenly between two users."""
+    first_id = (db.session.query(db.func.max(Expense.id)).scalar() or 0) + 1
+    for start in range(0, count, batch):
+        ids = range(first_id + start, first_id + min(start + batch, count))
+        db.session.execute(Expense.__table__.insert(), [
+            {'id': expense_id, 'description': 'benchmark', 'amount': Decimal('20.00'),
+             'date': datetime.utcnow(), 'split_method': SplitMethod.EQUAL, 'creator_id': creator_id}
+            for expense_id in ids
+        ])
+        db.session.execute(ExpenseParticipation.__table__.insert(), [
+            {'expense_id': expense_id, 'user_id': user_id, 'share_amount': Decimal('10.00')}
+            for expense_id in ids for user_id in (creator_id, other_id)
+        ])
+    db.session.commit()
+
+
+def main():
+    app = bench_app()
+    count = env_int('BENCH_EXPENSES', 100000)
+
+    with app.app_context():
+        creator_id, other_id = seed_users(2, prefix='projection')
+        seed_expenses(creator_id, other_id, count)
+
+        print(f"{count} expenses")
+        print(f"{'projection':>10} {'ms':>10} {'peak MiB':>10}")
+        for projection in BalanceSheetService.PROJECTIONS:
+            db.session.expire_all()
+            tracemalloc.start()
+            start = time.perf_counter()
+            BalanceSheetService.calculate_user_balance(creator_id, projection=projection)
+            elapsed = (time.perf_counter() - start) * 1000
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{projection:>10} {elapsed:>10.1f} {peak / 2 ** 20:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
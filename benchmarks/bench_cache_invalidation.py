@@ -0,0 +1,133 @@
+"""Cross-process cache invalidation over LISTEN/NOTIFY (PostgreSQL).
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_cache_invalidation
+
+Starts BENCH_WORKERS processes that each create the app with CACHE_ENABLED,
+cache one user's balance and wait for their listener to connect. The parent
+then writes BENCH_ROUNDS expenses for that user. Each worker reports when
+its entry was evicted, and the script prints the commit-to-eviction latency.
+Halfway through it terminates every listener connection
+(pg_terminate_backend) and checks that the workers reconnect and that
+invalidation still reaches them afterwards. Exits non-zero if a worker
+misses an invalidation.
+"""
+import multiprocessing
+import os
+import queue
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+os.environ['CACHE_ENABLED'] = 'true'
+
+from app import db  # noqa: E402
+from app.utils.invalidation import LISTENER_NAME  # noqa: E402
+from benchmarks.common import bench_app, seed_users, env_int  # noqa: E402
+
+TIMEOUT = 15.0
+
+
+def _wait(predicate, timeout=TIMEOUT, interval=0.001):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(interval)
+    return True
+
+
+def worker(user_id, rounds, ready, evicted):
+    from app import create_app
+    from app.services.balance_sheet_service import BalanceSheetService
+
+    app = create_app()
+    with app.app_context():
+        bus = app.extensions['cache_invalidation']
+        key = (user_id, 'summary')
+        for round_no in range(rounds):
+            # The first call starts the listener, which clears the cache on connect
+            BalanceSheetService.calculate_user_balance(user_id, 'summary')
+            if not _wait(lambda: bus.connected):
+                ready.put((os.getpid(), round_no, False))
+                return
+            BalanceSheetService.calculate_user_balance(user_id, 'summary')
+            db.session.remove()
+            cache = bus.cache('user_balance')
+            ready.put((os.getpid(), round_no, key in cache))
+            if not _wait(lambda: key not in cache, timeout=60):
+                return
+            evicted.put((os.getpid(), round_no, time.time()))
+
+
+def main():
+    workers = env_int('BENCH_WORKERS', 4)
+    rounds = env_int('BENCH_ROUNDS', 20)
+
+    app = bench_app()
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            sys.exit("LISTEN/NOTIFY invalidation needs PostgreSQL")
+        creator, user_id = seed_users(2, prefix=f'invalidate{int(time.time())}')
+
+        context = multiprocessing.get_context('spawn')
+        ready, evicted = context.Queue(), context.Queue()
+        processes = [context.Process(target=worker, args=(user_id, rounds, ready, evicted), daemon=True)
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+
+        from app.services.expense_service import ExpenseService
+
+        latencies, failures = [], []
+        for round_no in range(rounds):
+            try:
+                states = [ready.get(timeout=60) for _ in range(workers)]
+            except queue.Empty:
+                sys.exit(f"Round {round_no}: workers did not get ready")
+            if not all(cached for _, _, cached in states):
+                sys.exit(f"Round {round_no}: a worker has no cached entry or listener")
+
+            if round_no == rounds // 2:
+                # Drop every listener; they must reconnect (clearing their caches)
+                db.session.execute(text(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE application_name = :name"
+                ), {'name': LISTENER_NAME})
+                db.session.commit()
+                reconnected = 0
+                try:
+                    for _ in range(workers):
+                        evicted.get(timeout=60)
+                        reconnected += 1
+                except queue.Empty:
+                    failures.append(f"round {round_no}: {workers - reconnected} worker(s) never reconnected")
+                print(f"round {round_no}: {reconnected}/{workers} listener(s) reconnected and cleared")
+                continue
+
+            ExpenseService.create_expense(creator, 'invalidate', 10, 'equal',
+                                          {str(creator): {}, str(user_id): {}})
+            committed_at = time.time()
+            db.session.commit()
+            for _ in range(workers):
+                try:
+                    _, _, evicted_at = evicted.get(timeout=TIMEOUT)
+                    latencies.append((evicted_at - committed_at) * 1000)
+                except queue.Empty:
+                    failures.append(f"round {round_no}: a worker kept a stale entry")
+                    break
+
+        for process in processes:
+            process.terminate()
+
+    if latencies:
+        latencies.sort()
+        print(f"{len(latencies)} evictions, commit -> eviction ms: "
+              f"p50={statistics.median(latencies):.2f} "
+              f"p99={latencies[int(len(latencies) * 0.99) - 1]:.2f} max={latencies[-1]:.2f}")
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == '__main__':
+    main()
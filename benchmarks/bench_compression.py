@@ -0,0 +1,70 @@
+"""CPU cost vs bytes saved for each response encoding.
+
+    python -m benchmarks.bench_compression
+
+Builds expense-list JSON and balance-sheet CSV bodies at common sizes (1 KB to
+1 MB) and reports compressed size, ratio and mean compression time per
+encoding and level. BENCH_COMPRESSION_REPEAT sets the runs per cell.
+"""
+import csv
+import io
+import json
+import random
+import time
+
+from app.utils.compression import ENCODERS, compress_bytes
+from benchmarks.common import env_int
+
+SIZES = [1024, 10 * 1024, 100 * 1024, 1024 * 1024]
+LEVELS = {'gzip': [1, 6, 9], 'br': [1, 4, 6, 11], 'zstd': [1, 3, 9, 19]}
+
+
+def _expenses(count):
+    rng = random.Random(0)
+    return [{
+        'id': i,
+        'description': rng.choice(['Dinner', 'Groceries', 'Taxi', 'Rent', 'Movie night']) + f' #{i}',
+        'amount': round(rng.uniform(5, 500), 2),
+        'date': f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00',
+        'split_method': rng.choice(['EQUAL', 'EXACT', 'PERCENTAGE']),
+        'share_amount': round(rng.uniform(1, 250), 2)
+    } for i in range(count)]
+
+
+def json_payload(size):
+    rows = _expenses(size // 100 + 1)
+    body = json.dumps({'expenses_involved': rows}, indent=4).encode()
+    while len(body) > size and len(rows) > 1:
+        rows = rows[:-max(1, len(rows) // 20)]
+        body = json.dumps({'expenses_involved': rows}, indent=4).encode()
+    return body
+
+
+def csv_payload(size):
+    rows = _expenses(size // 60 + 1)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['Expense ID', 'Description', 'Amount', 'Date', 'Split Method'])
+    for row in rows:
+        writer.writerow([row['id'], row['description'], row['amount'], row['date'], row['split_method']])
+    return buffer.getvalue().encode()[:size]
+
+
+def main():
+    repeat = env_int('BENCH_COMPRESSION_REPEAT', 20)
+    print(f"{'payload':>8} {'bytes':>8} {'encoding':>9} {'level':>5} {'out':>8} {'ratio':>6} {'us':>10} {'MB/s':>8}")
+    for kind, build in (('json', json_payload), ('csv', csv_payload)):
+        for size in SIZES:
+            body = build(size)
+            for encoding in ENCODERS:
+                for level in LEVELS[encoding]:
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        out = compress_bytes(encoding, body, level)
+                    elapsed = (time.perf_counter() - start) / repeat
+                    print(f"{kind:>8} {len(body):>8} {encoding:>9} {level:>5} {len(out):>8} "
+                          f"{len(body) / len(out):>6.1f} {elapsed * 1e6:>10.1f} {len(body) / elapsed / 1e6:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Expense write throughput against participant count.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_expense_post
+
+Runs the ExpenseResource.post write path (ExpenseService.create_expense plus
+commit) and reports expenses/sec for each participant count.
+"""
+import time
+
+from app import db
+from app.services.expense_service import ExpenseService
+from benchmarks.common import bench_app, seed_users, env_int
+
+PARTICIPANT_COUNTS = (2, 5, 10, 25, 50, 100)
+
+
+def main():
+    app = bench_app()
+    iterations = env_int('BENCH_ITERATIONS', 200)
+
+    with app.app_context():
+        user_ids = seed_users(max(PARTICIPANT_COUNTS), prefix='post')
+
+        print(f"{'participants':>12} {'expenses/sec':>14} {'ms/expense':>12}")
+        for count in PARTICIPANT_COUNTS:
+            participants = {user_id: {} for user_id in user_ids[:count]}
+            start = time.perf_counter()
+            for _ in range(iterations):
+                ExpenseService.create_expense(
+                    creator_id=user_ids[0],
+                    description='benchmark',
+                    amount='1000.00',
+                    split_method='equal',
+                    participants=participants
+                )
+                db.session.commit()
+            elapsed = time.perf_counter() - start
+            print(f"{count:>12} {iterations / elapsed:>14.1f} {elapsed * 1000 / iterations:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Per-query latency and CPU for the hot query set.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_hot_queries
+
+Runs each hot query BENCH_ITERATIONS times per variant:
+
+* orm: the legacy ``session.query(...)`` form the code used before, with the
+  archive's carried-forward total read separately
+* lambda: the cached lambda statement in HotQueries
+* prepared: the same, with PREPARE/EXECUTE (PostgreSQL + psycopg2 only)
+
+It reports median and p99 wall time per call and process CPU time per call.
+CPU time covers only the Python side (statement building, compilation,
+result processing), not the server's parse and plan. Those show up in the
+wall time.
+"""
+import os
+import statistics
+import time
+
+os.environ.setdefault('PREPARED_STATEMENTS_ENABLED', 'true')
+
+from sqlalchemy import func  # noqa: E402
+
+from app import db, prepared  # noqa: E402
+from app.models.archive import CarriedBalance  # noqa: E402
+from app.models.expense import Expense, ExpenseParticipation  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.expense_service import ExpenseService  # noqa: E402
+from app.services.hot_queries import HotQueries  # noqa: E402
+from benchmarks.common import bench_app, seed_users, env_int  # noqa: E402
+
+
+def legacy_carried(user_id):
+    return CarriedBalance.query.get(user_id)
+
+
+def legacy_paid_total(user_id):
+    carried = legacy_carried(user_id)
+    return db.session.query(func.coalesce(func.sum(Expense.amount), 0)).filter(
+        Expense.creator_id == user_id
+    ).scalar() + (carried.total_paid if carried else 0)
+
+
+def legacy_owed_total(user_id):
+    carried = legacy_carried(user_id)
+    return db.session.query(func.coalesce(func.sum(ExpenseParticipation.share_amount), 0)).filter(
+        ExpenseParticipation.user_id == user_id
+    ).scalar() + (carried.total_owed if carried else 0)
+
+
+def legacy_user_by_email(email):
+    return User.query.filter_by(email=email).first()
+
+
+def measure(fn, args, iterations):
+    for arg in args[:50]:
+        fn(arg)
+    timings = []
+    cpu_start = time.process_time()
+    for i in range(iterations):
+        arg = args[i % len(args)]
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    cpu = time.process_time() - cpu_start
+    timings.sort()
+    return {
+        'p50_us': statistics.median(timings) * 1e6,
+        'p99_us': timings[int(len(timings) * 0.99) - 1] * 1e6,
+        'cpu_us': cpu / iterations * 1e6
+    }
+
+
+def main():
+    iterations = env_int('BENCH_ITERATIONS', 5000)
+    app = bench_app()
+    with app.app_context():
+        prefix = f'hot{int(time.time())}'
+        user_ids = seed_users(env_int('BENCH_USERS', 200), prefix=prefix)
+        for i, user_id in enumerate(user_ids):
+            other = user_ids[(i + 1) % len(user_ids)]
+            ExpenseService.create_expense(user_id, 'bench', 30, 'equal', {str(user_id): {}, str(other): {}})
+        db.session.commit()
+        emails = [f'{prefix}{i}@example.com' for i in range(len(user_ids))]
+
+        cases = [
+            ('paid_total', legacy_paid_total, HotQueries.paid_total, user_ids),
+            ('owed_total', legacy_owed_total, HotQueries.owed_total, user_ids),
+            ('user_by_email', legacy_user_by_email, HotQueries.user_by_email, emails),
+        ]
+        can_prepare = db.engine.dialect.name == 'postgresql' and db.engine.dialect.driver == 'psycopg2'
+        enabled = prepared.enabled
+
+        print(f"{'query':<15} {'variant':<9} {'p50 us':>9} {'p99 us':>9} {'cpu us':>9}")
+        for name, legacy, hot, args in cases:
+            variants = [('orm', legacy, False), ('lambda', hot, False)]
+            if can_prepare and enabled and name != 'user_by_email':
+                variants.append(('prepared', hot, True))
+            for variant, fn, use_prepared in variants:
+                prepared.enabled = use_prepared
+                result = measure(fn, args, iterations)
+                print(f"{name:<15} {variant:<9} {result['p50_us']:>9.1f} {result['p99_us']:>9.1f} "
+                      f"{result['cpu_us']:>9.1f}")
+                db.session.rollback()
+        prepared.enabled = enabled
+
+
+if __name__ == '__main__':
+    main()
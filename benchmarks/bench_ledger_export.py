@@ -0,0 +1,60 @@
+"""Parquet ledger export against the CSV balance sheet path.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_ledger_export
+
+Seeds BENCH_EXPENSES expenses over BENCH_USERS users, then compares the time
+and output size of LedgerExportService.export_parquet with generating
+generate_balance_sheet_csv for every user.
+"""
+import os
+import random
+import tempfile
+import time
+
+from app import db
+from app.services.balance_sheet_service import BalanceSheetService
+from app.services.expense_service import ExpenseService
+from app.services.ledger_export_service import LedgerExportService
+from benchmarks.common import bench_app, seed_users, env_int
+
+
+def main():
+    app = bench_app()
+    user_count = env_int('BENCH_USERS', 50)
+    expense_count = env_int('BENCH_EXPENSES', 5000)
+
+    with app.test_request_context():
+        user_ids = seed_users(user_count, prefix='export')
+        rng = random.Random(0)
+        for _ in range(expense_count):
+            participants = {user_id: {} for user_id in rng.sample(user_ids, 4)}
+            ExpenseService.create_expense(
+                creator_id=rng.choice(user_ids),
+                description='benchmark',
+                amount=f'{rng.randint(100, 100000) / 100:.2f}',
+                split_method='equal',
+                participants=participants
+            )
+        db.session.commit()
+
+        start = time.perf_counter()
+        csv_bytes = 0
+        for user_id in user_ids:
+            _, csv_data = BalanceSheetService.generate_balance_sheet_csv(user_id)
+            csv_bytes += len(csv_data.encode('utf-8'))
+        csv_elapsed = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'ledger.parquet')
+            start = time.perf_counter()
+            rows = LedgerExportService.export_parquet(path)
+            parquet_elapsed = time.perf_counter() - start
+            parquet_bytes = os.path.getsize(path)
+
+        print(f"{'path':>10} {'seconds':>10} {'bytes':>12}")
+        print(f"{'csv':>10} {csv_elapsed:>10.3f} {csv_bytes:>12}")
+        print(f"{'parquet':>10} {parquet_elapsed:>10.3f} {parquet_bytes:>12}  ({rows} rows)")
+
+
+if __name__ == '__main__':
+    main()
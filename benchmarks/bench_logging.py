@@ -0,0 +1,88 @@
+"""Per-request logging overhead: synchronous StreamHandler vs queue pipeline.
+
+    python -m benchmarks.bench_logging
+
+Each mode logs BENCH_LOG_CALLS records per simulated request to stderr (or
+BENCH_LOG_FILE) from inside a request context and reports the time the
+request thread spends in logging calls. BENCH_SINK_DELAY_US adds a per-write
+delay to imitate a stderr pipe that is slow to drain.
+"""
+import logging
+import os
+import sys
+import time
+
+from flask import Flask
+from flask_log_request_id import RequestID, RequestIDLogFilter
+
+from app.config.config import BaseConfig
+from app.utils.logging_utils import RouteSamplingFilter, start_queue_logging
+from benchmarks.common import env_int
+
+
+class _SlowStream:
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data):
+        time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _target_handler():
+    path = os.getenv('BENCH_LOG_FILE')
+    stream = open(path, 'a') if path else sys.stderr
+    delay = env_int('BENCH_SINK_DELAY_US', 0) / 1e6
+    handler = logging.StreamHandler(_SlowStream(stream, delay) if delay else stream)
+    handler.setFormatter(logging.Formatter(BaseConfig.LOG_FORMAT))
+    return handler
+
+
+def _run(app, logger, requests, calls):
+    """Mean microseconds per request spent inside logging calls."""
+    elapsed = 0.0
+    for _ in range(requests):
+        with app.test_request_context('/api/expenses/list'):
+            start = time.perf_counter()
+            for i in range(calls):
+                logger.info("benchmark record %d", i)
+            elapsed += time.perf_counter() - start
+    return elapsed * 1e6 / requests
+
+
+def main():
+    requests = env_int('BENCH_REQUESTS', 2000)
+    calls = env_int('BENCH_LOG_CALLS', 5)
+    app = Flask(__name__)
+    RequestID(app)
+
+    sync_logger = logging.getLogger('bench.sync')
+    sync_logger.propagate = False
+    sync_handler = _target_handler()
+    sync_handler.addFilter(RequestIDLogFilter())
+    sync_logger.addHandler(sync_handler)
+    sync_logger.setLevel(logging.INFO)
+
+    queue_logger = logging.getLogger('bench.queue')
+    queue_logger.propagate = False
+    queue_handler, listener = start_queue_logging(
+        [_target_handler()], [RequestIDLogFilter(), RouteSamplingFilter({})], level=logging.INFO
+    )
+    queue_logger.addHandler(queue_handler)
+    queue_logger.setLevel(logging.INFO)
+
+    sync_us = _run(app, sync_logger, requests, calls)
+    queue_us = _run(app, queue_logger, requests, calls)
+    listener.stop()
+
+    print(f"{calls} records/request over {requests} requests", file=sys.__stdout__)
+    print(f"sync StreamHandler: {sync_us:8.1f} us/request", file=sys.__stdout__)
+    print(f"queue pipeline:     {queue_us:8.1f} us/request", file=sys.__stdout__)
+
+
+if __name__ == '__main__':
+    main()
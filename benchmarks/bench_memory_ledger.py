@@ -0,0 +1,99 @@
+"""In-memory ledger: memory per million users and group balance latency.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_memory_ledger
+
+Part one needs no database: it builds a BENCH_LEDGER_USERS-user ledger and
+reports bytes per million users and the cost of the vectorised net balance
+and of applying a BENCH_EVENT_BATCH-event journal batch. Part two seeds
+BENCH_USERS users with BENCH_EXPENSES expenses and compares
+group_net_balances from SQL against the ledger (which still checks the
+journal for new events on every read). Exits non-zero if the two disagree.
+"""
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from app import db
+from app.services.balance_sheet_service import BalanceSheetService
+from app.services.expense_service import ExpenseService
+from app.utils.memory_ledger import MemoryLedger, _LedgerState
+from benchmarks.common import bench_app, seed_users, env_int
+
+
+def best_ms(fn, repeat: int = 20) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def synthetic():
+    users = env_int('BENCH_LEDGER_USERS', 1_000_000)
+    batch = env_int('BENCH_EVENT_BATCH', 1000)
+    rng = np.random.default_rng(0)
+
+    ledger = MemoryLedger()
+    ledger._state = _LedgerState(
+        ids=np.arange(1, users + 1, dtype=np.int64),
+        names=[f'user{i}' for i in range(users)],
+        paid=rng.integers(0, 10 ** 7, users, dtype=np.int64),
+        owed=rng.integers(0, 10 ** 7, users, dtype=np.int64),
+        watermark=0
+    )
+    usage = ledger.memory_usage()
+    per_million = 1_000_000 / users / 2 ** 20
+    print(f"users: {users}")
+    print(f"arrays: {usage['array_bytes'] * per_million:.1f} MiB per million users")
+    print(f"names:  {usage['name_bytes'] * per_million:.1f} MiB per million users")
+
+    state = ledger._state
+    print(f"net balance vector: {best_ms(lambda: state.paid - state.owed):.3f} ms")
+
+    event_users = rng.integers(1, users + 1, batch, dtype=np.int64)
+    deltas = rng.integers(1, 10 ** 4, batch, dtype=np.int64)
+
+    def apply_batch():
+        np.add.at(state.owed, np.searchsorted(state.ids, event_users), deltas)
+    print(f"apply {batch} events: {best_ms(apply_batch):.3f} ms")
+
+
+def against_sql():
+    app = bench_app()
+    app.config['MEMORY_LEDGER_ENABLED'] = True
+    ledger = MemoryLedger()
+    ledger.init_app(app)
+
+    with app.test_request_context():
+        user_ids = seed_users(env_int('BENCH_USERS', 2000), prefix=f'memledger{int(time.time())}')
+        rng = random.Random(0)
+        for _ in range(env_int('BENCH_EXPENSES', 5000)):
+            participants = rng.sample(user_ids, rng.randint(2, 6))
+            ExpenseService.create_expense(participants[0], 'benchmark', rng.randint(10, 500),
+                                          'equal', {str(uid): {} for uid in participants})
+        db.session.commit()
+
+        start = time.perf_counter()
+        ledger.load()
+        print(f"load: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        from_memory = BalanceSheetService.group_net_balances()
+        app.extensions.pop('memory_ledger')
+        from_sql = BalanceSheetService.group_net_balances()
+        sql_ms = best_ms(BalanceSheetService.group_net_balances, repeat=5)
+        app.extensions['memory_ledger'] = ledger
+        memory_ms = best_ms(BalanceSheetService.group_net_balances)
+        print(f"group balances: sql {sql_ms:.1f} ms, memory {memory_ms:.1f} ms "
+              f"(of which journal check {best_ms(ledger.sync):.2f} ms) for {len(from_sql)} users")
+
+    if from_memory != from_sql:
+        sys.exit("In-memory balances differ from SQL")
+
+
+if __name__ == '__main__':
+    synthetic()
+    against_sql()
@@ -0,0 +1,117 @@
+"""Partition pruning on BalanceSheetService's per-user queries (PostgreSQL).
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_partition_pruning
+    flask partitions convert --strategy hash      # or range
+    DATABASE_URL=postgresql://... BENCH_SEED=0 python -m benchmarks.bench_partition_pruning
+
+Seeds BENCH_USERS users and BENCH_EXPENSES expenses spread over the last
+BENCH_MONTHS months (skip with BENCH_SEED=0). Then it captures the
+statements calculate_user_balance issues for the busiest user: the summary,
+all involved expenses, and involved expenses of the last 30 days. Each one
+is re-run under EXPLAIN (ANALYZE, FORMAT JSON), and the script reports how
+many expense_participation partitions the plan touched and how long it took.
+On a partitioned table it exits non-zero if a per-user plan under hash, or a
+date-ranged plan under range, touches every partition.
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, text
+
+from app import db
+from app.models.expense import ExpenseParticipation
+from app.services.balance_sheet_service import BalanceSheetService
+from app.services.expense_service import ExpenseService
+from app.services.partition_service import PartitionService, TABLE
+from benchmarks.common import bench_app, seed_users, env_int
+
+
+def seed():
+    user_ids = seed_users(env_int('BENCH_USERS', 2000), prefix=f'partition{int(time.time())}')
+    rng = random.Random(0)
+    for _ in range(env_int('BENCH_EXPENSES', 50000)):
+        participants = rng.sample(user_ids, rng.randint(2, 6))
+        ExpenseService.create_expense(participants[0], 'benchmark', rng.randint(10, 500),
+                                      'equal', {str(uid): {} for uid in participants})
+    db.session.commit()
+
+    months = env_int('BENCH_MONTHS', 24)
+    db.session.execute(text(
+        "UPDATE expense SET date = now() - (id % :months) * interval '30 days'"
+    ), {'months': months})
+    db.session.execute(text(
+        f"UPDATE {TABLE} p SET expense_date = e.date FROM expense e WHERE e.id = p.expense_id"
+    ))
+    db.session.commit()
+    db.session.execute(text(f"ANALYZE {TABLE}"))
+    db.session.commit()
+
+
+def capture(fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if TABLE in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def plan_partitions(node, found):
+    relation = node.get('Relation Name', '')
+    if relation.startswith(TABLE):
+        found.add(relation)
+    for child in node.get('Plans', []):
+        plan_partitions(child, found)
+    return found
+
+
+def main():
+    app = bench_app()
+    with app.test_request_context():
+        if db.engine.dialect.name != 'postgresql':
+            sys.exit("Partition pruning needs PostgreSQL")
+        if env_int('BENCH_SEED', 1):
+            seed()
+
+        status = PartitionService.status()
+        total = len(status['partitions'])
+        strategy = status['strategy'] or 'none'
+        user_id = db.session.query(ExpenseParticipation.user_id).group_by(
+            ExpenseParticipation.user_id
+        ).order_by(func.count().desc()).limit(1).scalar()
+        print(f"strategy: {strategy}, partitions: {total}, user: {user_id}")
+
+        since = datetime.utcnow() - timedelta(days=30)
+        cases = [
+            ('summary', lambda: BalanceSheetService.calculate_user_balance(user_id, 'summary'), 'hash'),
+            ('involved', lambda: BalanceSheetService.calculate_user_balance(user_id, 'involved'), 'hash'),
+            ('involved 30d', lambda: BalanceSheetService.calculate_user_balance(
+                user_id, 'involved', since=since), strategy),
+        ]
+
+        failures = []
+        print(f"{'query':<14} {'partitions':>11} {'ms':>9}")
+        for label, fn, prunes_under in cases:
+            for statement, parameters in capture(fn):
+                plan = db.session.connection().exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters
+                ).scalar()[0]
+                touched = plan_partitions(plan['Plan'], set())
+                print(f"{label:<14} {len(touched):>5} / {total:<4} {plan['Execution Time']:>9.2f}")
+                if total and strategy == prunes_under and len(touched) >= total:
+                    failures.append(label)
+
+    if failures:
+        sys.exit(f"No partition pruning for: {', '.join(failures)}")
+
+
+if __name__ == '__main__':
+    main()
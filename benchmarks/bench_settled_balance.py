@@ -0,0 +1,68 @@
+"""Balance totals before and after settling up.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_settled_balance
+
+Seeds two users with BENCH_EXPENSES shared expenses (default 100k) and times
+calculate_user_balances for them, which sums their whole history. The debtor
+then pays the creditor back in full, BENCH_TAIL more expenses are added (default
+100), and the same call is timed again: it now starts from the settlement's
+running totals and reads only the journal events written since. Exits non-zero
+if those totals differ from a full recomputation.
+"""
+import statistics
+import sys
+import time
+
+from app import db
+from app.services.balance_sheet_service import BalanceSheetService
+from app.services.expense_journal_service import ExpenseJournalService
+from app.services.expense_service import ExpenseService
+from app.services.settlement_service import SettlementService
+from benchmarks.bench_balance_projection import seed_expenses
+from benchmarks.common import bench_app, seed_users, env_int
+
+
+def measure(user_ids, runs):
+    timings = []
+    for _ in range(runs):
+        db.session.expire_all()
+        start = time.perf_counter()
+        totals = BalanceSheetService.calculate_user_balances(user_ids)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), totals
+
+
+def main():
+    app = bench_app()
+    count = env_int('BENCH_EXPENSES', 100000)
+    tail = env_int('BENCH_TAIL', 100)
+    runs = env_int('BENCH_RUNS', 20)
+
+    with app.app_context():
+        creator_id, other_id = seed_users(2, prefix=f'settled{int(time.time())}')
+        user_ids = [creator_id, other_id]
+        seed_expenses(creator_id, other_id, count)
+
+        before_ms, totals = measure(user_ids, runs)
+        SettlementService.record_settlement(other_id, creator_id, -totals[other_id]['net_balance'])
+        db.session.commit()
+        for _ in range(tail):
+            ExpenseService.create_expense(creator_id, 'tail', 20, 'equal',
+                                          {str(creator_id): {}, str(other_id): {}})
+        db.session.commit()
+        after_ms, totals = measure(user_ids, runs)
+
+        print(f"{count} expenses, then a settlement and {tail} more")
+        print(f"full history:     {before_ms:>8.2f} ms")
+        print(f"settlement+tail:  {after_ms:>8.2f} ms")
+
+        expected = ExpenseJournalService.recompute_balances(user_ids)
+        wrong = [user_id for user_id in user_ids
+                 if (totals[user_id]['total_paid'], totals[user_id]['total_owed'])
+                 != (expected[user_id]['total_paid'], expected[user_id]['total_owed'])]
+        if wrong:
+            sys.exit(f"Settled totals differ from a full recomputation for user(s) {wrong}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Greedy vs exact settlement: transfer counts and solve time.
+
+    python -m benchmarks.bench_settlement
+
+For each group size in BENCH_GROUP_SIZES solves BENCH_CASES random zero-sum
+balance sets (amounts drawn from a small set of prices, so zero-sum subgroups
+actually occur) with both solvers. No database needed. Exits non-zero if the
+exact solver ever returns more transfers than greedy or a plan that doesn't
+settle every balance.
+"""
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+from app.services import settlement_solver
+from benchmarks.common import env_int
+
+
+def random_balances(rng: random.Random, size: int) -> dict:
+    prices = [500, 1250, 2000, 3375, 4800]
+    values = [rng.choice(prices) * rng.choice((-1, 1)) for _ in range(size - 1)]
+    values.append(-sum(values))
+    return {user_id: cents for user_id, cents in enumerate(values, start=1)}
+
+
+def settles(amounts: dict, transfers) -> bool:
+    remaining = defaultdict(int, amounts)
+    for from_user, to_user, cents in transfers:
+        remaining[from_user] += cents
+        remaining[to_user] -= cents
+    return not any(remaining.values())
+
+
+def main():
+    sizes = [int(size) for size in os.getenv('BENCH_GROUP_SIZES', '6,10,14,18').split(',')]
+    cases = env_int('BENCH_CASES', 50)
+    rng = random.Random(0)
+    failures = []
+
+    print(f"{'size':>5} {'greedy tx':>10} {'exact tx':>9} {'improved':>9} {'greedy ms':>10} {'exact ms':>9}")
+    for size in sizes:
+        greedy_count = exact_count = improved = 0
+        greedy_time = exact_time = 0.0
+        for _ in range(cases):
+            amounts = random_balances(rng, size)
+            edges = [(1, user_id) for user_id in amounts]
+
+            start = time.perf_counter()
+            greedy = settlement_solver.greedy_transfers(amounts)
+            greedy_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            exact, stats = settlement_solver.solve(amounts, edges, time_budget=60.0, max_size=size)
+            exact_time += time.perf_counter() - start
+
+            if len(exact) > len(greedy) or not settles(amounts, exact) or stats['fallback']:
+                failures.append((size, amounts))
+            greedy_count += len(greedy)
+            exact_count += len(exact)
+            improved += len(exact) < len(greedy)
+
+        print(f"{size:>5} {greedy_count / cases:>10.2f} {exact_count / cases:>9.2f} {improved:>9} "
+              f"{greedy_time * 1000 / cases:>10.3f} {exact_time * 1000 / cases:>9.1f}")
+
+    if failures:
+        sys.exit(f"Exact solver worse than greedy or unbalanced in {len(failures)} case(s), "
+                 f"first: {failures[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Bulk user import throughput at several hashing pool sizes.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_user_import
+
+Imports BENCH_USERS fresh users per pool size in BENCH_POOL_SIZES (default
+1,2,4,8) and reports users/sec, next to the one-request-per-user path
+(existence check, inline bcrypt hash, commit). BCRYPT_LOG_ROUNDS applies as in
+the app (default 12).
+"""
+import os
+import time
+import uuid
+
+from app import db
+from app.models.user import User
+from app.services.user_import_service import UserImportService
+from benchmarks.common import bench_app, env_int
+
+
+def _rows(count):
+    tag = uuid.uuid4().hex[:8]
+    return [{
+        'name': f'import{i}',
+        'email': f'import-{tag}-{i}@example.com',
+        'mobile': f'{tag[:5]}{i:07d}'[:15],
+        'password': 'correct horse battery'
+    } for i in range(count)]
+
+
+def per_request(rows):
+    for row in rows:
+        if User.query.filter_by(email=row['email']).first():
+            continue
+        user = User(name=row['name'], email=row['email'], mobile=row['mobile'])
+        user.set_password(row['password'])
+        db.session.add(user)
+        db.session.commit()
+
+
+def main():
+    app = bench_app()
+    count = env_int('BENCH_USERS', 200)
+    pool_sizes = [int(size) for size in os.getenv('BENCH_POOL_SIZES', '1,2,4,8').split(',')]
+
+    with app.app_context():
+        print(f"{count} users, bcrypt rounds {app.config.get('BCRYPT_LOG_ROUNDS', 12)}, {os.cpu_count()} CPUs")
+        print(f"{'mode':>14} {'seconds':>9} {'users/s':>9}")
+
+        start = time.perf_counter()
+        per_request(_rows(count))
+        elapsed = time.perf_counter() - start
+        print(f"{'per-request':>14} {elapsed:>9.2f} {count / elapsed:>9.1f}")
+
+        for processes in pool_sizes:
+            rows = _rows(count)
+            start = time.perf_counter()
+            result = UserImportService.import_users(rows, processes=processes)
+            elapsed = time.perf_counter() - start
+            assert len(result['created']) == count, result['errors'][:5]
+            print(f"{f'bulk x{processes}':>14} {elapsed:>9.2f} {count / elapsed:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
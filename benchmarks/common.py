@@ -0,0 +1,38 @@
+import os
+import time
+from contextlib import contextmanager
+
+from app import create_app, db
+
+
+def bench_app():
+    """Create the app against DATABASE_URL with tables in place."""
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_users(count: int, prefix: str = 'bench'):
+    """Insert `count` users and return their ids."""
+    from app.models.user import User
+
+    users = [
+        User(name=f'{prefix}{i}', email=f'{prefix}{i}@example.com',
+             mobile=f'{i:010d}', password_hash='x')
+        for i in range(count)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+
+@contextmanager
+def timed(results: dict, key: str):
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
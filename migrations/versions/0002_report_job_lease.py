@@ -0,0 +1,31 @@
+"""report job lease columns
+
+Existing rows start with no heartbeat and zero attempts; the server default
+lets the NOT NULL column be added to a table that already has rows.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:20:41.527310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('report_job') as batch_op:
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('report_job') as batch_op:
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('heartbeat_at')
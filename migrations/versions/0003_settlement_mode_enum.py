@@ -0,0 +1,35 @@
+"""report job settlement_mode enum
+
+The column held 'greedy' or 'exact' as plain strings; the enum keeps those
+values, so existing rows convert in place.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 10:31:07.884215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+settlement_mode = sa.Enum('greedy', 'exact', name='settlementmode')
+
+
+def upgrade():
+    settlement_mode.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table('report_job') as batch_op:
+        batch_op.alter_column('settlement_mode', existing_type=sa.String(length=10), type_=settlement_mode,
+                              existing_nullable=False, postgresql_using='settlement_mode::settlementmode')
+
+
+def downgrade():
+    with op.batch_alter_table('report_job') as batch_op:
+        batch_op.alter_column('settlement_mode', existing_type=settlement_mode, type_=sa.String(length=10),
+                              existing_nullable=False)
+    settlement_mode.drop(op.get_bind(), checkfirst=True)
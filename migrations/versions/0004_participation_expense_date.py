@@ -0,0 +1,37 @@
+"""expense_participation.expense_date, backfilled from expense.date
+
+The column copies its expense's date so range partitions can prune on it.
+A table that `flask partitions convert` already rebuilt has it, so only the
+backfill runs there.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:52:18.306471
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('expense_participation')}
+    if 'expense_date' not in columns:
+        with op.batch_alter_table('expense_participation') as batch_op:
+            batch_op.add_column(sa.Column('expense_date', sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE expense_participation SET expense_date = ("
+        "SELECT expense.date FROM expense WHERE expense.id = expense_participation.expense_id"
+        ") WHERE expense_date IS NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('expense_participation') as batch_op:
+        batch_op.drop_column('expense_date')
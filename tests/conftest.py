@@ -0,0 +1,74 @@
+import os
+import tempfile
+
+# Config is read from the environment when app.config is imported
+_db_dir = tempfile.mkdtemp(prefix='expense_tests_')
+os.environ['FLASK_ENV'] = 'testing'
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ['ADMISSION_ENABLED'] = 'false'
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import create_app, db as _db  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['JWT_SECRET_KEY'] = 'test-secret'
+    return app
+
+
+@pytest.fixture
+def db(app):
+    with app.app_context():
+        _db.create_all()
+        yield _db
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def make_users(db):
+    """Insert `count` users and return their ids."""
+    from app.models.user import User
+
+    def make(count):
+        start = db.session.query(db.func.count(User.id)).scalar()
+        users = [
+            User(name=f'user{i}', email=f'user{i}@example.com', mobile=f'{i:010d}', password_hash='x')
+            for i in range(start, start + count)
+        ]
+        db.session.add_all(users)
+        db.session.commit()
+        return [user.id for user in users]
+    return make
+
+
+@pytest.fixture
+def auth_headers(app):
+    def headers(user_id):
+        with app.test_request_context():
+            return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+    return headers
+
+
+@pytest.fixture
+def record_statements(db):
+    """Run `call` and return its result with the SQL statements it executed."""
+    def record(call):
+        statements = []
+
+        def append(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', append)
+        try:
+            result = call()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', append)
+        return result, statements
+    return record
@@ -0,0 +1,34 @@
+from app.services.expense_service import ExpenseService
+
+
+def test_batch_query_count_is_independent_of_batch_size(client, db, make_users, auth_headers,
+                                                        record_statements):
+    requester, *others = make_users(51)
+    ExpenseService.create_expense(requester, 'team dinner', 510, 'equal',
+                                  {str(user_id): {} for user_id in [requester, *others]})
+    db.session.commit()
+    headers = auth_headers(requester)
+
+    def batch(user_ids):
+        db.session.remove()
+        return client.post('/api/balance-sheet/batch', json={'user_ids': user_ids}, headers=headers)
+
+    single, single_statements = record_statements(lambda: batch(others[:1]))
+    many, many_statements = record_statements(lambda: batch(others))
+
+    assert single.status_code == 200
+    assert many.status_code == 200
+    assert len(single.json['balances']) == 1
+    assert len(many.json['balances']) == 50
+    assert many.json['balances'][str(others[0])]['net_balance'] == -10.0
+    assert len(single_statements) == len(many_statements)
+
+
+def test_batch_user_ids_must_be_a_list(client, db, make_users, auth_headers):
+    user_id = make_users(1)[0]
+    headers = auth_headers(user_id)
+
+    for body in [{'user_ids': user_id}, {'user_ids': str(user_id)}, {'user_ids': None}, {}, [user_id]]:
+        response = client.post('/api/balance-sheet/batch', json=body, headers=headers)
+        assert response.status_code == 400, body
+    assert client.post('/api/balance-sheet/batch', json={'user_ids': [user_id]}, headers=headers).status_code == 200
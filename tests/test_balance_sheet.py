@@ -0,0 +1,30 @@
+from app.services.expense_service import ExpenseService
+
+
+def test_balance_sheet_is_json_unless_csv_is_asked_for(client, db, make_users, auth_headers):
+    user_id, other_id = make_users(2)
+    ExpenseService.create_expense(user_id, 'dinner', 30, 'equal', {str(user_id): {}, str(other_id): {}})
+    db.session.commit()
+    headers = auth_headers(user_id)
+
+    default = client.get('/api/balance-sheet', headers=headers)
+    assert default.status_code == 200
+    assert default.json['net_balance'] == 15.0
+    assert len(default.json['expenses_paid']) == 1
+
+    summary = client.get('/api/balance-sheet?fields=summary', headers=headers)
+    assert 'expenses_paid' not in summary.json
+
+    download = client.get('/api/balance-sheet?format=csv', headers=headers)
+    assert download.status_code == 200
+    assert download.mimetype == 'text/csv'
+    assert download.data.startswith(b'Personal Balance Sheet')
+
+
+def test_balance_sheet_rejects_unknown_formats_and_json_only_args_on_csv(client, db, make_users, auth_headers):
+    headers = auth_headers(make_users(1)[0])
+
+    for query in ['format=xml', 'format=CSV', 'format=csv&fields=summary', 'format=csv&since=2024-01-01',
+                  'format=csv&until=2024-01-01']:
+        response = client.get(f'/api/balance-sheet?{query}', headers=headers)
+        assert response.status_code == 400, query
@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import time
+import uuid
+
+import pytest
+
+POSTGRES_URL = os.getenv('TEST_POSTGRES_URL')
+FALLBACK_TTL = 2.0
+TIMEOUT = 15
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason='TEST_POSTGRES_URL is not set')
+
+
+def worker(database_url, commands, results):
+    """A separate app process with its own caches, driven over `commands`."""
+    os.environ.update(
+        FLASK_ENV='testing',
+        DATABASE_URL=database_url,
+        CACHE_ENABLED='true',
+        CACHE_FALLBACK_TTL=str(FALLBACK_TTL),
+        ADMISSION_ENABLED='false',
+        LOG_LEVEL='WARNING'
+    )
+    import threading
+    from app import create_app, db, invalidation
+    from app.models.user import User
+
+    app = create_app()
+    seen_ttls = []
+
+    def watch():
+        # The listener reconnects after about a second; sample often enough to see the gap
+        while True:
+            if not invalidation.connected:
+                seen_ttls.append(invalidation.ttl())
+            time.sleep(0.01)
+
+    with app.app_context():
+        cache = invalidation.cache('balances')
+        for command, arg in iter(commands.get, None):
+            if command == 'create_user':
+                db.create_all()
+                user = User(name='cache', email=f'{arg}@example.com', mobile=arg[:10], password_hash='x')
+                db.session.add(user)
+                db.session.commit()
+                results.put(user.id)
+            elif command == 'delete_user':
+                User.query.filter_by(id=arg).delete()
+                db.session.commit()
+                results.put(True)
+            elif command == 'fill':
+                results.put(cache.get_or_compute(arg, [arg], lambda: User.query.get(arg).name))
+            elif command == 'rename':
+                User.query.get(arg).name = 'renamed'
+                db.session.commit()
+                results.put(True)
+            elif command == 'cached':
+                results.put(arg in cache)
+            elif command == 'connected':
+                invalidation.start_listener()
+                results.put(invalidation.connected)
+            elif command == 'watch':
+                threading.Thread(target=watch, daemon=True).start()
+                results.put(True)
+            elif command == 'seen_ttls':
+                results.put(list(seen_ttls))
+
+
+class Worker:
+    def __init__(self, context):
+        self.commands, self.results = context.Queue(), context.Queue()
+        self.process = context.Process(target=worker, args=(POSTGRES_URL, self.commands, self.results),
+                                       daemon=True)
+        self.process.start()
+
+    def __call__(self, command, arg=None):
+        self.commands.put((command, arg))
+        return self.results.get(timeout=TIMEOUT)
+
+    def stop(self):
+        self.commands.put(None)
+        self.process.join(TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def wait_for(condition, timeout=TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def workers():
+    context = multiprocessing.get_context('spawn')
+    started = [Worker(context), Worker(context)]
+    user_id = started[0]('create_user', uuid.uuid4().hex)
+    for each in started:
+        assert wait_for(lambda: each('connected')), 'cache listener did not connect'
+    yield started, user_id
+    started[0]('delete_user', user_id)
+    for each in started:
+        each.stop()
+
+
+def test_write_in_one_worker_evicts_the_other(workers):
+    (writer, reader), user_id = workers
+    assert reader('fill', user_id) == 'cache'
+    assert reader('cached', user_id)
+
+    writer('rename', user_id)
+
+    assert wait_for(lambda: not reader('cached', user_id), timeout=5)
+    assert reader('fill', user_id) == 'renamed'
+
+
+def test_listener_loss_falls_back_to_short_ttl(workers):
+    (_, reader), user_id = workers
+    reader('fill', user_id)
+    reader('watch')
+
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(POSTGRES_URL)
+    with engine.begin() as conn:
+        killed = conn.execute(text(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE application_name = 'cache_invalidation_listener'"
+        )).scalars().all()
+    engine.dispose()
+    assert killed
+
+    assert wait_for(lambda: FALLBACK_TTL in reader('seen_ttls'))
+    # Reconnects, and drops whatever it cached while notifications could be missed
+    assert wait_for(lambda: reader('connected'))
+    assert not reader('cached', user_id)
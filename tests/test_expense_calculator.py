@@ -0,0 +1,124 @@
+from decimal import Decimal, ROUND_DOWN
+
+import pytest
+from hypothesis import given, strategies as st
+
+from app.exceptions.exception import (
+    InvalidAmountError,
+    InvalidParticipantsError,
+    InvalidSplitMethodError
+)
+from app.services.expense_calculator import ExpenseCalculator
+
+CENT = Decimal('0.01')
+PARTICIPANT_COUNTS = [2, 10, 100, 1000, 10000]
+
+calculator = ExpenseCalculator()
+user_ids = st.lists(st.integers(1, 10 ** 6).map(str), min_size=1, max_size=300, unique=True)
+totals = st.integers(1, 10 ** 10).map(lambda cents: Decimal(cents) * CENT)
+
+
+@st.composite
+def parts(draw, whole, count):
+    """`count` non-negative integers summing to `whole`."""
+    cuts = sorted(draw(st.lists(st.integers(0, whole), min_size=count - 1, max_size=count - 1)))
+    bounds = [0] + cuts + [whole]
+    return [bounds[i + 1] - bounds[i] for i in range(count)]
+
+
+@st.composite
+def exact_cases(draw):
+    ids = draw(user_ids)
+    cents = draw(parts(draw(st.integers(1, 10 ** 10)), len(ids)))
+    return {user_id: Decimal(part) * CENT for user_id, part in zip(ids, cents)}
+
+
+@st.composite
+def percentage_cases(draw):
+    ids = draw(user_ids)
+    # Hundredths of a percent, summing to exactly 100
+    hundredths = draw(parts(10000, len(ids)))
+    return draw(totals), {user_id: Decimal(part) * CENT for user_id, part in zip(ids, hundredths)}
+
+
+def assert_valid_shares(shares, total, participants):
+    assert set(shares) == set(participants)
+    assert sum(shares.values()) == total
+    assert all(share >= 0 for share in shares.values())
+    assert all(share == share.quantize(CENT) for share in shares.values())
+
+
+@given(totals, user_ids)
+def test_equal_split_puts_leftover_cents_on_first_participant(total, ids):
+    participants = {user_id: {} for user_id in ids}
+    shares = calculator.calculate_shares('equal', total, participants)
+
+    assert_valid_shares(shares, total, participants)
+    base = (total / len(ids)).quantize(CENT, rounding=ROUND_DOWN)
+    first, *rest = ids
+    assert all(shares[user_id] == base for user_id in rest)
+    assert 0 <= shares[first] - base < len(ids) * CENT
+
+
+@given(exact_cases())
+def test_exact_split_keeps_given_shares(participants):
+    total = sum(participants.values())
+    shares = calculator.calculate_shares('exact', total, participants)
+
+    assert_valid_shares(shares, total, participants)
+    assert shares == participants
+
+
+@given(percentage_cases())
+def test_percentage_split_puts_leftover_cents_on_highest_percentage(case):
+    total, participants = case
+    assert sum(participants.values()) == 100
+    shares = calculator.calculate_shares('percentage', total, participants)
+
+    assert_valid_shares(shares, total, participants)
+    top = max(participants.items(), key=lambda item: item[1])[0]
+    for user_id, percentage in participants.items():
+        expected = (percentage * total / 100).quantize(CENT, rounding=ROUND_DOWN)
+        if user_id == top:
+            assert 0 <= shares[user_id] - expected < len(participants) * CENT
+        else:
+            assert shares[user_id] == expected
+
+
+@pytest.mark.parametrize('split_method, total, participants, error', [
+    ('equal', Decimal('0'), {'1': {}}, InvalidAmountError),
+    ('equal', Decimal('-10'), {'1': {}}, InvalidAmountError),
+    ('equal', Decimal('10'), {}, InvalidParticipantsError),
+    ('exact', Decimal('10'), {'1': Decimal('4'), '2': Decimal('5.99')}, InvalidAmountError),
+    ('exact', Decimal('10'), {'1': Decimal('-5'), '2': Decimal('15')}, InvalidAmountError),
+    ('percentage', Decimal('10'), {'1': Decimal('50'), '2': Decimal('49.99')}, InvalidParticipantsError),
+    ('percentage', Decimal('10'), {'1': Decimal('-10'), '2': Decimal('110')}, InvalidParticipantsError),
+    ('shares', Decimal('10'), {'1': {}}, InvalidSplitMethodError),
+])
+def test_invalid_split_is_rejected(split_method, total, participants, error):
+    with pytest.raises(error):
+        calculator.calculate_shares(split_method, total, participants)
+
+
+def make_case(split_method, count):
+    """A valid split of count * 12.34 + 0.07 among `count` participants."""
+    cents = count * 1234 + 7
+    ids = [str(user_id) for user_id in range(1, count + 1)]
+    if split_method == 'equal':
+        return Decimal(cents) * CENT, {user_id: {} for user_id in ids}
+    if split_method == 'exact':
+        amounts = [1234 + 7] + [1234] * (count - 1)
+    else:
+        amounts = [10000 // count + 10000 % count] + [10000 // count] * (count - 1)
+    return Decimal(cents) * CENT, {user_id: Decimal(amount) * CENT for user_id, amount in zip(ids, amounts)}
+
+
+@pytest.mark.parametrize('count', PARTICIPANT_COUNTS)
+@pytest.mark.parametrize('split_method', ['equal', 'exact', 'percentage'])
+def test_split_speed(benchmark, split_method, count):
+    benchmark.group = f'split: {split_method}'
+    total, participants = make_case(split_method, count)
+
+    shares = benchmark(calculator.calculate_shares, split_method, total, participants)
+
+    assert sum(shares.values()) == total
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.models.journal import ExpenseEvent, ExpenseEventType
+from app.models.user import User
+from app.services.expense_journal_service import ExpenseJournalService
+from app.services.expense_service import ExpenseService
+
+POSTGRES_URL = os.getenv('TEST_POSTGRES_URL')
+
+
+def test_backfill_starts_edited_and_deleted_expenses_from_their_original_amounts(db, make_users):
+    a, b, c = make_users(3)
+    edited = ExpenseService.create_expense(a, 'rent', Decimal('90'), 'equal',
+                                           {str(a): {}, str(b): {}, str(c): {}})
+    deleted = ExpenseService.create_expense(b, 'taxi', Decimal('20'), 'equal', {str(a): {}, str(b): {}})
+    untouched = ExpenseService.create_expense(c, 'lunch', Decimal('15'), 'equal', {str(b): {}, str(c): {}})
+    db.session.commit()
+    # As if all three predate the journal
+    ExpenseEvent.query.delete()
+    db.session.commit()
+
+    ExpenseService.update_expense(edited, 'rent', Decimal('60'), 'exact',
+                                  {str(a): Decimal('10'), str(b): Decimal('50')})
+    ExpenseService.delete_expense(deleted)
+    db.session.commit()
+    assert ExpenseJournalService.verify()
+
+    assert ExpenseJournalService.backfill() == 3
+    assert ExpenseJournalService.verify() == []
+    created = ExpenseEvent.query.filter_by(event_type=ExpenseEventType.EXPENSE_CREATED).all()
+    assert sorted((event.expense_id, event.paid_delta) for event in created) == [
+        (edited.id, Decimal('90')), (deleted.id, Decimal('20')), (untouched.id, Decimal('15'))
+    ]
+
+    assert ExpenseJournalService.backfill() == 0
+    assert ExpenseJournalService.verify() == []
+
+
+@pytest.fixture
+def pg_db(app, monkeypatch):
+    from app import db
+
+    monkeypatch.setitem(app.config, 'SQLALCHEMY_DATABASE_URI', POSTGRES_URL)
+    with app.app_context():
+        db.create_all()
+        yield db
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason='TEST_POSTGRES_URL is not set')
+def test_snapshot_waits_for_an_event_that_commits_late(app, pg_db):
+    user = User(name='journal', email='journal@example.com', mobile='0000000001', password_hash='x')
+    pg_db.session.add(user)
+    pg_db.session.commit()
+
+    def event(paid):
+        return {'event_type': ExpenseEventType.SETTLEMENT_PAID, 'user_id': user.id,
+                'paid_delta': Decimal(paid), 'owed_delta': Decimal('0')}
+
+    engine = create_engine(POSTGRES_URL)
+    late = engine.connect()
+    late_transaction = late.begin()
+    late.execute(ExpenseEvent.__table__.insert(), event('5'))
+    with engine.begin() as conn:
+        # Takes the next id and commits first
+        conn.execute(ExpenseEvent.__table__.insert(), event('7'))
+
+    def snapshot():
+        with app.app_context():
+            ExpenseJournalService.take_snapshots([user.id])
+
+    snapshotter = threading.Thread(target=snapshot)
+    snapshotter.start()
+    time.sleep(0.5)
+    assert snapshotter.is_alive()
+
+    late_transaction.commit()
+    late.close()
+    snapshotter.join(10)
+    engine.dispose()
+
+    assert not snapshotter.is_alive()
+    assert ExpenseJournalService.rebuild_balances([user.id])[user.id].total_paid == Decimal('12')
@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.mark.parametrize('body', [
+    {'amount': 10, 'split_method': 'exact', 'participants': {'1': 4, '2': 5}},
+    {'amount': 10, 'split_method': 'percentage', 'participants': {'1': 50, '2': 40}},
+    {'amount': -10, 'split_method': 'equal', 'participants': {'1': {}}},
+])
+def test_invalid_split_is_a_400_on_create_and_update(client, db, make_users, auth_headers, body):
+    user_id, other_id = make_users(2)
+    headers = auth_headers(user_id)
+    body = dict(body, description='dinner',
+                participants={str([user_id, other_id][int(key) - 1]): value
+                              for key, value in body['participants'].items()})
+
+    assert client.post('/api/expenses', json=body, headers=headers).status_code == 400
+
+    created = client.post('/api/expenses', headers=headers, json={
+        'description': 'dinner', 'amount': 10, 'split_method': 'equal',
+        'participants': {str(user_id): {}, str(other_id): {}}
+    })
+    assert created.status_code == 201
+    expense_id = created.json['expense_id']
+    assert client.put(f'/api/expenses/{expense_id}', json=body, headers=headers).status_code == 400
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/api/metrics/admission', '/api/admin/slow-queries'])
+def test_metrics_are_admin_only(app, client, make_users, auth_headers, monkeypatch, path):
+    admin_id, user_id = make_users(2)
+    monkeypatch.setitem(app.config, 'ADMIN_USER_IDS', [admin_id])
+
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=auth_headers(user_id)).status_code == 403
+    assert client.get(path, headers=auth_headers(admin_id)).status_code == 200
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    engine = create_engine(url)
+
+    def flask_db(*args):
+        # In a separate process: env.py reconfigures logging for the whole interpreter
+        env = dict(os.environ, FLASK_APP='run.py', FLASK_ENV='testing', DATABASE_URL=url,
+                   ADMISSION_ENABLED='false', LOG_LEVEL='WARNING')
+        subprocess.run([sys.executable, '-m', 'flask', 'db', *args], cwd=ROOT, env=env, check=True,
+                       capture_output=True)
+
+    yield engine, flask_db
+    engine.dispose()
+
+
+def test_report_job_lease_columns_are_added_to_existing_rows(database):
+    engine, flask_db = database
+    flask_db('upgrade', '0001')
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO user (id, email, name, mobile) VALUES (1, 'a@example.com', 'a', '1')"))
+        conn.execute(text(
+            "INSERT INTO report_job (user_id, scope, settlement_mode, status, progress, created_at) "
+            "VALUES (1, 'USER', 'greedy', 'QUEUED', 0, '2026-01-01 00:00:00')"
+        ))
+
+    flask_db('upgrade', '0002')
+
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT attempts, heartbeat_at FROM report_job')).all() == [(0, None)]
+
+
+def test_settlement_mode_keeps_stored_values(app, database):
+    from app.models.report_job import ReportJob, SettlementMode
+
+    engine, flask_db = database
+    flask_db('upgrade', '0002')
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO user (id, email, name, mobile) VALUES (1, 'a@example.com', 'a', '1')"))
+        conn.execute(text(
+            "INSERT INTO report_job (user_id, scope, settlement_mode, status, progress, created_at) "
+            "VALUES (1, 'GROUP', 'exact', 'QUEUED', 0, '2026-01-01 00:00:00')"
+        ))
+
+    flask_db('upgrade', '0003')
+
+    with engine.connect() as conn:
+        row = conn.execute(ReportJob.__table__.select()).one()
+    assert row.settlement_mode == SettlementMode.EXACT
+
+
+def test_participation_expense_date_is_backfilled(database):
+    engine, flask_db = database
+    flask_db('upgrade', '0003')
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO user (id, email, name, mobile) VALUES (1, 'a@example.com', 'a', '1')"))
+        conn.execute(text(
+            "INSERT INTO expense (id, description, amount, date, split_method, creator_id, version) "
+            "VALUES (1, 'rent', 10, '2026-01-05 00:00:00', 'EQUAL', 1, 1)"
+        ))
+        conn.execute(text(
+            "INSERT INTO expense_participation (expense_id, user_id, share_amount) VALUES (1, 1, 10)"
+        ))
+
+    flask_db('upgrade', '0004')
+
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT expense_date FROM expense_participation')).scalar() == '2026-01-05 00:00:00'
+
+
+def test_migrations_match_the_models(app, database):
+    from alembic.autogenerate import compare_metadata
+    from alembic.runtime.migration import MigrationContext
+    from app import db
+    from app.services.partition_service import migration_filter
+
+    engine, flask_db = database
+    flask_db('upgrade')
+
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={'include_object': migration_filter()})
+        assert compare_metadata(context, db.metadata) == []
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from app.models.pairwise import PairwiseBalance
+from app.services.expense_service import ExpenseService
+from app.services.pairwise_ledger_service import PairwiseLedgerService
+
+
+def assert_ledger_matches_expenses(db):
+    db.session.expire_all()
+    rows = PairwiseBalance.query.all()
+    ledger = {(row.user_id, row.counterparty_id): row.amount for row in rows if row.amount != 0}
+
+    assert ledger == PairwiseLedgerService.compute_from_expenses()
+    amounts = {(row.user_id, row.counterparty_id): row.amount for row in rows}
+    for (user_id, counterparty_id), amount in amounts.items():
+        assert amount + amounts[(counterparty_id, user_id)] == 0
+
+
+def test_ledger_follows_expense_writes(db, make_users):
+    a, b, c, d = make_users(4)
+
+    dinner = ExpenseService.create_expense(a, 'dinner', Decimal('100'), 'equal',
+                                           {str(a): {}, str(b): {}, str(c): {}})
+    taxi = ExpenseService.create_expense(b, 'taxi', Decimal('45.50'), 'exact',
+                                         {str(a): Decimal('20.50'), str(c): Decimal('25')})
+    rent = ExpenseService.create_expense(c, 'rent', Decimal('1000'), 'percentage',
+                                         {str(a): 25, str(c): 40, str(d): 35})
+    db.session.commit()
+    assert_ledger_matches_expenses(db)
+    assert PairwiseBalance.query.get((a, b)).amount == Decimal('33.33') - Decimal('20.50')
+
+    # Drops c, adds d and changes b's share
+    ExpenseService.update_expense(dinner, 'dinner', Decimal('90'), 'exact',
+                                  {str(a): Decimal('30'), str(b): Decimal('20'), str(d): Decimal('40')})
+    ExpenseService.update_expense(rent, 'rent', Decimal('1000'), 'equal',
+                                  {str(a): {}, str(b): {}, str(c): {}, str(d): {}})
+    db.session.commit()
+    assert_ledger_matches_expenses(db)
+
+    ExpenseService.delete_expense(taxi)
+    db.session.commit()
+    assert_ledger_matches_expenses(db)
+
+    ExpenseService.delete_expense(dinner)
+    ExpenseService.delete_expense(rent)
+    db.session.commit()
+    assert_ledger_matches_expenses(db)
+    assert PairwiseLedgerService.compute_from_expenses() == {}
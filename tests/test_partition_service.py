@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import Column, DateTime
+
+from app.models.expense import Expense, ExpenseParticipation
+from app.services import partition_service
+
+
+@pytest.fixture
+def include_object(monkeypatch):
+    # As reported by PostgreSQL after a range conversion
+    monkeypatch.setattr(partition_service, '_partitioned_catalog', lambda: {
+        'parents': {'expense_participation'},
+        'children': {'expense_participation_2024_01', 'expense_participation_default'}
+    })
+    return partition_service.migration_filter()
+
+
+def test_existing_columns_of_the_partitioned_parent_are_not_compared(include_object):
+    column = ExpenseParticipation.__table__.c.expense_date
+    # The database side is NOT NULL under the range layout
+    reflected = Column('expense_date', DateTime, nullable=False)
+
+    assert not include_object(column, 'expense_date', 'column', False, reflected)
+
+
+def test_new_columns_and_other_tables_are_still_migrated(include_object):
+    participation = ExpenseParticipation.__table__
+    expense = Expense.__table__
+
+    assert include_object(participation.c.expense_date, 'expense_date', 'column', False, None)
+    assert include_object(expense.c.date, 'date', 'column', False, Column('date', DateTime, nullable=True))
+    assert include_object(participation, 'expense_participation', 'table', False, None)
+    assert not include_object(participation, 'expense_participation_2024_01', 'table', True, None)
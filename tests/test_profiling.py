@@ -0,0 +1,37 @@
+import os
+
+from flask import Flask
+from flask_log_request_id import RequestID
+
+from app.utils.profiling import RequestProfiler, find_profiles, sign_profile_token
+
+
+def profiled_app(directory):
+    app = Flask(__name__)
+    app.config.update(PROFILING_SECRET='secret', PROFILING_DIR=str(directory))
+    RequestID(app)
+    RequestProfiler(app)
+    app.add_url_rule('/ping', 'ping', lambda: 'pong')
+    return app
+
+
+def test_client_request_id_never_names_the_profile_files(tmp_path):
+    directory = tmp_path / 'profiles'
+    client = profiled_app(directory).test_client()
+    headers = {'X-Request-ID': '../escaped', 'X-Profile': sign_profile_token('secret', '/ping')}
+
+    first = client.get('/ping', headers=headers)
+    second = client.get('/ping', headers=headers)
+
+    assert not os.path.exists(tmp_path / 'escaped.prof')
+    assert not os.path.exists(tmp_path / 'escaped.json')
+    profile_ids = {first.headers['X-Profile-Id'], second.headers['X-Profile-Id']}
+    assert len(profile_ids) == 2
+    assert sorted(os.listdir(directory)) == sorted(
+        f"{profile_id}.{ext}" for profile_id in profile_ids for ext in ('prof', 'json')
+    )
+
+    found = find_profiles(str(directory), '../escaped')
+    assert {profile['profile_id'] for profile in found} == profile_ids
+    assert all(os.path.exists(profile['prof_path']) for profile in found)
+    assert find_profiles(str(directory), first.headers['X-Profile-Id'])[0]['request_id'] == '../escaped'
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.utils.db_routing import WRITE_COOKIE
+
+
+@pytest.fixture
+def replica(app, db, tmp_path, monkeypatch):
+    """An empty SQLite replica, like one that hasn't replayed any writes yet."""
+    url = f"sqlite:///{os.path.join(tmp_path, 'replica.db')}"
+    engine = create_engine(url)
+    db.Model.metadata.create_all(engine)
+    engine.dispose()
+
+    monkeypatch.setitem(app.config, 'SQLALCHEMY_BINDS', {'replica_0': url})
+    monkeypatch.setitem(app.config, 'REPLICA_BIND_KEYS', ['replica_0'])
+    monkeypatch.setattr(db.router, '_cycle', None)
+    monkeypatch.setattr(db.router, '_lag', {})
+    yield
+    db.get_engine(app, bind='replica_0').dispose()
+
+
+def send(app, call):
+    # A fresh app context per request, so g doesn't carry over as it would under the fixtures
+    with app.app_context():
+        return call()
+
+
+def add_expense(app, client, headers, user_ids):
+    response = send(app, lambda: client.post('/api/expenses', headers=headers, json={
+        'description': 'lunch', 'amount': 20, 'split_method': 'equal',
+        'participants': {str(user_id): {} for user_id in user_ids}
+    }))
+    assert response.status_code == 201
+    return response
+
+
+def list_expenses(app, client, headers):
+    response = send(app, lambda: client.get('/api/expenses', headers=headers))
+    assert response.status_code == 200
+    return response.json
+
+
+def test_writer_reads_from_primary_within_the_window(app, client, replica, make_users, auth_headers):
+    user_id, other_id = make_users(2)
+    headers = auth_headers(user_id)
+
+    response = add_expense(app, client, headers, [user_id, other_id])
+    assert WRITE_COOKIE in response.headers['Set-Cookie']
+
+    # The signed cookie, not this process's memory, keeps the writer on the primary
+    assert len(list_expenses(app, client, headers)) == 1
+
+    client.set_cookie('localhost', WRITE_COOKIE, 'forged')
+    assert list_expenses(app, client, headers) == []
+
+    client.cookie_jar.clear()
+    assert list_expenses(app, client, headers) == []
+
+
+def test_write_cookie_is_bound_to_the_writer(app, client, replica, make_users, auth_headers):
+    user_id, other_id = make_users(2)
+    add_expense(app, client, auth_headers(user_id), [user_id, other_id])
+
+    # Same client, different user: the other user's reads may use the replica
+    assert list_expenses(app, client, auth_headers(other_id)) == []
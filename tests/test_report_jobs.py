@@ -0,0 +1,77 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.report_job import ReportJob, ReportJobStatus, SettlementMode
+from app.services.balance_sheet_service import BalanceSheetService
+from app.services.expense_service import ExpenseService
+from app.services.report_job_service import ReportJobService
+
+
+def expire_lease(db, job_id):
+    ReportJob.query.filter_by(id=job_id).update({'heartbeat_at': datetime.utcnow() - timedelta(hours=1)})
+    db.session.commit()
+
+
+def test_job_of_a_dead_worker_is_requeued_and_its_writes_ignored(db, make_users):
+    user_id, = make_users(1)
+    job_id = ReportJobService.enqueue(user_id, 'user').id
+    first = ReportJobService.claim_next()
+    assert (first.id, first.status, first.attempts) == (job_id, ReportJobStatus.RUNNING, 1)
+
+    expire_lease(db, job_id)
+    second = ReportJobService.claim_next()
+
+    assert (second.id, second.attempts) == (job_id, 2)
+    # The first worker comes back: its progress and result no longer apply
+    assert not ReportJobService._update_claimed(job_id, 1, {'progress': 50})
+    assert ReportJobService._update_claimed(job_id, 2, {'progress': 50})
+
+
+def test_job_that_keeps_losing_its_worker_fails(app, db, make_users, monkeypatch):
+    monkeypatch.setitem(app.config, 'REPORT_JOB_MAX_ATTEMPTS', 2)
+    user_id, = make_users(1)
+    job_id = ReportJobService.enqueue(user_id, 'user').id
+    for _ in range(2):
+        assert ReportJobService.claim_next().id == job_id
+        expire_lease(db, job_id)
+
+    assert ReportJobService.claim_next() is None
+    job = ReportJob.query.get(job_id)
+    assert job.status == ReportJobStatus.FAILED
+    assert job.error == 'Report worker stopped responding'
+
+
+def test_user_report_reports_progress(app, db, make_users, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'REPORT_ARTIFACT_DIR', str(tmp_path))
+    user_id, other_id = make_users(2)
+    for amount in (10, 20, 30):
+        ExpenseService.create_expense(user_id, 'coffee', amount, 'equal', {str(user_id): {}, str(other_id): {}})
+    db.session.commit()
+
+    calls = []
+    BalanceSheetService.generate_balance_sheet_csv(user_id, progress=lambda done, total: calls.append((done, total)))
+    assert calls == [(6, 12)] + [(6 + written, 12) for written in range(1, 7)]
+
+    job_id = ReportJobService.enqueue(user_id, 'user').id
+    ReportJobService.run_job(ReportJobService.claim_next())
+    job = ReportJob.query.get(job_id)
+    assert (job.status, job.progress) == (ReportJobStatus.SUCCEEDED, 100)
+    assert os.path.exists(job.artifact_path)
+
+
+def test_group_report_keeps_its_settlement_mode(app, db, make_users, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'REPORT_ARTIFACT_DIR', str(tmp_path))
+    user_id, other_id = make_users(2)
+    ExpenseService.create_expense(user_id, 'taxi', 40, 'equal', {str(user_id): {}, str(other_id): {}})
+    db.session.commit()
+
+    job = ReportJobService.enqueue(user_id, 'group', 'exact')
+    assert job.settlement_mode == SettlementMode.EXACT
+    assert ReportJobService.to_dict(job)['settlement_mode'] == 'exact'
+    with pytest.raises(ValueError):
+        ReportJobService.enqueue(user_id, 'group', 'fastest')
+
+    ReportJobService.run_job(ReportJobService.claim_next())
+    assert ReportJob.query.get(job.id).status == ReportJobStatus.SUCCEEDED
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+from flask import Flask
+
+from app.utils.traffic_capture import TrafficRecorder
+
+
+@pytest.fixture
+def capture_app(tmp_path):
+    def make(salt):
+        app = Flask(__name__)
+        app.config.update(TRAFFIC_CAPTURE_FILE=str(tmp_path / 'traffic.jsonl'), TRAFFIC_CAPTURE_SALT=salt,
+                          TRAFFIC_CAPTURE_PSEUDONYMIZE_FIELDS=['email'])
+        app.route('/ping', methods=['POST'])(lambda: {'ok': True})
+        return app, TrafficRecorder(app)
+
+    yield make
+    recorder_logger = TrafficRecorder().logger
+    for handler in list(recorder_logger.handlers):
+        recorder_logger.removeHandler(handler)
+        handler.close()
+
+
+@pytest.mark.parametrize('salt', [None, ''])
+def test_capture_stays_off_without_a_salt(capture_app, tmp_path, caplog, salt):
+    app, recorder = capture_app(salt)
+    app.test_client().post('/ping', json={'email': 'someone@example.com'})
+
+    assert 'traffic_capture' not in app.extensions
+    assert not (tmp_path / 'traffic.jsonl').exists()
+    assert 'TRAFFIC_CAPTURE_SALT is empty' in caplog.text
+
+
+def test_capture_pseudonymizes_with_the_salt(capture_app, tmp_path):
+    app, recorder = capture_app('pepper')
+    app.test_client().post('/ping', json={'email': 'someone@example.com'})
+
+    line = json.loads((tmp_path / 'traffic.jsonl').read_text())
+    assert line['body']['email'] != 'someone@example.com'
+    assert line['body']['email'] == recorder.sanitize({'email': 'someone@example.com'})['email']
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+from app.services.archive_service import ArchiveService
+from app.services.balance_sheet_service import BalanceSheetService
+from app.services.expense_service import ExpenseService
+
+
+def test_totals_read_archive_and_working_rows_together(db, make_users, record_statements):
+    user_id, other_id = make_users(2)
+    participants = {str(user_id): {}, str(other_id): {}}
+    ExpenseService.create_expense(user_id, 'old rent', 100, 'equal', participants)
+    ExpenseService.create_expense(other_id, 'old power', 40, 'equal', participants)
+    db.session.commit()
+    ArchiveService.archive(before=datetime.utcnow() + timedelta(days=1))
+    ExpenseService.create_expense(user_id, 'dinner', 30, 'equal', participants)
+    db.session.commit()
+
+    for projection in BalanceSheetService.PROJECTIONS:
+        balance, statements = record_statements(
+            lambda: BalanceSheetService.calculate_user_balance(user_id, projection)
+        )
+        assert (balance.total_paid, balance.total_owed) == (130, 85)
+        # An archive batch moves rows and folds them into carried_balance in one
+        # transaction; reading both sides in one statement can't miss them
+        for statement in statements:
+            if 'carried_balance' in statement or 'archived_expense' in statement:
+                assert 'UNION ALL' in statement
+
+    full = BalanceSheetService.calculate_user_balance(user_id, 'full')
+    assert sorted(expense['description'] for expense in full.expenses_paid) == ['dinner', 'old rent']
+    assert len(full.expenses_involved) == 3